@@ -1,26 +1,50 @@
 # ARQUIVO: main.py
 
+import argparse
+import contextlib
+import json
 import sys
 import os
-from datetime import datetime
+from pathlib import Path
 
 # Importações dos módulos
-from otimizador.io import user_input, config_manager
-from otimizador.utils import (gerar_lista_meses, converter_projetos_para_modelo,
-                              renumerar_instrutores_ativos, analisar_distribuicao_instrutores_por_projeto,
-                              calcular_fluxo_caixa_por_projeto)
-from otimizador.core import stage_1, stage_2
-from otimizador.reporting import plotting, spreadsheets, pdf_generator
+from otimizador.io import user_input, config_manager, checkpoint, cache_resultados
+from otimizador import instrumentacao, lote
+from otimizador.data_models import PERFIS_SOLVER, QUALIDADES_GRAFICO, FORMATOS_GRAFICO
+from otimizador.instrumentacao import medir_fase
+from otimizador.pipeline import preparar_horizonte, otimizar_estagios, gerar_relatorios
+# Os módulos pesados (numpy, OR-Tools, pandas, matplotlib, fpdf) só são carregados na etapa que os usa,
+# depois da escolha no menu; `python -m otimizador.tempo_importacao` acompanha o tempo de partida
 
 
-def main():
+def executar_otimizacao(parametros, projetos_modelo, meses, meses_ferias_idx, receptor=None):
+    """
+    Executa os dois estágios com o motor configurado, encerrando o programa se algum deles falhar.
+    Retorna (resultado do Estágio 1, resultado do Estágio 2).
+    """
+    resultados_estagio1, resultados_estagio2 = otimizar_estagios(parametros, projetos_modelo, meses,
+                                                                 meses_ferias_idx, receptor)
+    if not resultados_estagio1:
+        print("\n[ERRO] Falha no Estágio 1. Verifique as restrições do projeto.")
+        sys.exit(1)
+    if not resultados_estagio2:
+        print("\n[ERRO] Falha no Estágio 2. Tente aumentar o spread ou o timeout.")
+        sys.exit(1)
+    return resultados_estagio1, resultados_estagio2
+
+
+def main(forcar_resolucao: bool = False, qualidade_graficos: str = "impressao", formato_graficos: str = "png",
+         planilhas_separadas: bool = False):
     """
     Função principal que executa todo o pipeline de otimização.
+    Com `forcar_resolucao`, ignora resultados guardados no cache e otimiza novamente.
     """
     print("\n" + "=" * 80)
     print("SISTEMA DE OTIMIZAÇÃO DE ALOCAÇÃO DE INSTRUTORES v2.7 (Fluxo de Caixa)")
     print("=" * 80)
 
+    receptor = None
+    instrumentacao.iniciar_execucao()
     try:
         # 1. Gerenciamento e Obtenção de Configurações
         parametros, projetos_config = config_manager.menu_gerenciar_configuracoes()
@@ -33,79 +57,82 @@ def main():
         else:
             user_input.exibir_resumo_parametros(parametros)
             user_input.exibir_resumo_projetos(projetos_config)
+            projetos_config = user_input.oferecer_edicao_projetos(projetos_config)
 
         # 2. Preparação de Dados
-        dt_min = min(datetime.strptime(p.data_inicio, "%d/%m/%Y") for p in projetos_config)
-        dt_max = max(datetime.strptime(p.data_termino, "%d/%m/%Y") for p in projetos_config)
-        meses = gerar_lista_meses(dt_min.strftime("%d/%m/%Y"), dt_max.strftime("%d/%m/%Y"))
-        meses_ferias_idx = [meses.index(m) for m in parametros.meses_ferias if m in meses]
+        meses, meses_ferias_idx = preparar_horizonte(projetos_config, parametros)
 
         # 3. Conversão e Otimização
-        projetos_modelo = converter_projetos_para_modelo(projetos_config, meses, meses_ferias_idx, parametros)
-
-        resultados_estagio1 = stage_1.otimizar_curva_demanda(projetos_modelo, meses, parametros)
-        if not resultados_estagio1:
-            print("\n[ERRO] Falha no Estágio 1. Verifique as restrições do projeto.")
-            sys.exit(1)
-
-        resultados_estagio2 = stage_2.otimizar_atribuicao_e_carga(
-            resultados_estagio1['cronograma'], projetos_modelo, meses, meses_ferias_idx, parametros
-        )
-        if not resultados_estagio2 or resultados_estagio2["status"] == "falha":
-            print("\n[ERRO] Falha no Estágio 2. Tente aumentar o spread ou o timeout.")
-            sys.exit(1)
+        from otimizador.utils import converter_projetos_para_modelo
+        with medir_fase("conversao_projetos"):
+            projetos_modelo = converter_projetos_para_modelo(projetos_config, meses, meses_ferias_idx, parametros)
+
+        chave_cache = cache_resultados.calcular_chave_cache(parametros, projetos_config)
+        em_cache = None if forcar_resolucao else cache_resultados.carregar_resultados(chave_cache)
+        if em_cache is not None:
+            resultados_estagio1, resultados_estagio2 = em_cache
+            resultados_estagio1['parametros'] = parametros
+            origem_resultados = "cache"
+            print(f"\n[✓] Resultados recuperados do cache ({chave_cache[:12]}). "
+                  "Use --forcar-resolucao para otimizar novamente.")
+        else:
+            if parametros.modo_anytime:
+                receptor = checkpoint.ReceptorProgresso()
+                print(f"\n[INFO] Modo anytime: incumbentes gravados em {receptor.caminho}. "
+                      "Pressione Ctrl-C para encerrar a busca e gerar os relatórios com a melhor solução.")
+            # Com poucos projetos alterados desde o último plano, só a vizinhança da alteração é reotimizada
+            plano_anterior = (cache_resultados.carregar_ultimo_plano()
+                              if parametros.max_projetos_incremental > 0 and not forcar_resolucao else None)
+            incremental = None
+            if plano_anterior is not None:
+                from otimizador.core import reotimizacao_incremental
+                with medir_fase("reotimizacao_incremental"):
+                    incremental = reotimizacao_incremental.reotimizar_incremental(
+                        plano_anterior, projetos_config, projetos_modelo, meses, meses_ferias_idx, parametros)
+            if incremental is not None:
+                resultados_estagio1, resultados_estagio2 = incremental
+                origem_resultados = "incremental"
+            else:
+                resultados_estagio1, resultados_estagio2 = executar_otimizacao(
+                    parametros, projetos_modelo, meses, meses_ferias_idx, receptor)
+                origem_resultados = "otimizacao"
+                # Só o plano completo vai para o cache: o incremental depende do plano anterior, não só da chave
+                cache_resultados.salvar_resultados(chave_cache, resultados_estagio1, resultados_estagio2)
+        if parametros.max_projetos_incremental > 0:
+            cache_resultados.salvar_ultimo_plano(parametros, projetos_config, meses, resultados_estagio1,
+                                                 resultados_estagio2)
 
         # 4. Pós-processamento e Relatórios
-        resultados_estagio2['atribuicoes'], contagem_instrutores_hab = renumerar_instrutores_ativos(
-            resultados_estagio2['atribuicoes'])
-
-        distribuicao_por_projeto = analisar_distribuicao_instrutores_por_projeto(resultados_estagio2['atribuicoes'])
-
-        # Calcular fluxo de caixa
-        fluxo_caixa = calcular_fluxo_caixa_por_projeto(
-            resultados_estagio2['atribuicoes'],
-            meses,
-            meses_ferias_idx,
-            parametros.remuneracao_instrutor
-        )
-
-        print("\n" + "=" * 80 + "\nGERANDO VISUALIZAÇÕES E RELATÓRIOS\n" + "=" * 80)
-
-        df_consolidada_instrutor = spreadsheets.gerar_planilha_consolidada_instrutor(resultados_estagio2['atribuicoes'])
-        spreadsheets.gerar_planilha_detalhada(resultados_estagio2['atribuicoes'], meses, meses_ferias_idx)
-        df_fluxo_caixa = spreadsheets.gerar_planilha_fluxo_caixa(fluxo_caixa, meses)
-
-        graficos = {
-            'projeto_mes': plotting.gerar_grafico_turmas_projeto_mes(resultados_estagio2['turmas'], meses,
-                                                                     meses_ferias_idx),
-            'instrutor_projeto': plotting.gerar_grafico_turmas_instrutor_tipologia_projeto(
-                resultados_estagio2['atribuicoes']),
-            'carga_instrutor': plotting.gerar_grafico_carga_por_instrutor(resultados_estagio2['atribuicoes']),
-            'fluxo_caixa': plotting.gerar_grafico_fluxo_caixa(fluxo_caixa, meses)
-        }
-        graficos['prog_rob'], serie_temporal_df = plotting.gerar_grafico_demanda_prog_rob(resultados_estagio2['turmas'],
-                                                                                          meses, meses_ferias_idx)
-
-        pdf_generator.gerar_relatorio_pdf(
-            projetos_config,
-            resultados_estagio1,
-            resultados_estagio2,
-            graficos,
-            serie_temporal_df,
-            df_consolidada_instrutor,
-            contagem_instrutores_hab,
-            distribuicao_por_projeto,
-            df_fluxo_caixa
-        )
-
-        for path in graficos.values():
-            if path and os.path.exists(path): os.remove(path)
+        gerar_relatorios(projetos_config, parametros, meses, meses_ferias_idx, resultados_estagio1,
+                         resultados_estagio2, qualidade_graficos=qualidade_graficos,
+                         formato_graficos=formato_graficos, planilhas_separadas=planilhas_separadas)
+
+        # 5. Resumo de desempenho da execução
+        instrumentacao.exibir_resumo()
+        resumo = instrumentacao.obter_resumo({
+            "motor_otimizacao": parametros.motor_otimizacao,
+            "perfil_solver": parametros.perfil_solver,
+            "num_projetos": len(projetos_config),
+            "num_meses": len(meses),
+            "num_turmas": len(resultados_estagio2['turmas']),
+            "pico_max": resultados_estagio1['pico_max'],
+            "custo_total_previsto": resultados_estagio2['custo_total_previsto'],
+            "origem_resultados": origem_resultados,
+        })
+        instrumentacao.gravar_resumo_json(resumo)
+        # Exportação opcional para o coletor textfile do Prometheus (node_exporter)
+        caminho_prometheus = os.environ.get("OTIMIZADOR_PROMETHEUS_TEXTFILE")
+        if caminho_prometheus:
+            instrumentacao.gravar_textfile_prometheus(resumo, caminho_prometheus)
 
         print("\n" + "=" * 80 + "\nPROCESSO CONCLUÍDO COM SUCESSO!\n" + "=" * 80)
-        print("Arquivos gerados: Relatorio_Otimizacao_Custo.pdf e planilhas .xlsx")
+        planilhas = "planilhas .xlsx" if planilhas_separadas else "Planilhas_Otimizacao.xlsx"
+        print(f"Arquivos gerados: Relatorio_Otimizacao_Custo.pdf, {planilhas} e Resumo_Execucao.json")
 
     except KeyboardInterrupt:
         print("\n\n[!] Operação cancelada pelo usuário.")
+        if receptor is not None and receptor.caminho.exists():
+            print(f"[INFO] Última solução encontrada preservada em: {receptor.caminho}")
         sys.exit(0)
     except Exception as e:
         print(f"\n[ERRO CRÍTICO] {e}")
@@ -114,5 +141,66 @@ def main():
         sys.exit(1)
 
 
+def main_lote(argumentos: argparse.Namespace, forcar_resolucao: bool = False) -> int:
+    """
+    Execução sem interação (cron, filas, vários processos na mesma máquina): o andamento vai para a
+    saída de erro e a saída padrão recebe só o resultado em JSON. Retorna o código de saída.
+    """
+    # O log do CP-SAT (perfis com log) é escrito em C++ direto no descritor 1, fora do alcance de
+    # redirect_stdout: o descritor também aponta para a saída de erro até o JSON ser emitido
+    sys.stdout.flush()
+    saida_padrao = os.dup(1)
+    os.dup2(2, 1)
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            codigo, resultado = lote.executar_lote(argumentos.config, argumentos.saida, argumentos.perfil_solver,
+                                                   argumentos.timeout, argumentos.relatorios,
+                                                   argumentos.qualidade_graficos, argumentos.formato_graficos,
+                                                   forcar_resolucao,
+                                                   planilhas_separadas=argumentos.planilhas_separadas)
+    finally:
+        sys.stderr.flush()
+        os.dup2(saida_padrao, 1)
+        os.close(saida_padrao)
+    print(json.dumps(resultado, ensure_ascii=False, default=str))
+    return codigo
+
+
+def interpretar_argumentos(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Otimização da alocação de instrutores. Sem --config abre o menu interativo; com --config "
+                    "resolve a configuração sem perguntas e emite o resultado em JSON na saída padrão.",
+        epilog=f"Códigos de saída em lote: {lote.SAIDA_SUCESSO} sucesso, {lote.SAIDA_ERRO} erro, "
+               f"{lote.SAIDA_CONFIGURACAO_INVALIDA} configuração ou argumentos inválidos, "
+               f"{lote.SAIDA_FALHA_ESTAGIO_1} falha no Estágio 1, {lote.SAIDA_FALHA_ESTAGIO_2} falha no Estágio 2, "
+               f"{lote.SAIDA_SPREAD_RELAXADO} plano acima do spread máximo, {lote.SAIDA_CANCELADA} cancelado.")
+    parser.add_argument("--config", type=Path, help="arquivo JSON de configuração (execução em lote)")
+    parser.add_argument("--saida", type=Path, default=Path('.'), help="diretório dos relatórios e do resumo")
+    parser.add_argument("--perfil-solver", choices=list(PERFIS_SOLVER), help="substitui o perfil da configuração")
+    parser.add_argument("--timeout", type=int, help="tempo limite por estágio em segundos")
+    parser.add_argument("--relatorios", choices=lote.RELATORIOS_LOTE, default='completo',
+                        help="completo (planilhas e PDF), planilhas ou nenhum")
+    parser.add_argument("--qualidade-graficos", choices=list(QUALIDADES_GRAFICO), default="impressao",
+                        help="resolução dos gráficos no PDF: rascunho (%d ppi, mais rápido) ou impressao (%d ppi)"
+                             % (QUALIDADES_GRAFICO["rascunho"], QUALIDADES_GRAFICO["impressao"]))
+    parser.add_argument("--formato-graficos", choices=FORMATOS_GRAFICO, default="png",
+                        help="png (sem perdas), jpeg (compactado) ou svg (vetorial, o PDF menor)")
+    parser.add_argument("--planilhas-separadas", action="store_true",
+                        help="grava cada planilha em seu arquivo em vez de uma única pasta de trabalho")
+    parser.add_argument("--forcar-resolucao", action="store_true", help="ignora o cache de resultados")
+    argumentos = parser.parse_args(argv)
+    if argumentos.config is None and (argumentos.saida != Path('.') or argumentos.perfil_solver
+                                      or argumentos.timeout is not None or argumentos.relatorios != 'completo'):
+        parser.error("--saida, --perfil-solver, --timeout e --relatorios exigem --config")
+    return argumentos
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    argumentos = interpretar_argumentos()
+    forcar_resolucao = (argumentos.forcar_resolucao
+                        or os.environ.get("OTIMIZADOR_FORCAR_RESOLUCAO", "") not in ("", "0"))
+    if argumentos.config is None:
+        main(forcar_resolucao=forcar_resolucao, qualidade_graficos=argumentos.qualidade_graficos,
+             formato_graficos=argumentos.formato_graficos, planilhas_separadas=argumentos.planilhas_separadas)
+    else:
+        sys.exit(main_lote(argumentos, forcar_resolucao))
@@ -0,0 +1,102 @@
+# ARQUIVO: otimizador/core/cronogramas_alternativos.py
+
+import dataclasses
+import math
+import os
+from typing import List, Dict, Optional, Tuple, Callable
+
+from ..data_models import Projeto, ParametrosOtimizacao
+from ..instrumentacao import executar_com_registro, incorporar_registro
+from . import stage_1
+from .perfis_solver import dividir_workers, PoolBuscas
+
+# Saída de executar_com_registro para um candidato interrompido antes de começar a busca
+_SEM_RESULTADO = (None, {"modelos": [], "limites": []})
+
+
+def avaliar_cronogramas_alternativos(projetos_flexiveis: List[Projeto],
+                                     meses: List[str],
+                                     meses_ferias: List[int],
+                                     parametros: ParametrosOtimizacao,
+                                     resultados_estagio1: Dict,
+                                     otimizar_estagio2: Callable,
+                                     ao_melhorar: Optional[Callable[[Dict], None]] = None) -> Tuple[Dict, Dict]:
+    """
+    Vários cronogramas têm o mesmo pico ótimo e custos de alocação bem diferentes. Enumera
+    cronogramas alternativos ao do Estágio 1, resolve o Estágio 2 de cada candidato em um pool de
+    processos e devolve (resultado do Estágio 1, resultado do Estágio 2) do plano mais barato.
+    Os workers do Estágio 2 são repartidos entre os candidatos resolvidos ao mesmo tempo e, com mais
+    candidatos que núcleos, o tempo limite entre as rodadas do pool, para que a avaliação toda caiba nele.
+    O resultado do Estágio 2 inclui 'comparacao_cronogramas', uma linha por candidato.
+    No modo anytime, `ao_melhorar` recebe apenas o plano escolhido e Ctrl-C compara as melhores
+    soluções que cada candidato tinha até ali.
+    """
+    candidatos = [resultados_estagio1] + stage_1.enumerar_cronogramas_alternativos(
+        projetos_flexiveis, meses, parametros, resultados_estagio1)
+    print("\n" + "=" * 80 + f"\nESTÁGIO 2: Avaliação de {len(candidatos)} Cronogramas Candidatos\n" + "=" * 80)
+
+    num_processos = max(1, min(len(candidatos), os.cpu_count() or 1))
+    parametros_candidato = dividir_workers(parametros, num_processos, ("estagio_2",))
+    rodadas = math.ceil(len(candidatos) / num_processos)
+    if rodadas > 1:
+        parametros_candidato = dataclasses.replace(
+            parametros_candidato, timeout_segundos=max(1, parametros.timeout_segundos // rodadas))
+        print(f"[INFO] {len(candidatos)} candidatos em {num_processos} processo(s): "
+              f"{parametros_candidato.timeout_segundos}s por candidato.")
+    with PoolBuscas(max_workers=num_processos) as executor:
+        futuros = {idx: executor.submit(executar_com_registro, otimizar_estagio2, candidato['cronograma'],
+                                        projetos_flexiveis, meses, meses_ferias, parametros_candidato)
+                   for idx, candidato in enumerate(candidatos)}
+        saidas, interrompida = executor.aguardar(futuros, parametros, _SEM_RESULTADO)
+    resultados = []
+    for idx in range(len(candidatos)):
+        resultado, registro = saidas[idx]
+        incorporar_registro(registro, f"candidato_{idx + 1}")
+        resultados.append(resultado)
+
+    comparacao = []
+    for idx, (candidato, resultado) in enumerate(zip(candidatos, resultados)):
+        sucesso = bool(resultado) and resultado['status'] == 'sucesso'
+        comparacao.append({
+            "candidato": idx + 1,
+            "pico_prog": candidato['pico_prog'],
+            "pico_rob": candidato['pico_rob'],
+            "status": resultado['status'] if resultado else 'falha',
+            "custo_total_previsto": resultado['custo_total_previsto'] if sucesso else None,
+            "total_instrutores_flex": resultado['total_instrutores_flex'] if sucesso else None,
+            "spread_carga": resultado['spread_carga'] if sucesso else None,
+        })
+
+    validos = [idx for idx, linha in enumerate(comparacao) if linha['custo_total_previsto'] is not None]
+    if not validos:
+        print("\n[✗] FALHA: nenhum cronograma candidato pôde ser alocado.")
+        return resultados_estagio1, {"status": "falha"}
+
+    melhor = min(validos, key=lambda idx: comparacao[idx]['custo_total_previsto'])
+    for linha in comparacao:
+        linha['escolhido'] = linha['candidato'] == melhor + 1
+    _exibir_comparacao(comparacao)
+
+    resultado_escolhido = resultados[melhor]
+    resultado_escolhido['comparacao_cronogramas'] = comparacao
+    resultado_escolhido['busca_interrompida'] = resultado_escolhido.get('busca_interrompida', False) or interrompida
+    if ao_melhorar is not None:
+        ao_melhorar({"estagio": "estagio_2", "numero": 1, "objetivo": resultado_escolhido['custo_total_previsto'],
+                     "limite": None, "tempo": None,
+                     "solucao": {'atribuicoes': resultado_escolhido['atribuicoes'],
+                                 'custo_total': resultado_escolhido['custo_total_previsto']}})
+    return candidatos[melhor], resultado_escolhido
+
+
+def _exibir_comparacao(comparacao: List[Dict]):
+    """Exibe no terminal a tabela de custos por cronograma candidato."""
+    print("\nComparação dos cronogramas candidatos:")
+    for linha in comparacao:
+        if linha['custo_total_previsto'] is not None:
+            custo = f"R$ {linha['custo_total_previsto']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+            detalhe = f"{custo} | {linha['total_instrutores_flex']} instrutores | spread {linha['spread_carga']}"
+        else:
+            detalhe = "sem alocação"
+        marcador = " <- escolhido" if linha['escolhido'] else ""
+        print(f"  • Cronograma {linha['candidato']}: pico PROG {linha['pico_prog']} / ROB {linha['pico_rob']} | "
+              f"{detalhe}{marcador}")
@@ -0,0 +1,212 @@
+# ARQUIVO: otimizador/core/decomposicao.py
+
+import dataclasses
+import math
+import time
+from collections import defaultdict
+from typing import List, Dict, Optional, Tuple, Callable
+
+from ..data_models import Projeto, ParametrosOtimizacao
+from ..instrumentacao import executar_com_registro, incorporar_registro
+from ..utils import construir_indice_incidencia
+from . import stage_1, stage_2
+from .perfis_solver import dividir_workers, PoolBuscas
+
+# Saída de executar_com_registro para um filho interrompido antes de começar a busca
+_SEM_RESULTADO = (None, {"modelos": [], "limites": []})
+
+
+def otimizar_curva_demanda_decomposta(projetos_flexiveis: List[Projeto],
+                                      meses: List[str],
+                                      parametros: ParametrosOtimizacao,
+                                      ao_melhorar: Optional[Callable[[Dict], None]] = None) -> Optional[Dict]:
+    """
+    Executa o Estágio 1 com um modelo por habilidade, cada um em seu próprio processo.
+    PROG e ROB só se acoplam por pico_max = max(pico_prog, pico_rob), portanto o máximo dos
+    ótimos individuais é o ótimo do modelo conjunto. Os workers do perfil são repartidos entre
+    os processos. No modo anytime, `ao_melhorar` recebe apenas o resultado combinado e Ctrl-C
+    combina as melhores soluções de cada habilidade.
+    """
+    print("\n" + "=" * 80 + "\nESTÁGIO 1: Modo Decomposto por Habilidade\n" + "=" * 80)
+    projetos_por_hab = {
+        'PROG': [dataclasses.replace(p, rob=0) for p in projetos_flexiveis if p.prog > 0],
+        'ROBOTICA': [dataclasses.replace(p, prog=0) for p in projetos_flexiveis if p.rob > 0],
+    }
+    projetos_por_hab = {hab: projs for hab, projs in projetos_por_hab.items() if projs}
+    if not projetos_por_hab:
+        return stage_1.otimizar_curva_demanda(projetos_flexiveis, meses, parametros)
+
+    parametros_habilidade = dividir_workers(parametros, len(projetos_por_hab), ("estagio_1",))
+    with PoolBuscas(max_workers=len(projetos_por_hab)) as executor:
+        futuros = {hab: executor.submit(executar_com_registro, stage_1.otimizar_curva_demanda, projs, meses,
+                                        parametros_habilidade)
+                   for hab, projs in projetos_por_hab.items()}
+        saidas, interrompida = executor.aguardar(futuros, parametros, _SEM_RESULTADO)
+    resultados = {}
+    for hab, (resultado, registro) in saidas.items():
+        resultados[hab] = resultado
+        incorporar_registro(registro, hab)
+
+    if any(r is None for r in resultados.values()):
+        print("\n[✗] FALHA: ao menos uma habilidade não pôde ser programada.")
+        return None
+
+    cronograma = defaultdict(list)
+    for resultado in resultados.values():
+        for proj_nome, entradas in resultado['cronograma'].items():
+            cronograma[proj_nome].extend(entradas)
+
+    pico_prog = resultados['PROG']['pico_prog'] if 'PROG' in resultados else 0
+    pico_rob = resultados['ROBOTICA']['pico_rob'] if 'ROBOTICA' in resultados else 0
+    print(f"\n[✓] Estágio 1 decomposto concluído. Pico PROG: {pico_prog} | Pico ROB: {pico_rob}")
+    if ao_melhorar is not None:
+        ao_melhorar({"estagio": "estagio_1", "numero": 1, "objetivo": max(pico_prog, pico_rob),
+                     "limite": max(pico_prog, pico_rob), "tempo": None,
+                     "solucao": {'cronograma': dict(cronograma), 'pico_max': max(pico_prog, pico_rob)}})
+    return {
+        "cronograma": dict(cronograma),
+        "pico_max": max(pico_prog, pico_rob),
+        "pico_prog": pico_prog,
+        "pico_rob": pico_rob,
+        "meses_ferias": next(iter(resultados.values()))['meses_ferias'],
+        "parametros": parametros,
+        "busca_interrompida": interrompida or any(r.get('busca_interrompida', False) for r in resultados.values())
+    }
+
+
+def otimizar_atribuicao_decomposta(cronograma_flexivel: Dict,
+                                   projetos: List[Projeto],
+                                   meses: List[str],
+                                   meses_ferias: List[int],
+                                   parametros: ParametrosOtimizacao,
+                                   ao_melhorar: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    Executa o Estágio 2 com um modelo por habilidade, cada um em seu próprio processo, e combina
+    atribuições e custos. O único acoplamento entre habilidades é o spread global: cada modelo
+    respeita o spread máximo isoladamente e, se a combinação o violar, ambos são resolvidos de novo
+    com uma janela de carga comum [mín, mín + spread]. As duas resoluções dividem o timeout: a
+    primeira usa metade e a coordenação, o que restar. Se essa coordenação falhar, o plano
+    relaxado (spread garantido apenas por habilidade) é devolvido com 'spread_relaxado' = True.
+    No modo anytime, `ao_melhorar` recebe apenas o resultado combinado; depois de um Ctrl-C não há
+    coordenação e o plano combinado sai acima do spread, se for o caso, com 'spread_relaxado' = True.
+    """
+    print("\n" + "=" * 80 + "\nESTÁGIO 2: Modo Decomposto por Habilidade\n" + "=" * 80)
+    cronogramas_por_hab = _separar_cronograma_por_habilidade(cronograma_flexivel)
+    prazo = time.monotonic() + parametros.timeout_segundos
+
+    resultados, interrompida = _resolver_habilidades(cronogramas_por_hab, projetos, meses, meses_ferias,
+                                                     parametros, tempo_limite=parametros.timeout_segundos / 2)
+    if resultados is None:
+        return {"status": "falha"}
+
+    spread_relaxado = False
+    cargas = [c for r in resultados.values() for c in r['carga_por_instrutor'].values()]
+    if cargas and max(cargas) - min(cargas) > parametros.spread_maximo and interrompida:
+        spread_relaxado = True
+        print("[AVISO] Busca interrompida: habilidades combinadas sem coordenação do spread global.")
+    elif cargas and max(cargas) - min(cargas) > parametros.spread_maximo:
+        janela = _calcular_janela_coordenada(cargas, parametros.spread_maximo)
+        print(f"\n[!] Spread global {max(cargas) - min(cargas)} excede o máximo ({parametros.spread_maximo}). "
+              f"Coordenando habilidades com janela de carga {janela[0]}-{janela[1]}...")
+        coordenados, interrompida = _resolver_habilidades(cronogramas_por_hab, projetos, meses, meses_ferias,
+                                                          parametros, prazo - time.monotonic(), janela)
+        if coordenados is not None:
+            resultados = coordenados
+        else:
+            spread_relaxado = True
+            print("[AVISO] Coordenação inviável. Mantendo plano com spread garantido apenas por habilidade.")
+
+    combinado = _combinar_resultados_estagio2(list(resultados.values()), meses, meses_ferias, parametros,
+                                              spread_relaxado)
+    combinado['busca_interrompida'] = combinado['busca_interrompida'] or interrompida
+    if ao_melhorar is not None:
+        ao_melhorar({"estagio": "estagio_2", "numero": 1, "objetivo": combinado['custo_total_previsto'],
+                     "limite": None, "tempo": None,
+                     "solucao": {'atribuicoes': combinado['atribuicoes'],
+                                 'custo_total': combinado['custo_total_previsto']}})
+    return combinado
+
+
+def _separar_cronograma_por_habilidade(cronograma_flexivel: Dict) -> Dict[str, Dict]:
+    """Divide o cronograma do Estágio 1 em um cronograma por habilidade."""
+    cronogramas = defaultdict(lambda: defaultdict(list))
+    for proj_nome, entradas in cronograma_flexivel.items():
+        for crono in entradas:
+            habilidade = 'PROG' if crono.get('habilidade', 'PROG') == 'PROG' else 'ROBOTICA'
+            cronogramas[habilidade][proj_nome].append(crono)
+    return {hab: dict(crono) for hab, crono in cronogramas.items()}
+
+
+def _resolver_habilidades(cronogramas_por_hab: Dict[str, Dict], projetos: List[Projeto], meses: List[str],
+                          meses_ferias: List[int], parametros: ParametrosOtimizacao, tempo_limite: float,
+                          janela_carga: Optional[Tuple[int, int]] = None) -> Tuple[Optional[Dict[str, Dict]], bool]:
+    """
+    Resolve o Estágio 2 de cada habilidade em paralelo, com os workers do perfil repartidos entre os
+    processos e `tempo_limite` segundos (pelo menos 1). Retorna (resultados por habilidade, ou None se
+    alguma falhar; busca interrompida por Ctrl-C no modo anytime).
+    """
+    parametros_habilidade = dataclasses.replace(
+        dividir_workers(parametros, len(cronogramas_por_hab), ("estagio_2",)),
+        timeout_segundos=max(1, int(tempo_limite)))
+    with PoolBuscas(max_workers=max(1, len(cronogramas_por_hab))) as executor:
+        futuros = {hab: executor.submit(executar_com_registro, stage_2.otimizar_atribuicao_e_carga, crono, projetos,
+                                        meses, meses_ferias, parametros_habilidade, janela_carga)
+                   for hab, crono in cronogramas_por_hab.items()}
+        saidas, interrompida = executor.aguardar(futuros, parametros, _SEM_RESULTADO)
+    resultados = {}
+    for hab, (resultado, registro) in saidas.items():
+        resultados[hab] = resultado
+        incorporar_registro(registro, hab)
+
+    if any(not r or r['status'] == 'falha' for r in resultados.values()):
+        return None, interrompida
+    return resultados, interrompida
+
+
+def _calcular_janela_coordenada(cargas: List[int], spread_maximo: int) -> Tuple[int, int]:
+    """Janela de carga de largura `spread_maximo` centrada na faixa de cargas observada."""
+    minimo = max(1, math.ceil((max(cargas) + min(cargas) - spread_maximo) / 2))
+    return minimo, minimo + spread_maximo
+
+
+def _combinar_resultados_estagio2(resultados: List[Dict], meses: List[str], meses_ferias: List[int],
+                                  parametros: ParametrosOtimizacao, spread_relaxado: bool) -> Dict:
+    """Combina os resultados por habilidade no mesmo formato de `otimizar_atribuicao_e_carga`."""
+    atribuicoes = [atr for r in resultados for atr in r['atribuicoes']]
+    turmas = [t for r in resultados for t in r['turmas']]
+    instrutores = [i for r in resultados for i in r['instrutores']]
+    carga_por_instrutor = {}
+    for r in resultados:
+        carga_por_instrutor.update(r['carga_por_instrutor'])
+
+    cargas_ativas_vals = list(carga_por_instrutor.values()) if carga_por_instrutor else [0]
+    tempos_primeira = [r['tempo_primeira_solucao'] for r in resultados if r.get('tempo_primeira_solucao') is not None]
+    diagnosticos = [r['diagnostico_hint'] for r in resultados if r.get('diagnostico_hint')]
+    diagnostico_hint = None
+    if diagnosticos:
+        diagnostico_hint = {
+            "custo_hint": sum(d['custo_hint'] or 0 for d in diagnosticos),
+            "hint_viavel": all(d['hint_viavel'] for d in diagnosticos),
+            "hint_aceito": all(d['hint_aceito'] for d in diagnosticos),
+            "tempo_heuristica": sum(d['tempo_heuristica'] for d in diagnosticos),
+        }
+    custo_final = sum(r['custo_total_previsto'] for r in resultados)
+    custo_formatado = f"{custo_final:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+    print(f"\n[✓] Estágio 2 decomposto concluído. Custo total previsto: R$ {custo_formatado}")
+
+    return {
+        "status": "sucesso",
+        "atribuicoes": atribuicoes,
+        "custo_total_previsto": custo_final,
+        "total_instrutores_flex": len(cargas_ativas_vals),
+        "carga_por_instrutor": carga_por_instrutor,
+        "spread_carga": max(cargas_ativas_vals) - min(cargas_ativas_vals),
+        "spread_relaxado": spread_relaxado,
+        "turmas": turmas,
+        "instrutores": instrutores,
+        "indice_incidencia": construir_indice_incidencia(turmas, meses_ferias, len(meses)),
+        "capacidade_max": parametros.capacidade_max_instrutor,
+        "tempo_primeira_solucao": max(tempos_primeira) if tempos_primeira else None,
+        "diagnostico_hint": diagnostico_hint,
+        "busca_interrompida": any(r.get('busca_interrompida', False) for r in resultados)
+    }
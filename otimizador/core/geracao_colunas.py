@@ -0,0 +1,228 @@
+# ARQUIVO: otimizador/core/geracao_colunas.py
+
+import math
+import time
+from collections import defaultdict
+from typing import List, Dict, Optional, Tuple, Callable
+from ortools.linear_solver import pywraplp
+
+from ..data_models import Projeto, ParametrosOtimizacao, Turma
+from ..utils import construir_indice_incidencia, criar_turmas
+from .heuristicas import alocar_turmas_guloso, rebalancear_spread
+from .modo_rapido import montar_resultado_alocacao, calcular_limite_inferior_custo
+from .stage_2 import agrupar_turmas
+
+TOLERANCIA_CUSTO_REDUZIDO = 1e-6
+
+
+def otimizar_atribuicao_geracao_colunas(cronograma_flexivel: Dict,
+                                        projetos: List[Projeto],
+                                        meses: List[str],
+                                        meses_ferias: List[int],
+                                        parametros: ParametrosOtimizacao,
+                                        ao_melhorar: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    Alternativa ao Estágio 2 por particionamento em padrões de trabalho. Um padrão é o conjunto de
+    turmas de um instrutor (em quantidades por coorte) que respeita a capacidade mensal; seu custo é
+    a remuneração vezes os meses ativos. O mestre restrito (cobrir cada coorte) é resolvido como PL,
+    os duais precificam novos padrões por habilidade e, ao fim, o mestre inteiro é resolvido sobre os
+    padrões gerados. O spread não entra no mestre: é reparado depois pela heurística de rebalanceamento
+    e, se o reparo não o alcançar, o plano é devolvido com 'spread_relaxado' = True.
+    Quando a geração converge, o valor do PL é um limite inferior válido do custo.
+    """
+    print("\n" + "=" * 80 + "\nESTÁGIO 2: Geração de Colunas (Padrões de Trabalho)\n" + "=" * 80)
+    prazo = time.monotonic() + parametros.timeout_segundos
+    all_turmas = criar_turmas(cronograma_flexivel, projetos)
+    indice = construir_indice_incidencia(all_turmas, meses_ferias, len(meses))
+    capacidade = parametros.capacidade_max_instrutor
+    remuneracao = int(parametros.remuneracao_instrutor)
+    print(f"Total de turmas criadas para alocação: {len(all_turmas)}")
+
+    coortes = agrupar_turmas(all_turmas, 'coorte')
+    meses_coorte = [indice.meses_ativos(c[0]) for c in coortes]
+    coortes_por_habilidade = defaultdict(list)
+    for g_idx, coorte in enumerate(coortes):
+        coortes_por_habilidade[coorte[0].habilidade].append(g_idx)
+
+    # Colunas iniciais: os padrões da alocação gulosa garantem um mestre viável
+    colunas = _colunas_da_alocacao(alocar_turmas_guloso(all_turmas, indice, capacidade), coortes, meses_coorte,
+                                   remuneracao)
+    vistas = {(c['habilidade'], c['quantidades']) for c in colunas}
+
+    iteracoes, convergiu, valor_lp = 0, False, None
+    while time.monotonic() < prazo:
+        valor_lp, duais = _resolver_mestre_lp(colunas, coortes)
+        iteracoes += 1
+        novas, precificacao_exata = [], True
+        for habilidade, g_indices in coortes_por_habilidade.items():
+            coluna, exata = _precificar_padrao(habilidade, g_indices, duais, coortes, meses_coorte, capacidade,
+                                               remuneracao, prazo)
+            precificacao_exata = precificacao_exata and exata
+            if coluna is not None and (habilidade, coluna['quantidades']) not in vistas:
+                vistas.add((habilidade, coluna['quantidades']))
+                novas.append(coluna)
+        if not novas:
+            convergiu = precificacao_exata
+            break
+        colunas.extend(novas)
+
+    valor_formatado = f"{valor_lp or 0:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+    print(f"Geração de colunas: {iteracoes} iterações, {len(colunas)} padrões, "
+          f"{'convergiu' if convergiu else 'interrompida pelo tempo'} (PL do mestre: R$ {valor_formatado})")
+
+    escolhidas = _resolver_mestre_inteiro(colunas, coortes, prazo)
+    if escolhidas is None:
+        print("[AVISO] Mestre inteiro sem solução no tempo limite. Usando os padrões da alocação gulosa.")
+        escolhidas = [(coluna, 1) for coluna in colunas if coluna['inicial']]
+
+    alocacao = _alocar_turmas_dos_padroes(escolhidas, coortes)
+    alocacao, spread_real = rebalancear_spread(alocacao, all_turmas, indice, capacidade, parametros.spread_maximo)
+    if spread_real > parametros.spread_maximo:
+        print(f"[AVISO] Spread ({spread_real}) acima do máximo configurado ({parametros.spread_maximo}).")
+
+    resultado = montar_resultado_alocacao(alocacao, all_turmas, indice, parametros)
+    resultado["spread_relaxado"] = spread_real > parametros.spread_maximo
+    custo_final = resultado['custo_total_previsto']
+    limite_inferior = calcular_limite_inferior_custo(indice, capacidade, remuneracao)
+    if convergiu and valor_lp is not None:
+        # Custos são múltiplos da remuneração, então o limite do PL pode ser arredondado para cima
+        limite_inferior = max(limite_inferior,
+                              remuneracao * math.ceil(valor_lp / remuneracao - TOLERANCIA_CUSTO_REDUZIDO))
+    gap = (custo_final - limite_inferior) / custo_final if custo_final else 0.0
+
+    custo_formatado = f"{custo_final:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+    print(f"\n[✓] Alocação por geração de colunas concluída. Custo total previsto: R$ {custo_formatado}")
+    print(f"Gap máximo em relação ao ótimo (limite inferior de custo): {gap:.1%}")
+    if ao_melhorar is not None:
+        ao_melhorar({"estagio": "estagio_2", "numero": 1, "objetivo": custo_final, "limite": limite_inferior,
+                     "tempo": None, "solucao": {'atribuicoes': resultado['atribuicoes'], 'custo_total': custo_final}})
+
+    resultado.update({"limite_inferior_custo": limite_inferior, "gap_limite_inferior": gap})
+    return resultado
+
+
+def _colunas_da_alocacao(alocacao: Dict[str, int], coortes: List[List[Turma]], meses_coorte: List[List[int]],
+                         remuneracao: int) -> List[Dict]:
+    """Converte uma alocação {turma.id: instrutor} em padrões (quantidade de turmas por coorte)."""
+    quantidades = defaultdict(lambda: defaultdict(int))
+    for g_idx, coorte in enumerate(coortes):
+        for t in coorte:
+            quantidades[(t.habilidade, alocacao[t.id])][g_idx] += 1
+    return [_criar_coluna(habilidade, qtd, meses_coorte, remuneracao, inicial=True)
+            for (habilidade, _), qtd in quantidades.items()]
+
+
+def _criar_coluna(habilidade: str, quantidades: Dict[int, int], meses_coorte: List[List[int]], remuneracao: int,
+                  inicial: bool = False) -> Dict:
+    """Cria um padrão a partir das quantidades por coorte; o custo conta os meses ativos distintos."""
+    meses_ativos = {m for g_idx, qtd in quantidades.items() if qtd for m in meses_coorte[g_idx]}
+    return {
+        "habilidade": habilidade,
+        "quantidades": tuple(sorted((g_idx, qtd) for g_idx, qtd in quantidades.items() if qtd)),
+        "custo": remuneracao * len(meses_ativos),
+        "inicial": inicial,
+    }
+
+
+def _resolver_mestre_lp(colunas: List[Dict], coortes: List[List[Turma]]) -> Tuple[float, Dict[int, float]]:
+    """Relaxação linear do mestre restrito; retorna o valor ótimo e os duais de cobertura por coorte."""
+    solver = pywraplp.Solver.CreateSolver('GLOP')
+    cobertura = {g_idx: solver.Constraint(len(coorte), solver.infinity()) for g_idx, coorte in enumerate(coortes)}
+    objetivo = solver.Objective()
+    for p_idx, coluna in enumerate(colunas):
+        x = solver.NumVar(0, solver.infinity(), f'x_{p_idx}')
+        objetivo.SetCoefficient(x, coluna['custo'])
+        for g_idx, qtd in coluna['quantidades']:
+            cobertura[g_idx].SetCoefficient(x, qtd)
+    objetivo.SetMinimization()
+    solver.Solve()
+    return objetivo.Value(), {g_idx: restricao.dual_value() for g_idx, restricao in cobertura.items()}
+
+
+def _precificar_padrao(habilidade: str, g_indices: List[int], duais: Dict[int, float],
+                       coortes: List[List[Turma]], meses_coorte: List[List[int]], capacidade: int,
+                       remuneracao: int, prazo: float) -> Tuple[Optional[Dict], bool]:
+    """
+    Subproblema de precificação de uma habilidade: encontra o padrão de menor custo reduzido
+    (remuneração × meses ativos - soma dos duais das turmas cobertas), respeitando a capacidade
+    mensal. Retorna a coluna (None se o custo reduzido não for negativo) e se o subproblema foi
+    resolvido até a otimalidade.
+    """
+    candidatas = [g_idx for g_idx in g_indices if duais[g_idx] > TOLERANCIA_CUSTO_REDUZIDO]
+    if not candidatas:
+        return None, True
+
+    solver = pywraplp.Solver.CreateSolver('SCIP')
+    solver.SetTimeLimit(int(max(1.0, prazo - time.monotonic()) * 1000))
+    qtd = {g_idx: solver.IntVar(0, min(len(coortes[g_idx]), capacidade), f'a_{g_idx}') for g_idx in candidatas}
+    coortes_por_mes = defaultdict(list)
+    for g_idx in candidatas:
+        for m in meses_coorte[g_idx]:
+            coortes_por_mes[m].append(g_idx)
+    ativo = {m: solver.BoolVar(f'y_{m}') for m in coortes_por_mes}
+    for m, g_mes in coortes_por_mes.items():
+        # Capacidade mensal e ativação do mês em uma única restrição
+        solver.Add(sum(qtd[g_idx] for g_idx in g_mes) <= capacidade * ativo[m])
+
+    objetivo = solver.Objective()
+    for m, y in ativo.items():
+        objetivo.SetCoefficient(y, remuneracao)
+    for g_idx, a in qtd.items():
+        objetivo.SetCoefficient(a, -duais[g_idx])
+    objetivo.SetMinimization()
+    status = solver.Solve()
+    if status not in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE):
+        return None, False
+
+    exata = status == pywraplp.Solver.OPTIMAL
+    if objetivo.Value() >= -TOLERANCIA_CUSTO_REDUZIDO:
+        return None, exata
+    quantidades = {g_idx: int(round(a.solution_value())) for g_idx, a in qtd.items()}
+    return _criar_coluna(habilidade, quantidades, meses_coorte, remuneracao), exata
+
+
+def _resolver_mestre_inteiro(colunas: List[Dict], coortes: List[List[Turma]],
+                             prazo: float) -> Optional[List[Tuple[Dict, int]]]:
+    """Resolve o mestre inteiro sobre os padrões gerados; retorna (coluna, cópias) escolhidas."""
+    solver = pywraplp.Solver.CreateSolver('SCIP')
+    solver.SetTimeLimit(int(max(1.0, prazo - time.monotonic()) * 1000))
+    cobertura = {g_idx: solver.Constraint(len(coorte), solver.infinity()) for g_idx, coorte in enumerate(coortes)}
+    objetivo = solver.Objective()
+    x = []
+    for p_idx, coluna in enumerate(colunas):
+        var = solver.IntVar(0, solver.infinity(), f'x_{p_idx}')
+        objetivo.SetCoefficient(var, coluna['custo'])
+        for g_idx, qtd in coluna['quantidades']:
+            cobertura[g_idx].SetCoefficient(var, qtd)
+        x.append(var)
+    objetivo.SetMinimization()
+    # A solução gulosa (uma cópia de cada padrão inicial) é viável e serve de ponto de partida
+    solver.SetHint(x, [1.0 if c['inicial'] else 0.0 for c in colunas])
+
+    status = solver.Solve()
+    if status not in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE):
+        return None
+    return [(coluna, int(round(var.solution_value()))) for coluna, var in zip(colunas, x)
+            if var.solution_value() > 0.5]
+
+
+def _alocar_turmas_dos_padroes(escolhidas: List[Tuple[Dict, int]], coortes: List[List[Turma]]) -> Dict[str, int]:
+    """
+    Distribui as turmas de cada coorte entre as cópias dos padrões escolhidos. Turmas cobertas em
+    excesso são simplesmente omitidas: retirar turmas de um padrão nunca viola a capacidade nem
+    aumenta o custo. Retorna {turma.id: índice do instrutor na habilidade}.
+    """
+    restantes = {g_idx: list(coorte) for g_idx, coorte in enumerate(coortes)}
+    proximo_indice = defaultdict(int)
+    alocacao = {}
+    for coluna, copias in escolhidas:
+        for _ in range(copias):
+            indice_instrutor = proximo_indice[coluna['habilidade']]
+            usou = False
+            for g_idx, qtd in coluna['quantidades']:
+                for _ in range(min(qtd, len(restantes[g_idx]))):
+                    alocacao[restantes[g_idx].pop().id] = indice_instrutor
+                    usou = True
+            if usou:
+                proximo_indice[coluna['habilidade']] += 1
+    return alocacao
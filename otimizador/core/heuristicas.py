@@ -0,0 +1,155 @@
+# ARQUIVO: otimizador/core/heuristicas.py
+
+from collections import defaultdict
+from typing import List, Dict, Tuple
+
+import numpy as np
+
+from ..data_models import Projeto, Turma, IndiceIncidencia
+from ..utils import calcular_padroes_meses_ativos
+
+
+def nivelar_demanda(projetos: List[Projeto], num_meses: int,
+                    meses_ferias: List[int]) -> Tuple[Dict[str, List[Dict]], Dict[str, int]]:
+    """
+    Heurística do Estágio 1: distribui as turmas de cada projeto na sua janela de início, uma a uma,
+    escolhendo o início que produz o menor pico entre os meses cobertos (desempate pela menor demanda
+    acumulada nesses meses). Projetos com janela mais estreita são programados primeiro.
+    Retorna o cronograma no formato do Estágio 1 e os picos por habilidade ('PROG'/'ROB').
+    """
+    padroes = calcular_padroes_meses_ativos(
+        ((m_i, p.duracao) for p in projetos for m_i in range(p.inicio_min, p.inicio_max + 1)),
+        meses_ferias, num_meses)
+    demanda = {'PROG': np.zeros(num_meses, dtype=np.int64), 'ROB': np.zeros(num_meses, dtype=np.int64)}
+    cronograma = defaultdict(list)
+
+    for proj in sorted(projetos, key=lambda p: (p.inicio_max - p.inicio_min, -(p.prog + p.rob))):
+        inicios = list(range(proj.inicio_min, proj.inicio_max + 1))
+        cobertura = np.zeros((len(inicios), num_meses), dtype=bool)
+        for k, m_i in enumerate(inicios):
+            cobertura[k, padroes[(m_i, proj.duracao)]] = True
+
+        for hab_nome, quantidade in (('PROG', proj.prog), ('ROB', proj.rob)):
+            if quantidade <= 0:
+                continue
+            dem = demanda[hab_nome]
+            alocadas = np.zeros(len(inicios), dtype=np.int64)
+            for _ in range(quantidade):
+                candidata = np.where(cobertura, dem + 1, 0)
+                k = int(np.lexsort((candidata.sum(axis=1), candidata.max(axis=1)))[0])
+                dem[cobertura[k]] += 1
+                alocadas[k] += 1
+            for k, num_turmas in enumerate(alocadas):
+                if num_turmas:
+                    cronograma[proj.nome].append(
+                        {'mes_inicio': inicios[k], 'num_turmas': int(num_turmas), 'habilidade': hab_nome})
+
+    picos = {hab: int(dem.max()) if num_meses else 0 for hab, dem in demanda.items()}
+    return dict(cronograma), picos
+
+
+def alocar_turmas_guloso(turmas: List[Turma], indice: IndiceIncidencia, capacidade: int) -> Dict[str, int]:
+    """
+    Heurística construtiva de coloração de intervalos: percorre as turmas em ordem de início e
+    atribui cada uma ao instrutor (da mesma habilidade) que tem capacidade em todos os meses ativos
+    da turma e que ganha menos meses ativos novos. Empates favorecem quem já estava ativo no mês
+    anterior ao início (meses consecutivos) e, depois, quem tem menor carga total.
+    Retorna {turma.id: índice do instrutor dentro da habilidade}.
+    """
+    alocacao = {}
+    turmas_por_habilidade = defaultdict(list)
+    for t in turmas:
+        turmas_por_habilidade[t.habilidade].append(t)
+
+    for turmas_hab in turmas_por_habilidade.values():
+        ordenadas = sorted(turmas_hab, key=lambda t: (t.mes_inicio, -t.duracao))
+        # Uma linha por instrutor; no máximo um instrutor por turma
+        carga = np.zeros((len(ordenadas), indice.num_meses + 1), dtype=np.int32)
+        carga_total = np.zeros(len(ordenadas), dtype=np.int64)
+        abertos = 0
+
+        for t in ordenadas:
+            meses_t = indice.meses_ativos(t)
+            escolhido = abertos
+            if abertos and meses_t:
+                sub = carga[:abertos, meses_t]
+                viaveis = (sub < capacidade).all(axis=1)
+                if viaveis.any():
+                    novos_meses = (sub == 0).sum(axis=1)
+                    sem_continuidade = carga[:abertos, meses_t[0] - 1] == 0 if meses_t[0] > 0 \
+                        else np.ones(abertos, dtype=bool)
+                    pontuacao = (novos_meses.astype(np.int64) * 2 + sem_continuidade) * (len(ordenadas) + 1) \
+                        + carga_total[:abertos]
+                    pontuacao[~viaveis] = np.iinfo(np.int64).max
+                    escolhido = int(np.argmin(pontuacao))
+            if escolhido == abertos:
+                abertos += 1
+            carga[escolhido, meses_t] += 1
+            carga_total[escolhido] += 1
+            alocacao[t.id] = escolhido
+
+    return alocacao
+
+
+def rebalancear_spread(alocacao: Dict[str, int], turmas: List[Turma], indice: IndiceIncidencia,
+                       capacidade: int, spread_maximo: int) -> Tuple[Dict[str, int], int]:
+    """
+    Reparo local do spread global para a alocação heurística: enquanto a diferença entre o instrutor
+    mais e o menos carregado exceder o máximo, move uma turma do mais carregado para o menos carregado
+    da mesma habilidade (ou, não sendo possível, de um colega para o menos carregado), respeitando a
+    capacidade mensal. Prefere turmas que não ativam meses novos no destino.
+    Retorna a alocação reparada e o spread final.
+    """
+    alocacao = dict(alocacao)
+    turmas_por_instrutor = defaultdict(list)
+    for t in turmas:
+        turmas_por_instrutor[(t.habilidade, alocacao[t.id])].append(t)
+
+    carga_mensal = {}
+    for chave, turmas_inst in turmas_por_instrutor.items():
+        linha = np.zeros(indice.num_meses, dtype=np.int32)
+        for t in turmas_inst:
+            linha[indice.meses_ativos(t)] += 1
+        carga_mensal[chave] = linha
+
+    def mover(origem, destino) -> bool:
+        candidatas = [t for t in turmas_por_instrutor[origem]
+                      if (carga_mensal[destino][indice.meses_ativos(t)] < capacidade).all()]
+        if not candidatas:
+            return False
+        t = min(candidatas, key=lambda c: int((carga_mensal[destino][indice.meses_ativos(c)] == 0).sum()))
+        meses_t = indice.meses_ativos(t)
+        turmas_por_instrutor[origem].remove(t)
+        turmas_por_instrutor[destino].append(t)
+        carga_mensal[origem][meses_t] -= 1
+        carga_mensal[destino][meses_t] += 1
+        alocacao[t.id] = destino[1]
+        return True
+
+    for _ in range(2 * len(turmas)):
+        cargas = {chave: len(ts) for chave, ts in turmas_por_instrutor.items() if ts}
+        if not cargas:
+            return alocacao, 0
+        mais = max(cargas, key=cargas.get)
+        menos = min(cargas, key=cargas.get)
+        if cargas[mais] - cargas[menos] <= spread_maximo:
+            break
+
+        movido = False
+        destinos = sorted((c for c in cargas if c[0] == mais[0] and cargas[c] + 1 < cargas[mais]), key=cargas.get)
+        for destino in destinos:
+            if mover(mais, destino):
+                movido = True
+                break
+        if not movido:
+            origens = sorted((c for c in cargas if c[0] == menos[0] and cargas[c] - 1 > cargas[menos]),
+                             key=cargas.get, reverse=True)
+            for origem in origens:
+                if mover(origem, menos):
+                    movido = True
+                    break
+        if not movido:
+            break
+
+    cargas_finais = [len(ts) for ts in turmas_por_instrutor.values() if ts]
+    return alocacao, (max(cargas_finais) - min(cargas_finais)) if cargas_finais else 0
@@ -0,0 +1,185 @@
+# ARQUIVO: otimizador/core/horizonte_rolante.py
+
+import dataclasses
+import time
+from collections import defaultdict
+from typing import List, Dict, Optional, Tuple, Callable
+from ortools.sat.python import cp_model
+
+from ..data_models import Projeto, ParametrosOtimizacao, Instrutor
+from ..utils import construir_indice_incidencia, criar_turmas, calcular_padroes_meses_ativos
+from . import stage_1, stage_2
+from .modo_rapido import montar_resultado_alocacao
+
+
+def calcular_janelas(num_meses: int, tamanho: int, sobreposicao: int) -> List[Tuple[int, int, int]]:
+    """
+    Divide o horizonte em janelas (início, fim do trecho fixado, fim) de `tamanho` meses que avançam
+    `tamanho - sobreposicao` meses por vez. As decisões com início antes do fim do trecho fixado são
+    definitivas; as demais (a sobreposição) servem de antecipação e são refeitas na janela seguinte.
+    """
+    passo = tamanho - sobreposicao
+    janelas, inicio = [], 0
+    while True:
+        fim = min(num_meses, inicio + tamanho)
+        if fim >= num_meses:
+            janelas.append((inicio, num_meses, num_meses))
+            return janelas
+        janelas.append((inicio, inicio + passo, fim))
+        inicio += passo
+
+
+def otimizar_curva_demanda_rolante(projetos_flexiveis: List[Projeto],
+                                   meses: List[str],
+                                   parametros: ParametrosOtimizacao,
+                                   ao_melhorar: Optional[Callable[[Dict], None]] = None) -> Optional[Dict]:
+    """
+    Estágio 1 em horizonte rolante: cada janela programa os projetos cuja janela de início abre
+    nela, com a demanda dos projetos já fixados como base. No modo anytime, `ao_melhorar`
+    recebe apenas o resultado final.
+    """
+    print("\n" + "=" * 80 + "\nESTÁGIO 1: Horizonte Rolante\n" + "=" * 80)
+    num_meses = len(meses)
+    meses_ferias_idx = [meses.index(m) for m in parametros.meses_ferias if m in meses]
+    janelas = calcular_janelas(num_meses, parametros.horizonte_rolante_meses, parametros.sobreposicao_horizonte_meses)
+    parametros_janela = dataclasses.replace(
+        parametros, timeout_segundos=max(1, parametros.timeout_segundos // len(janelas)))
+    print(f"{len(janelas)} janelas de até {parametros.horizonte_rolante_meses} meses "
+          f"(sobreposição de {parametros.sobreposicao_horizonte_meses})")
+
+    padroes = calcular_padroes_meses_ativos(
+        ((m_i, p.duracao) for p in projetos_flexiveis for m_i in range(p.inicio_min, p.inicio_max + 1)),
+        meses_ferias_idx, num_meses)
+    demanda_base = {'PROG': [0] * num_meses, 'ROB': [0] * num_meses}
+    cronograma = {}
+    pendentes = sorted(projetos_flexiveis, key=lambda p: p.inicio_min)
+    interrompida = False
+
+    for inicio, fim_fixado, fim in janelas:
+        da_janela = [p for p in pendentes if p.inicio_min < fim]
+        if not da_janela:
+            continue
+        print(f"\n--- Janela {meses[inicio]} a {meses[fim - 1]}: {len(da_janela)} projetos ---")
+        resultado = stage_1.otimizar_curva_demanda(da_janela, meses, parametros_janela, demanda_base=demanda_base)
+        if resultado is None:
+            print(f"\n[✗] FALHA: janela {meses[inicio]} a {meses[fim - 1]} não pôde ser programada.")
+            return None
+        interrompida = interrompida or resultado['busca_interrompida']
+
+        for proj in da_janela:
+            if proj.inicio_min >= fim_fixado:
+                continue
+            entradas = resultado['cronograma'].get(proj.nome, [])
+            cronograma[proj.nome] = entradas
+            for crono in entradas:
+                for m in padroes[(crono['mes_inicio'], proj.duracao)]:
+                    demanda_base[crono['habilidade']][m] += crono['num_turmas']
+        pendentes = [p for p in pendentes if p.nome not in cronograma]
+
+    pico_prog, pico_rob = max(demanda_base['PROG'], default=0), max(demanda_base['ROB'], default=0)
+    print(f"\n[✓] Estágio 1 em horizonte rolante concluído. Pico PROG: {pico_prog} | Pico ROB: {pico_rob}")
+    if ao_melhorar is not None:
+        ao_melhorar({"estagio": "estagio_1", "numero": 1, "objetivo": max(pico_prog, pico_rob), "limite": None,
+                     "tempo": None, "solucao": {'cronograma': cronograma, 'pico_max': max(pico_prog, pico_rob)}})
+    return {
+        "cronograma": cronograma,
+        "pico_max": max(pico_prog, pico_rob),
+        "pico_prog": pico_prog,
+        "pico_rob": pico_rob,
+        "meses_ferias": meses_ferias_idx,
+        "parametros": parametros,
+        "busca_interrompida": interrompida
+    }
+
+
+def otimizar_atribuicao_rolante(cronograma_flexivel: Dict,
+                                projetos: List[Projeto],
+                                meses: List[str],
+                                meses_ferias: List[int],
+                                parametros: ParametrosOtimizacao,
+                                ao_melhorar: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    Estágio 2 em horizonte rolante: cada janela aloca as turmas que começam nela a um pool formado
+    pelos instrutores já contratados (com sua carga mensal e total carregada das janelas anteriores)
+    mais instrutores novos. As turmas da sobreposição são realocadas na janela seguinte. Uma janela
+    inviável é resolvida de novo com o pool de instrutores novos dobrado (como no Estágio 2) e, só se
+    ainda assim for inviável, sem o limite de spread; o resultado é então marcado com
+    'spread_relaxado' = True. No modo anytime, `ao_melhorar` recebe apenas o resultado final.
+    """
+    print("\n" + "=" * 80 + "\nESTÁGIO 2: Horizonte Rolante\n" + "=" * 80)
+    num_meses = len(meses)
+    all_turmas = criar_turmas(cronograma_flexivel, projetos)
+    indice = construir_indice_incidencia(all_turmas, meses_ferias, num_meses)
+    janelas = calcular_janelas(num_meses, parametros.horizonte_rolante_meses, parametros.sobreposicao_horizonte_meses)
+    tempo_janela = max(1.0, parametros.timeout_segundos / len(janelas))
+    capacidade = parametros.capacidade_max_instrutor
+    print(f"Total de turmas criadas para alocação: {len(all_turmas)} | {len(janelas)} janelas")
+
+    contratados: List[Instrutor] = []
+    estado = {}
+    alocacao = {}
+    spread_relaxado = False
+    interrompida = False
+
+    for inicio, fim_fixado, fim in janelas:
+        turmas_janela = [t for t in all_turmas if t.id not in alocacao and t.mes_inicio < fim]
+        if not turmas_janela:
+            continue
+        print(f"\n--- Janela {meses[inicio]} a {meses[fim - 1]}: {len(turmas_janela)} turmas, "
+              f"{len(contratados)} instrutores já contratados ---")
+        indice_janela = construir_indice_incidencia(turmas_janela, meses_ferias, num_meses)
+        tamanhos_novos = stage_2.dimensionar_pool_instrutores(turmas_janela, indice_janela, parametros)
+        turmas_por_habilidade = {hab: sum(1 for t in turmas_janela if t.habilidade == hab) for hab in tamanhos_novos}
+        prazo = time.monotonic() + tempo_janela
+
+        # Inviabilidade por falta de instrutores novos: amplia o pool antes de abrir mão do spread
+        while True:
+            novos = stage_2.criar_instrutores_adicionais(tamanhos_novos, contratados, capacidade)
+            resolucao = stage_2.resolver_alocacao(turmas_janela, contratados + novos, indice_janela, num_meses,
+                                                  parametros, prazo - time.monotonic(), estado_instrutores=estado)
+            if resolucao['status'] != cp_model.INFEASIBLE or resolucao['busca_interrompida']:
+                break
+            expansiveis = [hab for hab, n in tamanhos_novos.items() if n < turmas_por_habilidade[hab]]
+            if not expansiveis or prazo - time.monotonic() < 1:
+                break
+            for hab in expansiveis:
+                tamanhos_novos[hab] = min(turmas_por_habilidade[hab], 2 * tamanhos_novos[hab])
+            print("[!] Janela inviável com o pool atual. Ampliando o pool de instrutores novos...")
+
+        if resolucao['atribuicoes'] is None and resolucao['status'] == cp_model.INFEASIBLE:
+            print("[!] Janela inviável com o spread máximo. Resolvendo sem o limite de spread...")
+            spread_relaxado = True
+            sem_spread = dataclasses.replace(parametros, spread_maximo=len(all_turmas))
+            resolucao = stage_2.resolver_alocacao(turmas_janela, contratados + novos, indice_janela, num_meses,
+                                                  sem_spread, tempo_janela, estado_instrutores=estado)
+        if resolucao['atribuicoes'] is None:
+            print(f"\n[✗] FALHA na janela {meses[inicio]} a {meses[fim - 1]}: {resolucao['status_nome']}")
+            return {"status": "falha"}
+        interrompida = interrompida or resolucao['busca_interrompida']
+
+        # Fixa as turmas do trecho definitivo e carrega o estado dos instrutores
+        for atr in resolucao['atribuicoes']:
+            turma, instrutor = atr['turma'], atr['instrutor']
+            if turma.mes_inicio >= fim_fixado:
+                continue
+            alocacao[turma.id] = int(instrutor.id.rsplit('_', 1)[1])
+            if instrutor.id not in estado:
+                estado[instrutor.id] = {'carga_mensal': defaultdict(int), 'carga_total': 0}
+                contratados.append(instrutor)
+            for m in indice.meses_ativos(turma):
+                estado[instrutor.id]['carga_mensal'][m] += 1
+            estado[instrutor.id]['carga_total'] += 1
+
+    resultado = montar_resultado_alocacao(alocacao, all_turmas, indice, parametros)
+    resultado["spread_relaxado"] = spread_relaxado
+    resultado["busca_interrompida"] = interrompida
+    custo_final = resultado['custo_total_previsto']
+    custo_formatado = f"{custo_final:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+    print(f"\n[✓] Estágio 2 em horizonte rolante concluído. Custo total previsto: R$ {custo_formatado}")
+    if spread_relaxado:
+        print(f"[AVISO] Spread final ({resultado['spread_carga']}) obtido com ao menos uma janela sem limite de spread.")
+    if ao_melhorar is not None:
+        ao_melhorar({"estagio": "estagio_2", "numero": 1, "objetivo": custo_final, "limite": None, "tempo": None,
+                     "solucao": {'atribuicoes': resultado['atribuicoes'], 'custo_total': custo_final}})
+    return resultado
+
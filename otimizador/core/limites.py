@@ -0,0 +1,78 @@
+# ARQUIVO: otimizador/core/limites.py
+
+from typing import List, Dict, Optional
+import numpy as np
+
+from ..data_models import Projeto, ParametrosOtimizacao, Turma, Instrutor, IndiceIncidencia
+from ..instrumentacao import registrar_limites
+
+# Maior inteiro que o CP-SAT informa sem perda (objetivo e limite são devolvidos como double).
+# Domínios acima dele são sinalizados como risco de overflow no resumo da execução.
+LIMITE_DOMINIO_SEGURO = 2 ** 53
+
+
+def calcular_limites_estagio_1(projetos_flexiveis: List[Projeto], coberturas: Dict[int, np.ndarray], num_meses: int,
+                               demanda_base: Optional[Dict[str, List[int]]] = None) -> Dict:
+    """
+    Limites superiores da demanda mensal por habilidade: a demanda já fixada no mês somada às turmas
+    dos projetos cuja janela de início alcança o mês (alguma linha da matriz de cobertura ativa nele).
+    O pico de cada habilidade fica limitado ao maior desses valores, que nunca passa do total de
+    turmas da habilidade. Meses de férias e meses fora do alcance de qualquer projeto ficam com 0.
+    """
+    limites = {}
+    for habilidade, atributo in (('PROG', 'prog'), ('ROB', 'rob')):
+        demanda_max = np.array(demanda_base[habilidade] if demanda_base else [0] * num_meses, dtype=np.int64)
+        for p in projetos_flexiveis:
+            num_turmas = getattr(p, atributo)
+            if num_turmas > 0:
+                demanda_max += num_turmas * coberturas[p.duracao][p.inicio_min:p.inicio_max + 1].any(axis=0)
+        limites[habilidade] = demanda_max.tolist()
+    limites['pico_prog'] = max(limites['PROG'], default=0)
+    limites['pico_rob'] = max(limites['ROB'], default=0)
+    limites['pico_max'] = max(limites['pico_prog'], limites['pico_rob'])
+    return limites
+
+
+def calcular_limites_estagio_2(turmas: List[Turma], instrutores: List[Instrutor], indice: IndiceIncidencia,
+                               parametros: ParametrosOtimizacao,
+                               estado_instrutores: Optional[Dict[str, Dict]] = None) -> Dict:
+    """
+    Limites do modelo de alocação:
+    - carga total de cada instrutor: o menor entre o total de turmas da habilidade e capacidade ×
+      meses com turmas da habilidade, mais a carga prévia do instrutor;
+    - carga_max: a maior dessas cargas (janela de carga e spread);
+    - custo_max: remuneração × ativações possíveis (instrutor × mês com turmas da sua habilidade,
+      sem os meses já pagos), que não passa de remuneração × pool × meses.
+    """
+    estado_instrutores = estado_instrutores or {}
+    turmas_por_habilidade, meses_por_habilidade = {}, {}
+    for habilidade in {i.habilidade for i in instrutores}:
+        turmas_por_habilidade[habilidade] = sum(1 for t in turmas if t.habilidade == habilidade)
+        meses_por_habilidade[habilidade] = [m for m in range(indice.num_meses)
+                                            if indice.turmas_ativas(habilidade, m)]
+
+    carga_por_instrutor, ativacoes = {}, 0
+    for i in instrutores:
+        estado = estado_instrutores.get(i.id, {})
+        meses_hab = meses_por_habilidade[i.habilidade]
+        carga_por_instrutor[i.id] = (min(turmas_por_habilidade[i.habilidade], i.capacidade * len(meses_hab))
+                                     + estado.get('carga_total', 0))
+        ativacoes += sum(1 for m in meses_hab if not estado.get('carga_mensal', {}).get(m, 0))
+
+    return {
+        "carga_por_instrutor": carga_por_instrutor,
+        "carga_max": max(carga_por_instrutor.values(), default=0),
+        "custo_max": int(parametros.remuneracao_instrutor) * ativacoes,
+    }
+
+
+def registrar_limites_modelo(estagio: str, limites: Dict[str, int]) -> List[str]:
+    """
+    Registra os limites escalares de um modelo no resumo da execução e devolve os nomes dos que
+    passam de LIMITE_DOMINIO_SEGURO (risco de overflow), avisando no terminal.
+    """
+    riscos = [nome for nome, valor in limites.items() if valor > LIMITE_DOMINIO_SEGURO]
+    for nome in riscos:
+        print(f"[AVISO] Limite '{nome}' do {estagio} ({limites[nome]}) excede 2^53: risco de overflow no solver.")
+    registrar_limites(estagio, limites, riscos)
+    return riscos
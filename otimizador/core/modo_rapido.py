@@ -0,0 +1,118 @@
+# ARQUIVO: otimizador/core/modo_rapido.py
+
+import math
+from collections import defaultdict
+from typing import List, Dict, Optional, Callable
+
+from ..data_models import Projeto, ParametrosOtimizacao, Instrutor, Turma, IndiceIncidencia
+from ..utils import construir_indice_incidencia, criar_turmas
+from .heuristicas import nivelar_demanda, alocar_turmas_guloso, rebalancear_spread
+
+
+def otimizar_curva_demanda_rapida(projetos_flexiveis: List[Projeto],
+                                  meses: List[str],
+                                  parametros: ParametrosOtimizacao,
+                                  ao_melhorar: Optional[Callable[[Dict], None]] = None) -> Optional[Dict]:
+    """Alternativa sem solver ao Estágio 1: nivelamento guloso da demanda na janela de cada projeto."""
+    print("\n" + "=" * 80 + "\nESTÁGIO 1: Modo Rápido (Heurístico, sem Solver)\n" + "=" * 80)
+    meses_ferias_idx = [meses.index(m) for m in parametros.meses_ferias if m in meses]
+    cronograma, picos = nivelar_demanda(projetos_flexiveis, len(meses), meses_ferias_idx)
+    print(f"\n[✓] Cronograma heurístico gerado. Pico PROG: {picos['PROG']} | Pico ROB: {picos['ROB']}")
+    if ao_melhorar is not None:
+        ao_melhorar({"estagio": "estagio_1", "numero": 1, "objetivo": max(picos.values()), "limite": None,
+                     "tempo": None, "solucao": {'cronograma': cronograma, 'pico_max': max(picos.values())}})
+    return {
+        "cronograma": cronograma,
+        "pico_max": max(picos['PROG'], picos['ROB']),
+        "pico_prog": picos['PROG'],
+        "pico_rob": picos['ROB'],
+        "meses_ferias": meses_ferias_idx,
+        "parametros": parametros
+    }
+
+
+def otimizar_atribuicao_rapida(cronograma_flexivel: Dict,
+                               projetos: List[Projeto],
+                               meses: List[str],
+                               meses_ferias: List[int],
+                               parametros: ParametrosOtimizacao,
+                               ao_melhorar: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    Alternativa sem solver ao Estágio 2: alocação gulosa por coloração de intervalos seguida de
+    reparo do spread. Não prova otimalidade; o resultado informa o gap em relação ao limite inferior
+    de custo, que limita por cima o gap em relação ao ótimo do caminho CP-SAT. Se o reparo não
+    alcançar o spread máximo, o plano é devolvido com 'spread_relaxado' = True.
+    """
+    print("\n" + "=" * 80 + "\nESTÁGIO 2: Modo Rápido (Heurístico, sem Solver)\n" + "=" * 80)
+    all_turmas = criar_turmas(cronograma_flexivel, projetos)
+    indice = construir_indice_incidencia(all_turmas, meses_ferias, len(meses))
+    capacidade = parametros.capacidade_max_instrutor
+
+    alocacao = alocar_turmas_guloso(all_turmas, indice, capacidade)
+    alocacao, spread_real = rebalancear_spread(alocacao, all_turmas, indice, capacidade, parametros.spread_maximo)
+    if spread_real > parametros.spread_maximo:
+        print(f"[AVISO] Spread heurístico ({spread_real}) acima do máximo configurado ({parametros.spread_maximo}).")
+
+    resultado = montar_resultado_alocacao(alocacao, all_turmas, indice, parametros)
+    resultado["spread_relaxado"] = spread_real > parametros.spread_maximo
+    custo_final = resultado['custo_total_previsto']
+    limite_inferior = calcular_limite_inferior_custo(indice, capacidade, int(parametros.remuneracao_instrutor))
+    gap = (custo_final - limite_inferior) / custo_final if custo_final else 0.0
+
+    custo_formatado = f"{custo_final:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+    print(f"\n[✓] Alocação heurística concluída. Custo total previsto: R$ {custo_formatado}")
+    print(f"Gap máximo em relação ao ótimo (limite inferior de custo): {gap:.1%}")
+    if ao_melhorar is not None:
+        ao_melhorar({"estagio": "estagio_2", "numero": 1, "objetivo": custo_final, "limite": limite_inferior,
+                     "tempo": None, "solucao": {'atribuicoes': resultado['atribuicoes'], 'custo_total': custo_final}})
+
+    resultado.update({"limite_inferior_custo": limite_inferior, "gap_limite_inferior": gap})
+    return resultado
+
+
+def montar_resultado_alocacao(alocacao: Dict[str, int], all_turmas: List[Turma], indice: IndiceIncidencia,
+                              parametros: ParametrosOtimizacao) -> Dict:
+    """
+    Converte uma alocação {turma.id: índice do instrutor na habilidade} no dicionário de resultado
+    do Estágio 2, com o custo calculado pelos meses ativos de cada instrutor.
+    """
+    capacidade = parametros.capacidade_max_instrutor
+    instrutores = {}
+    atribuicoes = []
+    meses_ativos_instrutor = defaultdict(set)
+    for t in all_turmas:
+        inst_id = f'{t.habilidade}_{alocacao[t.id]}'
+        if inst_id not in instrutores:
+            instrutores[inst_id] = Instrutor(inst_id, t.habilidade, capacidade, None)
+        atribuicoes.append({'turma': t, 'instrutor': instrutores[inst_id]})
+        meses_ativos_instrutor[inst_id].update(indice.meses_ativos(t))
+
+    carga_por_instrutor = defaultdict(int)
+    for atr in atribuicoes:
+        carga_por_instrutor[atr['instrutor'].id] += 1
+    cargas_ativas_vals = list(carga_por_instrutor.values()) if carga_por_instrutor else [0]
+
+    custo_final = int(parametros.remuneracao_instrutor) * sum(len(m) for m in meses_ativos_instrutor.values())
+    return {
+        "status": "sucesso",
+        "atribuicoes": atribuicoes,
+        "custo_total_previsto": custo_final,
+        "total_instrutores_flex": len(cargas_ativas_vals),
+        "carga_por_instrutor": dict(carga_por_instrutor),
+        "spread_carga": max(cargas_ativas_vals) - min(cargas_ativas_vals),
+        "turmas": all_turmas,
+        "instrutores": list(instrutores.values()),
+        "indice_incidencia": indice,
+        "capacidade_max": capacidade,
+        "tempo_primeira_solucao": None,
+        "diagnostico_hint": None
+    }
+
+
+def calcular_limite_inferior_custo(indice: IndiceIncidencia, capacidade: int, remuneracao: int) -> int:
+    """
+    Limite inferior do custo para um cronograma fixo: em cada mês e habilidade são necessários pelo
+    menos ceil(turmas ativas / capacidade) instrutores ativos.
+    """
+    instrutores_mes = sum(math.ceil(len(turmas) / capacidade) for turmas in indice.turmas_por_mes.values())
+    return remuneracao * instrutores_mes
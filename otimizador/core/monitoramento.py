@@ -0,0 +1,40 @@
+# ARQUIVO: otimizador/core/monitoramento.py
+
+from typing import Callable, Dict, Optional
+from ortools.sat.python import cp_model
+
+
+class MonitorSolucoes(cp_model.CpSolverSolutionCallback):
+    """
+    Callback de soluções do CP-SAT. Registra o instante e o objetivo da primeira solução e, quando
+    há um receptor (`ao_melhorar`), emite um evento a cada solução melhor com objetivo, limite,
+    tempo decorrido e a solução decodificada por `decodificar(valor)`, onde `valor` lê as variáveis.
+    """
+
+    def __init__(self, estagio: str, decodificar: Optional[Callable[[Callable], Dict]] = None,
+                 ao_melhorar: Optional[Callable[[Dict], None]] = None):
+        super().__init__()
+        self.estagio = estagio
+        self.decodificar = decodificar
+        self.ao_melhorar = ao_melhorar
+        self.num_solucoes = 0
+        self.tempo_primeira_solucao = None
+        self.objetivo_primeira_solucao = None
+
+    def on_solution_callback(self):
+        self.num_solucoes += 1
+        if self.tempo_primeira_solucao is None:
+            self.tempo_primeira_solucao = self.WallTime()
+            self.objetivo_primeira_solucao = self.ObjectiveValue()
+
+        if self.ao_melhorar is None:
+            return
+        evento = {
+            "estagio": self.estagio,
+            "numero": self.num_solucoes,
+            "objetivo": self.ObjectiveValue(),
+            "limite": self.BestObjectiveBound(),
+            "tempo": self.WallTime(),
+            "solucao": self.decodificar(self.Value) if self.decodificar else None,
+        }
+        self.ao_melhorar(evento)
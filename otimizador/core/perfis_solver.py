@@ -0,0 +1,172 @@
+# ARQUIVO: otimizador/core/perfis_solver.py
+
+import dataclasses
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Any, Optional, Tuple
+from ortools.sat.python import cp_model
+
+from ..data_models import ParametrosOtimizacao, PERFIS_SOLVER
+
+
+def obter_configuracao_solver(parametros: ParametrosOtimizacao, estagio: str) -> Dict[str, Any]:
+    """Combina o perfil escolhido com os ajustes pontuais do estágio ('estagio_1' ou 'estagio_2')."""
+    configuracao = dict(PERFIS_SOLVER[parametros.perfil_solver][estagio])
+    configuracao.update(parametros.ajustes_solver.get(estagio, {}))
+    return configuracao
+
+
+def dividir_workers(parametros: ParametrosOtimizacao, num_resolucoes: int,
+                    estagios: Tuple[str, ...] = ("estagio_1", "estagio_2")) -> ParametrosOtimizacao:
+    """
+    Cópia dos parâmetros para `num_resolucoes` buscas simultâneas: os workers de cada estágio (os do
+    perfil, ou todos os núcleos no automático) são repartidos entre elas, com pelo menos 1 por busca.
+    """
+    if num_resolucoes <= 1:
+        return parametros
+    nucleos = os.cpu_count() or 1
+    ajustes = {estagio: dict(valores) for estagio, valores in parametros.ajustes_solver.items()}
+    for estagio in estagios:
+        workers = int(obter_configuracao_solver(parametros, estagio)['num_workers']) or nucleos
+        ajustes.setdefault(estagio, {})['num_workers'] = max(1, min(workers, nucleos) // num_resolucoes)
+    return dataclasses.replace(parametros, ajustes_solver=ajustes)
+
+
+def configurar_solver(solver: cp_model.CpSolver, parametros: ParametrosOtimizacao, estagio: str,
+                      tempo_limite: float = None) -> Dict[str, Any]:
+    """Aplica timeout e perfil de busca ao solver; retorna a configuração efetiva."""
+    configuracao = obter_configuracao_solver(parametros, estagio)
+    solver.parameters.max_time_in_seconds = float(tempo_limite if tempo_limite is not None
+                                                  else parametros.timeout_segundos)
+    solver.parameters.num_workers = int(configuracao['num_workers'])
+    solver.parameters.random_seed = int(configuracao['random_seed'])
+    solver.parameters.linearization_level = int(configuracao['linearization_level'])
+    solver.parameters.log_search_progress = bool(configuracao['log'])
+    # Ctrl-C é tratado por resolver_modelo, que distingue o modo anytime do cancelamento
+    solver.parameters.catch_sigint_signal = False
+
+    nivel_presolve = int(configuracao['nivel_presolve'])
+    solver.parameters.cp_model_presolve = nivel_presolve > 0
+    if nivel_presolve == 1:
+        solver.parameters.cp_model_probing_level = 0
+
+    print(f"Perfil do solver '{parametros.perfil_solver}' ({estagio}): "
+          f"workers={configuracao['num_workers'] or 'auto'}, seed={configuracao['random_seed']}, "
+          f"presolve={nivel_presolve}, linearização={configuracao['linearization_level']}")
+    return configuracao
+
+
+def resolver_modelo(solver: cp_model.CpSolver, model: cp_model.CpModel, parametros: ParametrosOtimizacao,
+                    monitor: Optional[cp_model.CpSolverSolutionCallback] = None) -> Tuple[int, bool]:
+    """
+    Resolve o modelo tratando Ctrl-C (SIGINT). O sinal para a busca na hora: o interpretador grava o
+    número do sinal no descritor de despertar, lido por uma thread que chama StopSearch. No modo anytime
+    a busca termina com a melhor solução encontrada; fora dele a interrupção vira KeyboardInterrupt
+    depois da busca, como em qualquer outro ponto do programa. Sem efeito fora da thread principal ou
+    com SIGINT ignorado (processos de trabalho do serviço). Retorna (status, busca interrompida).
+    """
+    if not _sigint_tratavel():
+        return solver.Solve(model, monitor), False
+
+    interrompida = threading.Event()
+    leitura, escrita = socket.socketpair()
+    escrita.setblocking(False)
+
+    def vigiar():
+        while True:
+            sinais = leitura.recv(64)
+            if not sinais:  # escrita fechada: a busca terminou
+                return
+            if signal.SIGINT in sinais:
+                interrompida.set()
+                solver.StopSearch()
+
+    manipulador_anterior = signal.signal(signal.SIGINT, lambda *_: interrompida.set())
+    fd_anterior = signal.set_wakeup_fd(escrita.fileno(), warn_on_full_buffer=False)
+    vigia = threading.Thread(target=vigiar, name="vigia-sigint", daemon=True)
+    vigia.start()
+    try:
+        status = cp_model.UNKNOWN if interrompida.is_set() else solver.Solve(model, monitor)
+    finally:
+        signal.set_wakeup_fd(fd_anterior)
+        signal.signal(signal.SIGINT, manipulador_anterior)
+        escrita.close()
+        vigia.join()
+        leitura.close()
+
+    if interrompida.is_set():
+        if not parametros.modo_anytime:
+            raise KeyboardInterrupt
+        print(f"[!] Busca interrompida pelo usuário (Ctrl-C); usando a melhor solução encontrada "
+              f"({solver.StatusName(status)}).")
+    return status, interrompida.is_set()
+
+
+class PoolBuscas(ProcessPoolExecutor):
+    """
+    Pool de processos para buscas CP-SAT paralelas (decomposição, cronogramas alternativos). Tarefas
+    que ainda não começaram quando o Ctrl-C chega no modo anytime não são executadas.
+    """
+
+    def __init__(self, max_workers: int):
+        self._interrupcao = multiprocessing.Event()
+        super().__init__(max_workers=max_workers, initializer=_registrar_interrupcao_pool,
+                         initargs=(self._interrupcao,))
+
+    def submit(self, funcao, *args, **kwargs) -> Future:
+        return super().submit(_executar_se_nao_interrompida, funcao, *args, **kwargs)
+
+    def aguardar(self, futuros: Dict[Any, Future], parametros: ParametrosOtimizacao,
+                 padrao: Any = None) -> Tuple[Dict[Any, Any], bool]:
+        """
+        Reúne os resultados das tarefas. No modo anytime, Ctrl-C no processo pai só marca a interrupção:
+        os filhos recebem o mesmo sinal e encerram com a melhor solução, e os resultados continuam sendo
+        reunidos (tarefas interrompidas antes da busca ou ainda não iniciadas ficam com `padrao`). Fora
+        do modo anytime o Ctrl-C vira KeyboardInterrupt, como em resolver_modelo.
+        Retorna (resultado por chave, busca interrompida).
+        """
+        if not parametros.modo_anytime or not _sigint_tratavel():
+            return {chave: futuro.result() for chave, futuro in futuros.items()}, False
+
+        def interromper(*_):
+            self._interrupcao.set()
+
+        manipulador_anterior = signal.signal(signal.SIGINT, interromper)
+        resultados = {}
+        try:
+            for chave, futuro in futuros.items():
+                try:
+                    resultados[chave] = futuro.result()
+                except KeyboardInterrupt:
+                    resultados[chave] = padrao
+        finally:
+            signal.signal(signal.SIGINT, manipulador_anterior)
+        interrompida = self._interrupcao.is_set()
+        if interrompida:
+            print("[!] Busca interrompida pelo usuário (Ctrl-C); reunindo as melhores soluções dos processos.")
+        return resultados, interrompida
+
+
+# Evento de interrupção do PoolBuscas, herdado por cada processo do pool
+_interrupcao_pool = None
+
+
+def _registrar_interrupcao_pool(evento):
+    global _interrupcao_pool
+    _interrupcao_pool = evento
+
+
+def _executar_se_nao_interrompida(funcao, *args, **kwargs):
+    if _interrupcao_pool is not None and _interrupcao_pool.is_set():
+        raise KeyboardInterrupt
+    return funcao(*args, **kwargs)
+
+
+def _sigint_tratavel() -> bool:
+    """Ctrl-C só pode ser tratado na thread principal e com SIGINT não ignorado (trabalhadores do serviço)."""
+    return (threading.current_thread() is threading.main_thread()
+            and signal.getsignal(signal.SIGINT) not in (signal.SIG_IGN, None))
@@ -0,0 +1,179 @@
+# ARQUIVO: otimizador/core/reotimizacao_incremental.py
+
+from collections import defaultdict
+from dataclasses import fields
+from typing import List, Dict, Optional, Set, Tuple
+
+from ..data_models import Projeto, ParametrosOtimizacao, ConfiguracaoProjeto
+from ..utils import construir_indice_incidencia, criar_turmas, calcular_matrizes_cobertura, nomes_projetos_modelo
+from . import stage_1, stage_2
+from .modo_rapido import montar_resultado_alocacao
+
+# Fração máxima das turmas realocadas pela reotimização incremental; acima dela a vizinhança da
+# alteração deixa de ser local e o portfólio é resolvido por inteiro
+FRACAO_MAXIMA_VIZINHANCA = 0.5
+
+
+def identificar_projetos_alterados(projetos_anteriores: List[ConfiguracaoProjeto],
+                                   projetos_atuais: List[ConfiguracaoProjeto]) -> Set[str]:
+    """Nomes dos projetos editados, incluídos ou removidos entre duas configurações."""
+    def entradas(projeto: ConfiguracaoProjeto) -> Dict:
+        return {f.name: getattr(projeto, f.name) for f in fields(projeto) if f.init}
+
+    anteriores = {p.nome: entradas(p) for p in projetos_anteriores}
+    atuais = {p.nome: entradas(p) for p in projetos_atuais}
+    return {nome for nome in set(anteriores) | set(atuais) if anteriores.get(nome) != atuais.get(nome)}
+
+
+def reotimizar_incremental(plano_anterior: Dict,
+                           projetos_config: List[ConfiguracaoProjeto],
+                           projetos_modelo: List[Projeto],
+                           meses: List[str],
+                           meses_ferias: List[int],
+                           parametros: ParametrosOtimizacao) -> Optional[Tuple[Dict, Dict]]:
+    """
+    Reotimiza apenas a vizinhança dos projetos alterados em relação ao último plano resolvido.
+    Estágio 1: os projetos inalterados mantêm o cronograma e entram como demanda base; só os
+    alterados são reprogramados. Estágio 2: as turmas dos projetos inalterados mantêm o instrutor,
+    exceto as dos instrutores que atendiam projetos alterados (a vizinhança), que são realocadas junto
+    com as turmas novas. Os instrutores mantidos entram com a carga fixada, como no horizonte rolante.
+    Retorna None quando o plano anterior não se aplica (parâmetros ou meses diferentes, alterações
+    demais), quando a vizinhança passa de FRACAO_MAXIMA_VIZINHANCA das turmas ou quando não tem
+    solução; nesses casos o portfólio é resolvido por inteiro.
+    """
+    if plano_anterior is None or parametros.max_projetos_incremental == 0:
+        return None
+    if plano_anterior['parametros'] != parametros or plano_anterior['meses'] != meses:
+        print("\n[INFO] Último plano com parâmetros ou período diferentes; resolvendo o portfólio completo.")
+        return None
+    alterados = identificar_projetos_alterados(plano_anterior['projetos_config'], projetos_config)
+    if not alterados or len(alterados) > parametros.max_projetos_incremental:
+        if alterados:
+            print(f"\n[INFO] {len(alterados)} projetos alterados (limite incremental: "
+                  f"{parametros.max_projetos_incremental}); resolvendo o portfólio completo.")
+        return None
+
+    print("\n" + "=" * 80 + "\nREOTIMIZAÇÃO INCREMENTAL\n" + "=" * 80)
+    print(f"Projetos alterados: {', '.join(sorted(alterados))}")
+    nomes_alterados = {nome for c in plano_anterior['projetos_config'] + projetos_config if c.nome in alterados
+                       for nome in nomes_projetos_modelo(c)}
+
+    resultados_estagio1 = _reprogramar_estagio_1(plano_anterior['resultados_estagio1'], projetos_modelo,
+                                                 nomes_alterados, meses, meses_ferias, parametros)
+    if resultados_estagio1 is None:
+        print("[!] Projetos alterados sem cronograma viável com os demais fixos; resolvendo o portfólio completo.")
+        return None
+    resultados_estagio2 = _realocar_estagio_2(plano_anterior['resultados_estagio2'], resultados_estagio1,
+                                              projetos_modelo, nomes_alterados, meses, meses_ferias, parametros)
+    if resultados_estagio2 is None:
+        return None
+    resultados_estagio2['reotimizacao_incremental']['projetos_alterados'] = sorted(alterados)
+    return resultados_estagio1, resultados_estagio2
+
+
+def _reprogramar_estagio_1(resultado_anterior: Dict, projetos_modelo: List[Projeto], nomes_alterados: Set[str],
+                           meses: List[str], meses_ferias: List[int],
+                           parametros: ParametrosOtimizacao) -> Optional[Dict]:
+    """Reprograma os projetos alterados sobre a demanda fixa dos demais; devolve o Estágio 1 completo."""
+    num_meses = len(meses)
+    coberturas = calcular_matrizes_cobertura((p.duracao for p in projetos_modelo), meses_ferias, num_meses)
+    duracoes = {p.nome: p.duracao for p in projetos_modelo}
+    cronograma = {nome: entradas for nome, entradas in resultado_anterior['cronograma'].items()
+                  if nome in duracoes and nome not in nomes_alterados}
+    demanda = _demanda_por_habilidade(cronograma, duracoes, coberturas, num_meses)
+
+    reprogramar = [p for p in projetos_modelo if p.nome in nomes_alterados]
+    if reprogramar:
+        resultado = stage_1.otimizar_curva_demanda(reprogramar, meses, parametros, demanda_base=demanda)
+        if resultado is None:
+            return None
+        cronograma.update(resultado['cronograma'])
+        demanda = _demanda_por_habilidade(cronograma, duracoes, coberturas, num_meses)
+
+    pico_prog, pico_rob = max(demanda['PROG'], default=0), max(demanda['ROB'], default=0)
+    return {
+        "cronograma": cronograma,
+        "pico_max": max(pico_prog, pico_rob),
+        "pico_prog": pico_prog,
+        "pico_rob": pico_rob,
+        "meses_ferias": meses_ferias,
+        "parametros": parametros
+    }
+
+
+def _demanda_por_habilidade(cronograma: Dict, duracoes: Dict[str, int], coberturas: Dict, num_meses: int) -> Dict:
+    """Turmas ativas por mês e habilidade ({'PROG': [...], 'ROB': [...]}) de um cronograma."""
+    demanda = {'PROG': [0] * num_meses, 'ROB': [0] * num_meses}
+    for nome, entradas in cronograma.items():
+        for crono in entradas:
+            for m in coberturas[duracoes[nome]][crono['mes_inicio']].nonzero()[0].tolist():
+                demanda[crono['habilidade']][m] += crono['num_turmas']
+    return demanda
+
+
+def _realocar_estagio_2(resultado_anterior: Dict, resultados_estagio1: Dict, projetos_modelo: List[Projeto],
+                        nomes_alterados: Set[str], meses: List[str], meses_ferias: List[int],
+                        parametros: ParametrosOtimizacao) -> Optional[Dict]:
+    """
+    Mantém as atribuições fora da vizinhança e realoca o restante; devolve o Estágio 2 completo, ou
+    None se a vizinhança for grande demais ou não tiver alocação viável.
+    """
+    num_meses = len(meses)
+    all_turmas = criar_turmas(resultados_estagio1['cronograma'], projetos_modelo)
+    indice = construir_indice_incidencia(all_turmas, meses_ferias, num_meses)
+
+    # Instrutores anteriores por (projeto, habilidade, mês de início); os ids das turmas mudam a cada
+    # criação, mas o cronograma dos projetos inalterados é o mesmo
+    anteriores = defaultdict(list)
+    instrutores_anteriores = {}
+    vizinhanca = set()
+    for atr in resultado_anterior['atribuicoes']:
+        turma, instrutor = atr['turma'], atr['instrutor']
+        anteriores[(turma.projeto, turma.habilidade, turma.mes_inicio)].append(instrutor)
+        instrutores_anteriores[instrutor.id] = instrutor
+        if turma.projeto in nomes_alterados:
+            vizinhanca.add(instrutor.id)
+
+    alocacao, livres = {}, []
+    estado = {}
+    for turma in all_turmas:
+        chave = (turma.projeto, turma.habilidade, turma.mes_inicio)
+        instrutor = anteriores[chave].pop(0) if turma.projeto not in nomes_alterados and anteriores[chave] else None
+        if instrutor is None or instrutor.id in vizinhanca:
+            livres.append(turma)
+            continue
+        alocacao[turma.id] = int(instrutor.id.rsplit('_', 1)[1])
+        carga = estado.setdefault(instrutor.id, {'carga_mensal': defaultdict(int), 'carga_total': 0})
+        for m in indice.meses_ativos(turma):
+            carga['carga_mensal'][m] += 1
+        carga['carga_total'] += 1
+
+    print(f"Turmas mantidas: {len(alocacao)} | turmas reotimizadas: {len(livres)} | "
+          f"instrutores na vizinhança: {len(vizinhanca)}")
+    if len(livres) > FRACAO_MAXIMA_VIZINHANCA * len(all_turmas):
+        print(f"[INFO] A vizinhança da alteração passa de {FRACAO_MAXIMA_VIZINHANCA:.0%} das turmas; "
+              "resolvendo o portfólio completo.")
+        return None
+    if livres:
+        indice_livres = construir_indice_incidencia(livres, meses_ferias, num_meses)
+        existentes = list(instrutores_anteriores.values())
+        novos = stage_2.criar_instrutores_adicionais(
+            stage_2.dimensionar_pool_instrutores(livres, indice_livres, parametros), existentes,
+            parametros.capacidade_max_instrutor)
+        resolucao = stage_2.resolver_alocacao(livres, existentes + novos, indice_livres, num_meses, parametros,
+                                              parametros.timeout_segundos, estado_instrutores=estado)
+        if resolucao['atribuicoes'] is None:
+            print("[!] Vizinhança da alteração sem alocação viável; resolvendo o portfólio completo.")
+            return None
+        for atr in resolucao['atribuicoes']:
+            alocacao[atr['turma'].id] = int(atr['instrutor'].id.rsplit('_', 1)[1])
+
+    resultado = montar_resultado_alocacao(alocacao, all_turmas, indice, parametros)
+    resultado['reotimizacao_incremental'] = {
+        "turmas_mantidas": len(all_turmas) - len(livres),
+        "turmas_reotimizadas": len(livres),
+        "instrutores_vizinhanca": len(vizinhanca),
+    }
+    custo_formatado = f"{resultado['custo_total_previsto']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+    print(f"\n[✓] Reotimização incremental concluída. Custo total previsto: R$ {custo_formatado}")
+    return resultado
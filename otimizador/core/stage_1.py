@@ -1,19 +1,129 @@
 # ARQUIVO: otimizador/core/stage_1.py
 
+import time
 from collections import defaultdict
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Callable
+import numpy as np
 from ortools.sat.python import cp_model
 
 # Import relativo para acessar modelos de dados e utils
 from ..data_models import Projeto, ParametrosOtimizacao
-from ..utils import calcular_meses_ativos
+from ..utils import calcular_matrizes_cobertura
+from ..instrumentacao import registrar_modelo
+from .perfis_solver import configurar_solver, resolver_modelo
+from .monitoramento import MonitorSolucoes
+from .limites import calcular_limites_estagio_1, registrar_limites_modelo
 
 
 def otimizar_curva_demanda(projetos_flexiveis: List[Projeto],
                            meses: List[str],
-                           parametros: ParametrosOtimizacao) -> Optional[Dict]:
-    """Otimiza o cronograma de início das turmas minimizando pico de demanda."""
+                           parametros: ParametrosOtimizacao,
+                           ao_melhorar: Optional[Callable[[Dict], None]] = None,
+                           demanda_base: Optional[Dict[str, List[int]]] = None) -> Optional[Dict]:
+    """
+    Otimiza o cronograma de início das turmas minimizando pico de demanda.
+    `ao_melhorar` recebe um evento a cada solução melhor encontrada (modo anytime).
+    `demanda_base` ({'PROG': [...], 'ROB': [...]}, por mês) soma à demanda turmas já programadas
+    fora deste modelo; é usada pelo horizonte rolante para fixar as janelas anteriores.
+    """
     print("\n" + "=" * 80 + "\nESTÁGIO 1: Otimização da Curva de Demanda\n" + "=" * 80)
+    inicio_construcao = time.perf_counter()
+    modelo = _construir_modelo(projetos_flexiveis, meses, parametros, demanda_base)
+    model, pico_max = modelo['model'], modelo['pico_max']
+    inicio_vars_prog, inicio_vars_rob = modelo['inicio_vars_prog'], modelo['inicio_vars_rob']
+    model.Minimize(pico_max)
+
+    tempo_construcao = time.perf_counter() - inicio_construcao
+
+    solver = cp_model.CpSolver()
+    configurar_solver(solver, parametros, 'estagio_1')
+    def decodificar(valor: Callable) -> Dict:
+        return {'cronograma': _extrair_cronograma(valor, projetos_flexiveis, inicio_vars_prog, inicio_vars_rob),
+                'pico_max': valor(pico_max)}
+
+    monitor = MonitorSolucoes('estagio_1', decodificar, ao_melhorar)
+    print("Resolvendo modelo...")
+    status, interrompida = resolver_modelo(solver, model, parametros, monitor)
+    registrar_modelo('estagio_1', model, tempo_construcao, solver, status)
+    registrar_limites_modelo('estagio_1', {nome: modelo['limites'][nome] for nome in ('pico_prog', 'pico_rob', 'pico_max')})
+
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        print(f"\n[✓] SUCESSO! Status: {solver.StatusName(status)}")
+        resultado = _montar_resultado(solver.Value, projetos_flexiveis, modelo, parametros)
+        resultado['busca_interrompida'] = interrompida
+        return resultado
+    else:
+        print(f"\n[✗] FALHA: Status {solver.StatusName(status)}")
+        return None
+
+
+def enumerar_cronogramas_alternativos(projetos_flexiveis: List[Projeto],
+                                      meses: List[str],
+                                      parametros: ParametrosOtimizacao,
+                                      resultado_otimo: Dict) -> List[Dict]:
+    """
+    Gera até `num_cronogramas_alternativos - 1` cronogramas diferentes do ótimo com pico_max de no
+    máximo o ótimo + `tolerancia_pico_alternativos`. Cada cronograma novo maximiza a menor distância
+    (soma das diferenças absolutas de turmas iniciadas por projeto, mês e habilidade) aos já
+    encontrados; a distância mínima 2 a cada um funciona como corte no-good. Os resultados têm o
+    mesmo formato de `otimizar_curva_demanda`.
+    """
+    num_alternativos = parametros.num_cronogramas_alternativos - 1
+    if num_alternativos <= 0:
+        return []
+    print(f"\nEnumerando até {num_alternativos} cronogramas alternativos "
+          f"(pico máximo <= {resultado_otimo['pico_max'] + parametros.tolerancia_pico_alternativos})...")
+    modelo = _construir_modelo(projetos_flexiveis, meses, parametros)
+    model = modelo['model']
+    model.Add(modelo['pico_max'] <= resultado_otimo['pico_max'] + parametros.tolerancia_pico_alternativos)
+    variaveis = {('PROG', chave): var for chave, var in modelo['inicio_vars_prog'].items()}
+    variaveis.update({('ROB', chave): var for chave, var in modelo['inicio_vars_rob'].items()})
+    turmas_por_projeto = {p.nome: {'PROG': p.prog, 'ROB': p.rob} for p in projetos_flexiveis}
+    limites = {chave: turmas_por_projeto[chave[1][0]][chave[0]] for chave in variaveis}
+
+    valores_otimo = defaultdict(int)
+    for proj_nome, entradas in resultado_otimo['cronograma'].items():
+        for crono in entradas:
+            valores_otimo[(crono['habilidade'], (proj_nome, crono['mes_inicio']))] += crono['num_turmas']
+    solucoes = [valores_otimo]
+
+    limite_distancia = sum(limites.values())
+    distancia_minima = model.NewIntVar(0, limite_distancia, 'distancia_minima')
+    model.Maximize(distancia_minima)
+
+    alternativos = []
+    for k in range(num_alternativos):
+        # Distância à solução anterior: |x - x_anterior| por variável
+        anterior = solucoes[-1]
+        diferencas = []
+        for chave, var in variaveis.items():
+            diferenca = model.NewIntVar(0, limites[chave], f'dist_{len(solucoes)}_{var.Name()}')
+            model.AddAbsEquality(diferenca, var - anterior.get(chave, 0))
+            diferencas.append(diferenca)
+        distancia = sum(diferencas)
+        model.Add(distancia >= 2)
+        model.Add(distancia_minima <= distancia)
+
+        solver = cp_model.CpSolver()
+        configurar_solver(solver, parametros, 'estagio_1',
+                          max(1.0, parametros.timeout_segundos / num_alternativos))
+        status, interrompida = resolver_modelo(solver, model, parametros)
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            print(f"[INFO] Nenhum outro cronograma dentro da tolerância ({solver.StatusName(status)}).")
+            break
+        solucoes.append({chave: solver.Value(var) for chave, var in variaveis.items()})
+        alternativo = _montar_resultado(solver.Value, projetos_flexiveis, modelo, parametros)
+        print(f"  Cronograma alternativo {k + 1}: pico PROG {alternativo['pico_prog']} | "
+              f"pico ROB {alternativo['pico_rob']} | distância mínima {solver.Value(distancia_minima)}")
+        alternativos.append(alternativo)
+        if interrompida:
+            break
+    return alternativos
+
+
+def _construir_modelo(projetos_flexiveis: List[Projeto], meses: List[str], parametros: ParametrosOtimizacao,
+                      demanda_base: Optional[Dict[str, List[int]]] = None) -> Dict:
+    """Monta o modelo da curva de demanda (sem objetivo); retorna o modelo e as variáveis principais."""
     model = cp_model.CpModel()
     num_meses = len(meses)
     meses_ferias_idx = [meses.index(m) for m in parametros.meses_ferias if m in meses]
@@ -25,53 +135,78 @@ def otimizar_curva_demanda(projetos_flexiveis: List[Projeto],
             if proj.rob > 0: inicio_vars_rob[(proj.nome, m)] = model.NewIntVar(0, proj.rob, f'r_{proj.nome}_{m}')
 
     for proj in projetos_flexiveis:
-        if proj.prog > 0: model.Add(sum(inicio_vars_prog.get((proj.nome, m), 0) for m in range(proj.inicio_min, proj.inicio_max + 1)) == proj.prog)
-        if proj.rob > 0: model.Add(sum(inicio_vars_rob.get((proj.nome, m), 0) for m in range(proj.inicio_min, proj.inicio_max + 1)) == proj.rob)
+        meses_inicio = range(proj.inicio_min, proj.inicio_max + 1)
+        if proj.prog > 0: model.Add(cp_model.LinearExpr.Sum([inicio_vars_prog[(proj.nome, m)] for m in meses_inicio]) == proj.prog)
+        if proj.rob > 0: model.Add(cp_model.LinearExpr.Sum([inicio_vars_rob[(proj.nome, m)] for m in meses_inicio]) == proj.rob)
+
+    # Cobertura início × mês calculada uma vez por duração; cada projeto usa as linhas da sua janela
+    # de início e as colunas não nulas dão, por mês, as variáveis de início que geram demanda nele.
+    coberturas = calcular_matrizes_cobertura((p.duracao for p in projetos_flexiveis), meses_ferias_idx, num_meses)
+    demanda_por_mes_prog, demanda_por_mes_rob = defaultdict(list), defaultdict(list)
+    for p in projetos_flexiveis:
+        inicios, meses_ativos = np.nonzero(coberturas[p.duracao][p.inicio_min:p.inicio_max + 1])
+        for k, m in zip((inicios + p.inicio_min).tolist(), meses_ativos.tolist()):
+            if p.prog > 0: demanda_por_mes_prog[m].append(inicio_vars_prog[(p.nome, k)])
+            if p.rob > 0: demanda_por_mes_rob[m].append(inicio_vars_rob[(p.nome, k)])
 
+    limites = calcular_limites_estagio_1(projetos_flexiveis, coberturas, num_meses, demanda_base)
+    base_prog = demanda_base['PROG'] if demanda_base else [0] * num_meses
+    base_rob = demanda_base['ROB'] if demanda_base else [0] * num_meses
     demanda_total_prog, demanda_total_rob = {}, {}
     for m in range(num_meses):
-        demanda_m_prog = [inicio_vars_prog[(p.nome, m_i)] for p in projetos_flexiveis if p.prog > 0 for m_i in range(p.inicio_min, p.inicio_max + 1) if m in calcular_meses_ativos(m_i, p.duracao, meses_ferias_idx, num_meses)]
-        demanda_m_rob = [inicio_vars_rob[(p.nome, m_i)] for p in projetos_flexiveis if p.rob > 0 for m_i in range(p.inicio_min, p.inicio_max + 1) if m in calcular_meses_ativos(m_i, p.duracao, meses_ferias_idx, num_meses)]
-        demanda_total_prog[m] = model.NewIntVar(0, 300, f'dt_prog_{m}')
-        demanda_total_rob[m] = model.NewIntVar(0, 300, f'dt_rob_{m}')
-        model.Add(demanda_total_prog[m] == sum(demanda_m_prog))
-        model.Add(demanda_total_rob[m] == sum(demanda_m_rob))
+        demanda_m_prog = demanda_por_mes_prog.get(m, [])
+        demanda_m_rob = demanda_por_mes_rob.get(m, [])
+        demanda_total_prog[m] = model.NewIntVar(0, limites['PROG'][m], f'dt_prog_{m}')
+        demanda_total_rob[m] = model.NewIntVar(0, limites['ROB'][m], f'dt_rob_{m}')
+        model.Add(demanda_total_prog[m] == cp_model.LinearExpr.Sum(demanda_m_prog) + base_prog[m])
+        model.Add(demanda_total_rob[m] == cp_model.LinearExpr.Sum(demanda_m_rob) + base_rob[m])
 
     for mes_ferias in meses_ferias_idx:
         model.Add(demanda_total_prog[mes_ferias] == 0)
         model.Add(demanda_total_rob[mes_ferias] == 0)
 
-    pico_prog = model.NewIntVar(0, 300, 'pico_prog')
-    pico_rob = model.NewIntVar(0, 300, 'pico_rob')
-    pico_max = model.NewIntVar(0, 300, 'pico_max')
+    pico_prog = model.NewIntVar(0, limites['pico_prog'], 'pico_prog')
+    pico_rob = model.NewIntVar(0, limites['pico_rob'], 'pico_rob')
+    pico_max = model.NewIntVar(0, limites['pico_max'], 'pico_max')
     model.AddMaxEquality(pico_prog, list(demanda_total_prog.values()))
     model.AddMaxEquality(pico_rob, list(demanda_total_rob.values()))
     model.AddMaxEquality(pico_max, [pico_prog, pico_rob])
-    model.Minimize(pico_max)
 
-    solver = cp_model.CpSolver()
-    solver.parameters.max_time_in_seconds = float(parametros.timeout_segundos)
-    print("Resolvendo modelo...")
-    status = solver.Solve(model)
+    return {
+        "model": model,
+        "inicio_vars_prog": inicio_vars_prog,
+        "inicio_vars_rob": inicio_vars_rob,
+        "pico_prog": pico_prog,
+        "pico_rob": pico_rob,
+        "pico_max": pico_max,
+        "meses_ferias": meses_ferias_idx,
+        "limites": limites,
+    }
 
-    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
-        print(f"\n[✓] SUCESSO! Status: {solver.StatusName(status)}")
-        cronograma_flexivel = defaultdict(list)
-        for proj in projetos_flexiveis:
-            for hab_flag, vars_dict, hab_nome in [('prog', inicio_vars_prog, 'PROG'), ('rob', inicio_vars_rob, 'ROB')]:
-                if getattr(proj, hab_flag) > 0:
-                    for m in range(proj.inicio_min, proj.inicio_max + 1):
-                        num_turmas = solver.Value(vars_dict.get((proj.nome, m), 0))
-                        if num_turmas > 0:
-                            cronograma_flexivel[proj.nome].append({'mes_inicio': m, 'num_turmas': num_turmas, 'habilidade': hab_nome})
-        return {
-            "cronograma": dict(cronograma_flexivel),
-            "pico_max": solver.Value(pico_max),
-            "pico_prog": solver.Value(pico_prog),
-            "pico_rob": solver.Value(pico_rob),
-            "meses_ferias": meses_ferias_idx,
-            "parametros": parametros
-        }
-    else:
-        print(f"\n[✗] FALHA: Status {solver.StatusName(status)}")
-        return None
\ No newline at end of file
+
+def _montar_resultado(valor: Callable, projetos_flexiveis: List[Projeto], modelo: Dict,
+                      parametros: ParametrosOtimizacao) -> Dict:
+    """Resultado do Estágio 1 a partir dos valores de uma solução."""
+    return {
+        "cronograma": _extrair_cronograma(valor, projetos_flexiveis, modelo['inicio_vars_prog'],
+                                          modelo['inicio_vars_rob']),
+        "pico_max": valor(modelo['pico_max']),
+        "pico_prog": valor(modelo['pico_prog']),
+        "pico_rob": valor(modelo['pico_rob']),
+        "meses_ferias": modelo['meses_ferias'],
+        "parametros": parametros
+    }
+
+
+def _extrair_cronograma(valor: Callable, projetos_flexiveis: List[Projeto],
+                        inicio_vars_prog: Dict, inicio_vars_rob: Dict) -> Dict:
+    """Lê o número de turmas iniciadas por projeto, mês e habilidade."""
+    cronograma_flexivel = defaultdict(list)
+    for proj in projetos_flexiveis:
+        for hab_flag, vars_dict, hab_nome in [('prog', inicio_vars_prog, 'PROG'), ('rob', inicio_vars_rob, 'ROB')]:
+            if getattr(proj, hab_flag) > 0:
+                for m in range(proj.inicio_min, proj.inicio_max + 1):
+                    num_turmas = valor(vars_dict[(proj.nome, m)])
+                    if num_turmas > 0:
+                        cronograma_flexivel[proj.nome].append({'mes_inicio': m, 'num_turmas': num_turmas, 'habilidade': hab_nome})
+    return dict(cronograma_flexivel)
@@ -1,20 +1,36 @@
 # ARQUIVO: otimizador/core/stage_2.py
 
+import math
+import time
 from collections import defaultdict
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple, Callable
 from ortools.sat.python import cp_model
 
-from ..data_models import Projeto, ParametrosOtimizacao, Turma, Instrutor
-from ..utils import calcular_meses_ativos
+from ..data_models import Projeto, ParametrosOtimizacao, Turma, Instrutor, IndiceIncidencia
+from ..utils import construir_indice_incidencia, criar_turmas
+from ..instrumentacao import registrar_modelo
+from .heuristicas import alocar_turmas_guloso
+from .perfis_solver import configurar_solver, resolver_modelo
+from .monitoramento import MonitorSolucoes
+from .modo_rapido import montar_resultado_alocacao
+from .limites import calcular_limites_estagio_2, registrar_limites_modelo
+
+HABILIDADES = ('PROG', 'ROBOTICA')
 
 
 def otimizar_atribuicao_e_carga(cronograma_flexivel: Dict,
                                 projetos: List[Projeto],
                                 meses: List[str],
                                 meses_ferias: List[int],
-                                parametros: ParametrosOtimizacao) -> Optional[Dict]:
+                                parametros: ParametrosOtimizacao,
+                                janela_carga: Optional[Tuple[int, int]] = None,
+                                ao_melhorar: Optional[Callable[[Dict], None]] = None) -> Optional[Dict]:
     """
     Aloca turmas a instrutores, minimizando o custo total de remuneração.
+    `janela_carga` (mín, máx) restringe a carga total de cada instrutor usado; é usada pela
+    decomposição por habilidade para coordenar o spread global.
+    `ao_melhorar` recebe um evento a cada solução melhor encontrada (modo anytime). Um Ctrl-C antes
+    da primeira solução do solver devolve o hint guloso como plano, com 'busca_interrompida' = True.
     """
     print("\n" + "=" * 80)
     print("ESTÁGIO 2: Alocação de Instrutores (Otimização de Custo)")
@@ -26,83 +42,217 @@ def otimizar_atribuicao_e_carga(cronograma_flexivel: Dict,
     print(f"Remuneração por instrutor/mês: R$ {remuneracao_formatada}")
 
     # 1. Criação de Turmas
-    all_turmas = []
-    turma_counter = 0
-    projetos_dict = {p.nome: p for p in projetos}
-
-    for proj_nome, cronogramas in cronograma_flexivel.items():
-        proj_details = projetos_dict.get(proj_nome)
-        if not proj_details:
-            continue
-
-        for crono in cronogramas:
-            habilidade_str = crono.get('habilidade', 'PROG')
-            habilidade = 'PROG' if habilidade_str == 'PROG' else 'ROBOTICA'
-
-            for _ in range(crono['num_turmas']):
-                turma_id = f'{proj_nome}_{habilidade[:3]}_{turma_counter}'
-                all_turmas.append(
-                    Turma(turma_id, proj_nome, habilidade, crono['mes_inicio'], proj_details.duracao)
-                )
-                turma_counter += 1
-
+    all_turmas = criar_turmas(cronograma_flexivel, projetos)
     print(f"\nTotal de turmas criadas para alocação: {len(all_turmas)}")
 
-    # 2. Criação do Pool de Instrutores
-    num_max_instrutores_flex = 80
-    all_instrutores = []
+    num_meses = len(meses)
+    indice = construir_indice_incidencia(all_turmas, meses_ferias, num_meses)
+
+    # 2. Dimensionamento do Pool de Instrutores (ampliado automaticamente se o pool esgotar)
+    tamanhos_pool = dimensionar_pool_instrutores(all_turmas, indice, parametros)
+    turmas_por_habilidade = {hab: sum(1 for t in all_turmas if t.habilidade == hab) for hab in HABILIDADES}
+    prazo = time.monotonic() + parametros.timeout_segundos
+
+    # Warm start: solução construtiva gulosa usada como hint do CP-SAT
+    hint, tempo_heuristica = None, 0.0
+    if parametros.usar_hint_estagio2:
+        inicio_heuristica = time.perf_counter()
+        hint = alocar_turmas_guloso(all_turmas, indice, parametros.capacidade_max_instrutor)
+        tempo_heuristica = time.perf_counter() - inicio_heuristica
+        for hab in HABILIDADES:
+            usados_hint = max((hint[t.id] + 1 for t in all_turmas if t.habilidade == hab), default=0)
+            tamanhos_pool[hab] = max(tamanhos_pool[hab], usados_hint)
+        print(f"Hint guloso gerado em {tempo_heuristica:.3f}s")
+
+    while True:
+        all_instrutores = criar_pool_instrutores(tamanhos_pool, parametros.capacidade_max_instrutor)
+        print(f"Pool de instrutores hipotéticos: {len(all_instrutores)} "
+              f"({', '.join(f'{hab}: {n}' for hab, n in tamanhos_pool.items() if n)})\n")
+
+        resolucao = resolver_alocacao(all_turmas, all_instrutores, indice, num_meses, parametros,
+                                       prazo - time.monotonic(), janela_carga, hint, ao_melhorar)
+        if resolucao['status'] != cp_model.INFEASIBLE or resolucao['busca_interrompida']:
+            break
+        expansiveis = [hab for hab, n in tamanhos_pool.items() if n < turmas_por_habilidade[hab]]
+        if not expansiveis or prazo - time.monotonic() < 1:
+            break
+        for hab in expansiveis:
+            tamanhos_pool[hab] = min(turmas_por_habilidade[hab], 2 * tamanhos_pool[hab])
+        print("[!] Modelo inviável com o pool atual. Ampliando o pool de instrutores e resolvendo novamente...")
+
+    status_nome = resolucao['status_nome']
+    diagnostico_hint = None
+    if hint is not None:
+        diagnostico_hint = {
+            "custo_hint": resolucao.get('custo_hint'),
+            "hint_viavel": resolucao.get('hint_viavel', False),
+            "hint_aceito": resolucao.get('hint_aceito', False),
+            "tempo_heuristica": tempo_heuristica,
+        }
+        custo_hint_formatado = f"{diagnostico_hint['custo_hint'] or 0:,.2f}".replace(',', 'X').replace('.', ',').replace(
+            'X', '.')
+        print(f"Hint {'aceito' if diagnostico_hint['hint_aceito'] else 'não aceito'} pelo solver "
+              f"({'viável' if diagnostico_hint['hint_viavel'] else 'inviável'} para o modelo, "
+              f"custo heurístico: R$ {custo_hint_formatado}).")
+    if resolucao['tempo_primeira_solucao'] is not None:
+        print(f"Tempo até a primeira solução: {resolucao['tempo_primeira_solucao']:.2f}s")
+
+    if resolucao['atribuicoes'] is None and resolucao['busca_interrompida'] and hint is not None:
+        print("[!] Busca interrompida antes da primeira solução do solver; usando o hint guloso como plano.")
+        resultado = montar_resultado_alocacao(hint, all_turmas, indice, parametros)
+        resultado.update({"spread_relaxado": resultado['spread_carga'] > parametros.spread_maximo,
+                          "diagnostico_hint": diagnostico_hint, "busca_interrompida": True})
+        if resultado['spread_relaxado']:
+            print(f"[AVISO] Spread do hint ({resultado['spread_carga']}) acima do máximo ({parametros.spread_maximo}).")
+        if ao_melhorar is not None:
+            ao_melhorar({"estagio": "estagio_2", "numero": 1, "objetivo": resultado['custo_total_previsto'],
+                         "limite": None, "tempo": None,
+                         "solucao": {'atribuicoes': resultado['atribuicoes'],
+                                     'custo_total': resultado['custo_total_previsto']}})
+        return resultado
+
+    if resolucao['atribuicoes'] is not None:
+        print(f"\n[✓] SUCESSO! Status: {status_nome}")
+
+        atribuicoes = resolucao['atribuicoes']
+        carga_por_instrutor = defaultdict(int)
+        for atr in atribuicoes:
+            carga_por_instrutor[atr['instrutor'].id] += 1
+
+        cargas_ativas_vals = list(carga_por_instrutor.values()) if carga_por_instrutor else [0]
+        spread_real = max(cargas_ativas_vals) - min(cargas_ativas_vals) if cargas_ativas_vals else 0
+
+        custo_final = resolucao['custo_total']
+        custo_formatado = f"{custo_final:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+        print(f"Custo total previsto: R$ {custo_formatado}")
+
+        return {
+            "status": "sucesso",
+            "atribuicoes": atribuicoes,
+            "custo_total_previsto": custo_final,
+            "total_instrutores_flex": len(cargas_ativas_vals),
+            "carga_por_instrutor": dict(carga_por_instrutor),
+            "spread_carga": spread_real,
+            "turmas": all_turmas,
+            "instrutores": all_instrutores,
+            "indice_incidencia": indice,
+            "capacidade_max": parametros.capacidade_max_instrutor,
+            "tempo_primeira_solucao": resolucao['tempo_primeira_solucao'],
+            "diagnostico_hint": diagnostico_hint,
+            "busca_interrompida": resolucao['busca_interrompida']
+        }
+    else:
+        print(f"\n[✗] FALHA na Alocação: {status_nome}")
+        print("Sugestões: Aumente o 'Spread máximo', a 'Capacidade por Instrutor' ou o 'Timeout do solver'.")
+        return {"status": "falha"}
 
-    for hab in ['PROG', 'ROBOTICA']:
-        for i in range(num_max_instrutores_flex):
+
+def dimensionar_pool_instrutores(turmas: List[Turma], indice: IndiceIncidencia,
+                                 parametros: ParametrosOtimizacao) -> Dict[str, int]:
+    """
+    Calcula o tamanho do pool hipotético por habilidade a partir do pico de turmas simultâneas
+    (o mesmo pico_prog/pico_rob do Estágio 1 para este cronograma): o limite inferior
+    ceil(pico / capacidade) acrescido da margem de segurança, limitado ao número de turmas.
+    """
+    tamanhos = {}
+    for hab in HABILIDADES:
+        num_turmas = sum(1 for t in turmas if t.habilidade == hab)
+        pico = max((len(indice.turmas_ativas(hab, m)) for m in range(indice.num_meses)), default=0)
+        limite_inferior = math.ceil(pico / parametros.capacidade_max_instrutor)
+        com_margem = max(limite_inferior + 1, math.ceil(limite_inferior * (1 + parametros.margem_pool_instrutores)))
+        tamanhos[hab] = min(num_turmas, com_margem)
+    return tamanhos
+
+
+def criar_pool_instrutores(tamanhos_pool: Dict[str, int], capacidade: int) -> List[Instrutor]:
+    """Cria os instrutores hipotéticos de cada habilidade."""
+    all_instrutores = []
+    for hab, tamanho in tamanhos_pool.items():
+        for i in range(tamanho):
             instrutor = Instrutor(
                 id=f'{hab}_{i}',
                 habilidade=hab,
-                capacidade=parametros.capacidade_max_instrutor,
+                capacidade=capacidade,
                 laboratorio_id=None
             )
             all_instrutores.append(instrutor)
+    return all_instrutores
+
+
+def criar_instrutores_adicionais(tamanhos_pool: Dict[str, int], existentes: List[Instrutor],
+                                 capacidade: int) -> List[Instrutor]:
+    """Instrutores hipotéticos adicionais, numerados depois dos já existentes de cada habilidade."""
+    proximo = defaultdict(int)
+    for i in existentes:
+        proximo[i.habilidade] = max(proximo[i.habilidade], int(i.id.rsplit('_', 1)[1]) + 1)
+    return [Instrutor(id=f'{hab}_{proximo[hab] + k}', habilidade=hab, capacidade=capacidade, laboratorio_id=None)
+            for hab, tamanho in tamanhos_pool.items() for k in range(tamanho)]
 
-    print(f"Pool de instrutores hipotéticos: {len(all_instrutores)}\n")
 
-    # 3. Construção do Modelo
+def resolver_alocacao(all_turmas: List[Turma], all_instrutores: List[Instrutor], indice: IndiceIncidencia,
+                      num_meses: int, parametros: ParametrosOtimizacao, tempo_limite: float,
+                      janela_carga: Optional[Tuple[int, int]] = None,
+                      hint: Optional[Dict[str, int]] = None,
+                      ao_melhorar: Optional[Callable[[Dict], None]] = None,
+                      estado_instrutores: Optional[Dict[str, Dict]] = None) -> Dict:
+    """
+    Constrói e resolve o modelo de alocação para um pool de instrutores fixo.
+    `estado_instrutores` ({id: {'carga_mensal': {mês: turmas}, 'carga_total': turmas}}) traz a carga
+    já atribuída a instrutores fora deste modelo: ela ocupa capacidade e entra no spread, e os meses
+    em que o instrutor já está ativo não têm custo adicional.
+    Retorna o status do solver, as atribuições (None se não houver solução) e o diagnóstico do hint.
+    """
+    # Construção do Modelo
+    inicio_construcao = time.perf_counter()
     model = cp_model.CpModel()
-    num_meses = len(meses)
 
     # Organizar dados
-    turmas_por_habilidade = defaultdict(list)
-    for t in all_turmas:
-        turmas_por_habilidade[t.habilidade].append(t)
-
     instrutores_por_habilidade = defaultdict(list)
     for i in all_instrutores:
         instrutores_por_habilidade[i.habilidade].append(i)
 
-    # Variáveis de atribuição
+    # Grupos de turmas intercambiáveis: cada turma isolada ou uma coorte (projeto, habilidade, mês de início)
+    grupos = agrupar_turmas(all_turmas, parametros.formulacao_estagio2)
+    grupos_por_habilidade = defaultdict(list)
+    grupos_por_mes = defaultdict(list)
+    for g_idx, grupo in enumerate(grupos):
+        representante = grupo[0]
+        grupos_por_habilidade[representante.habilidade].append(g_idx)
+        for m in indice.meses_ativos(representante):
+            grupos_por_mes[(representante.habilidade, m)].append(g_idx)
+
+    print(f"Formulação '{parametros.formulacao_estagio2}': {len(grupos)} grupos de turmas")
+    limites = calcular_limites_estagio_2(all_turmas, all_instrutores, indice, parametros, estado_instrutores)
+
+    # Variáveis de atribuição (quantas turmas do grupo vão para cada instrutor)
     assign = {}
-    for habilidade, turmas in turmas_por_habilidade.items():
-        for t in turmas:
-            instrutores_hab = instrutores_por_habilidade.get(habilidade, [])
-            for i in instrutores_hab:
-                var_name = f'assign_{t.id[:15]}_{i.id}'
-                assign[(t.id, i.id)] = model.NewBoolVar(var_name)
+    for habilidade, g_indices in grupos_por_habilidade.items():
+        for g_idx in g_indices:
+            grupo = grupos[g_idx]
+            for i in instrutores_por_habilidade.get(habilidade, []):
+                if len(grupo) == 1:
+                    assign[(g_idx, i.id)] = model.NewBoolVar(f'assign_{grupo[0].id[:15]}_{i.id}')
+                else:
+                    limite = min(len(grupo), i.capacidade)
+                    assign[(g_idx, i.id)] = model.NewIntVar(0, limite, f'coorte_{g_idx}_{i.id}')
 
     # Restrição: cada turma tem exatamente um instrutor
-    for t_list in turmas_por_habilidade.values():
-        for t in t_list:
-            opcoes = [assign[(t.id, i.id)] for i in instrutores_por_habilidade[t.habilidade]]
+    for g_idx, grupo in enumerate(grupos):
+        opcoes = [assign[(g_idx, i.id)] for i in instrutores_por_habilidade[grupo[0].habilidade]]
+        if len(grupo) == 1:
             model.AddExactlyOne(opcoes)
+        else:
+            model.Add(sum(opcoes) == len(grupo))
 
     # Variáveis de atividade mensal
+    estado_instrutores = estado_instrutores or {}
     instrutor_ativo_mes = {}
+    meses_ja_pagos = set()
 
     for i in all_instrutores:
+        carga_base = estado_instrutores.get(i.id, {}).get('carga_mensal', {})
         for m in range(num_meses):
-            carga_mensal = []
-
-            for t in turmas_por_habilidade[i.habilidade]:
-                meses_ativos_turma = calcular_meses_ativos(t.mes_inicio, t.duracao, meses_ferias, num_meses)
-                if m in meses_ativos_turma:
-                    carga_mensal.append(assign[(t.id, i.id)])
+            carga_mensal = [assign[(g_idx, i.id)] for g_idx in grupos_por_mes.get((i.habilidade, m), [])]
 
             if not carga_mensal:
                 continue
@@ -110,7 +260,9 @@ def otimizar_atribuicao_e_carga(cronograma_flexivel: Dict,
             ativo = model.NewBoolVar(f'ativo_{i.id}_{m}')
             instrutor_ativo_mes[(i.id, m)] = ativo
 
-            soma_carga_mensal = sum(carga_mensal)
+            soma_carga_mensal = sum(carga_mensal) + carga_base.get(m, 0)
+            if carga_base.get(m, 0):
+                meses_ja_pagos.add((i.id, m))
 
             # Se carga maior que zero, está ativo
             model.Add(soma_carga_mensal > 0).OnlyEnforceIf(ativo)
@@ -123,33 +275,172 @@ def otimizar_atribuicao_e_carga(cronograma_flexivel: Dict,
     # Cálculo do spread
     cargas_totais = []
     instrutores_usados_bool = []
+    carga_por_id, usado_por_id = {}, {}
 
     for i in all_instrutores:
         usado = model.NewBoolVar(f'usado_{i.id}')
-        carga_total = model.NewIntVar(0, 300, f'carga_{i.id}')
+        carga_total = model.NewIntVar(0, limites['carga_por_instrutor'][i.id], f'carga_{i.id}')
 
-        turmas_do_instrutor = []
-        for t in turmas_por_habilidade[i.habilidade]:
-            if assign.get((t.id, i.id)) is not None:
-                turmas_do_instrutor.append(assign[(t.id, i.id)])
+        turmas_do_instrutor = [assign[(g_idx, i.id)] for g_idx in grupos_por_habilidade[i.habilidade]]
 
         if turmas_do_instrutor:
-            model.Add(sum(turmas_do_instrutor) == carga_total)
+            carga_base_total = estado_instrutores.get(i.id, {}).get('carga_total', 0)
+            model.Add(sum(turmas_do_instrutor) + carga_base_total == carga_total)
             model.Add(carga_total > 0).OnlyEnforceIf(usado)
             model.Add(carga_total == 0).OnlyEnforceIf(usado.Not())
             cargas_totais.append(carga_total)
             instrutores_usados_bool.append(usado)
+            carga_por_id[i.id], usado_por_id[i.id] = carga_total, usado
+            if janela_carga is not None:
+                model.Add(carga_total >= janela_carga[0]).OnlyEnforceIf(usado)
+                model.Add(carga_total <= janela_carga[1])
+
+    if parametros.quebra_simetria != 'nenhuma':
+        # Só os instrutores sem carga prévia são intercambiáveis
+        intercambiaveis = {hab: [i for i in instrutores if i.id not in estado_instrutores]
+                           for hab, instrutores in instrutores_por_habilidade.items()}
+        _adicionar_quebra_simetria(model, parametros.quebra_simetria, grupos, grupos_por_habilidade,
+                                   intercambiaveis, assign, carga_por_id, usado_por_id)
+
+    if parametros.formulacao_spread == 'janela':
+        _adicionar_spread_janela(model, parametros, indice, instrutores_por_habilidade, carga_por_id, usado_por_id,
+                                 instrutor_ativo_mes, limites['carga_max'], estado_instrutores)
+    else:
+        _adicionar_spread_reificado(model, parametros, cargas_totais, instrutores_usados_bool, limites['carga_max'])
 
-    spread_var = model.NewIntVar(0, 300, 'spread_obj')
+    # Função objetivo: minimizar custo
+    custo_total_var = model.NewIntVar(0, limites['custo_max'], 'custo_total')
+    remuneracao = int(parametros.remuneracao_instrutor)
+
+    total_ativacoes = sum(ativo for chave, ativo in instrutor_ativo_mes.items() if chave not in meses_ja_pagos)
+    model.Add(custo_total_var == remuneracao * total_ativacoes)
+
+    model.Minimize(custo_total_var)
+
+    resolucao = {}
+    if hint is not None:
+        resolucao.update(_aplicar_hint(model, hint, parametros, grupos, grupos_por_habilidade,
+                                       instrutores_por_habilidade, assign, instrutor_ativo_mes,
+                                       carga_por_id, usado_por_id, indice, janela_carga))
+
+    tempo_construcao = time.perf_counter() - inicio_construcao
+
+    # Resolução
+    solver = cp_model.CpSolver()
+    configurar_solver(solver, parametros, 'estagio_2', max(1.0, float(tempo_limite)))
+    def decodificar(valor: Callable) -> Dict:
+        return {'atribuicoes': _extrair_atribuicoes(valor, grupos, instrutores_por_habilidade, assign),
+                'custo_total': valor(custo_total_var)}
+
+    monitor = MonitorSolucoes('estagio_2', decodificar, ao_melhorar)
+    print("Resolvendo alocação para minimizar custo...")
+    status, interrompida = resolver_modelo(solver, model, parametros, monitor)
+    registrar_modelo('estagio_2', model, tempo_construcao, solver, status, monitor.tempo_primeira_solucao,
+                     com_hint=hint is not None)
+    registrar_limites_modelo('estagio_2', {'carga_max': limites['carga_max'], 'custo_max': limites['custo_max']})
+
+    resolucao.update({
+        "status": status,
+        "status_nome": solver.StatusName(status),
+        "atribuicoes": None,
+        "tempo_primeira_solucao": monitor.tempo_primeira_solucao,
+        "busca_interrompida": interrompida,
+    })
+    if 'custo_hint' in resolucao:
+        resolucao['hint_aceito'] = (resolucao['hint_viavel'] and monitor.objetivo_primeira_solucao is not None
+                                    and monitor.objetivo_primeira_solucao <= resolucao['custo_hint'])
+
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return resolucao
+
+    resolucao['atribuicoes'] = _extrair_atribuicoes(solver.Value, grupos, instrutores_por_habilidade, assign)
+    resolucao['custo_total'] = solver.Value(custo_total_var)
+    return resolucao
+
+
+def _extrair_atribuicoes(valor: Callable, grupos: List[List[Turma]],
+                         instrutores_por_habilidade: Dict[str, List[Instrutor]], assign: Dict) -> List[Dict]:
+    """Expande os valores das variáveis de atribuição na lista de atribuições turma → instrutor."""
+    atribuicoes = []
+    for g_idx, grupo in enumerate(grupos):
+        turmas_restantes = iter(grupo)
+        for i in instrutores_por_habilidade[grupo[0].habilidade]:
+            for _ in range(valor(assign[(g_idx, i.id)])):
+                atribuicoes.append({'turma': next(turmas_restantes), 'instrutor': i})
+    return atribuicoes
+
+
+def _aplicar_hint(model: cp_model.CpModel, hint: Dict[str, int], parametros: ParametrosOtimizacao,
+                  grupos: List[List[Turma]], grupos_por_habilidade: Dict[str, List[int]],
+                  instrutores_por_habilidade: Dict[str, List[Instrutor]], assign: Dict,
+                  instrutor_ativo_mes: Dict, carga_por_id: Dict, usado_por_id: Dict,
+                  indice: IndiceIncidencia, janela_carga: Optional[Tuple[int, int]]) -> Dict:
+    """
+    Converte a alocação heurística em hints do modelo. Os instrutores da heurística são renumerados
+    na ordem canônica da quebra de simetria (carga decrescente no modo 'carga', primeira turma nos
+    demais) para que o hint não seja descartado pelas restrições de ordenação.
+    """
+    custo_hint, cargas_hint = 0, []
+    for habilidade, g_indices in grupos_por_habilidade.items():
+        instrutores_hab = instrutores_por_habilidade.get(habilidade, [])
+        turmas_hab = [t for g_idx in g_indices for t in grupos[g_idx]]
+
+        carga_heuristica = defaultdict(int)
+        for t in turmas_hab:
+            carga_heuristica[hint[t.id]] += 1
+        if parametros.quebra_simetria == 'carga':
+            ordem = sorted(carga_heuristica, key=lambda k: -carga_heuristica[k])
+        else:
+            ordem = list(dict.fromkeys(hint[t.id] for t in turmas_hab))
+        if len(ordem) > len(instrutores_hab):
+            return {"custo_hint": None, "hint_viavel": False}
+        posicao = {k: pos for pos, k in enumerate(ordem)}
+
+        contagem = defaultdict(int)
+        meses_por_posicao = defaultdict(set)
+        for g_idx in g_indices:
+            for t in grupos[g_idx]:
+                pos = posicao[hint[t.id]]
+                contagem[(g_idx, pos)] += 1
+                meses_por_posicao[pos].update(indice.meses_ativos(t))
+
+        for pos, i in enumerate(instrutores_hab):
+            for g_idx in g_indices:
+                model.AddHint(assign[(g_idx, i.id)], contagem.get((g_idx, pos), 0))
+            for m in range(indice.num_meses):
+                if (i.id, m) in instrutor_ativo_mes:
+                    model.AddHint(instrutor_ativo_mes[(i.id, m)], m in meses_por_posicao[pos])
+            if i.id in carga_por_id:
+                carga = carga_heuristica[ordem[pos]] if pos < len(ordem) else 0
+                model.AddHint(carga_por_id[i.id], carga)
+                model.AddHint(usado_por_id[i.id], carga > 0)
+        custo_hint += sum(len(meses) for meses in meses_por_posicao.values())
+        cargas_hint.extend(carga_heuristica.values())
+
+    spread_hint = max(cargas_hint) - min(cargas_hint) if cargas_hint else 0
+    viavel = spread_hint <= parametros.spread_maximo
+    if janela_carga is not None and cargas_hint:
+        viavel = viavel and janela_carga[0] <= min(cargas_hint) and max(cargas_hint) <= janela_carga[1]
+    return {"custo_hint": custo_hint * int(parametros.remuneracao_instrutor), "hint_viavel": viavel}
+
+
+def _adicionar_spread_reificado(model: cp_model.CpModel, parametros: ParametrosOtimizacao,
+                                cargas_totais: List, instrutores_usados_bool: List, carga_max: int):
+    """
+    Spread exato: max_carga e min_carga_usada são o máximo e o mínimo das cargas dos instrutores
+    usados (instrutores não usados entram no mínimo com a carga máxima, via restrições reificadas).
+    `carga_max` é o limite superior de qualquer carga total do modelo.
+    """
+    spread_var = model.NewIntVar(0, carga_max, 'spread_obj')
 
     if cargas_totais:
-        max_carga = model.NewIntVar(0, 300, 'max_carga')
-        min_carga_usada = model.NewIntVar(0, 300, 'min_carga_usada')
+        max_carga = model.NewIntVar(0, carga_max, 'max_carga')
+        min_carga_usada = model.NewIntVar(0, carga_max, 'min_carga_usada')
         model.AddMaxEquality(max_carga, cargas_totais)
 
         cargas_ajustadas = []
         for idx, carga in enumerate(cargas_totais):
-            carga_ajustada = model.NewIntVar(0, 300, f'carga_ajustada_{idx}')
+            carga_ajustada = model.NewIntVar(0, carga_max, f'carga_ajustada_{idx}')
             model.Add(carga_ajustada == carga).OnlyEnforceIf(instrutores_usados_bool[idx])
             model.Add(carga_ajustada == max_carga).OnlyEnforceIf(instrutores_usados_bool[idx].Not())
             cargas_ajustadas.append(carga_ajustada)
@@ -160,54 +451,86 @@ def otimizar_atribuicao_e_carga(cronograma_flexivel: Dict,
     else:
         model.Add(spread_var == 0)
 
-    # Função objetivo: minimizar custo
-    custo_total_var = model.NewIntVar(0, 1000000000, 'custo_total')
-    remuneracao = int(parametros.remuneracao_instrutor)
-
-    total_ativacoes = sum(instrutor_ativo_mes.values())
-    model.Add(custo_total_var == remuneracao * total_ativacoes)
-
-    model.Minimize(custo_total_var)
-
-    # 4. Resolução
-    solver = cp_model.CpSolver()
-    solver.parameters.max_time_in_seconds = float(parametros.timeout_segundos)
-    print("Resolvendo alocação para minimizar custo...")
-    status = solver.Solve(model)
-
-    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
-        print(f"\n[✓] SUCESSO! Status: {solver.StatusName(status)}")
-
-        atribuicoes = []
-        for t in all_turmas:
-            for i in instrutores_por_habilidade[t.habilidade]:
-                if solver.Value(assign.get((t.id, i.id), 0)):
-                    atribuicoes.append({'turma': t, 'instrutor': i})
-                    break
 
-        carga_por_instrutor = defaultdict(int)
-        for atr in atribuicoes:
-            carga_por_instrutor[atr['instrutor'].id] += 1
+def _adicionar_spread_janela(model: cp_model.CpModel, parametros: ParametrosOtimizacao, indice: IndiceIncidencia,
+                             instrutores_por_habilidade: Dict[str, List[Instrutor]],
+                             carga_por_id: Dict, usado_por_id: Dict, instrutor_ativo_mes: Dict, carga_max: int,
+                             estado_instrutores: Optional[Dict[str, Dict]] = None):
+    """
+    Spread por janela de carga: toda carga fica abaixo de `carga_sup` e toda carga de instrutor usado
+    fica acima de `carga_inf`, com carga_sup - carga_inf <= spread máximo. Como o spread só restringe
+    (não entra no objetivo), basta existir a janela; isso dispensa os máximos/mínimos exatos e as
+    cargas ajustadas reificadas. Acompanham a janela limites inferiores redundantes no número de
+    instrutores: ceil(turmas ativas / capacidade) ativos em cada mês e ceil(pico / capacidade) usados
+    por habilidade, que dão ao solver desde o início o limite inferior de custo. Instrutores com carga
+    prévia no mês (`estado_instrutores`) já estão ativos: sua capacidade livre é descontada do limite.
+    `carga_max` é o limite superior de qualquer carga total do modelo.
+    """
+    if not carga_por_id:
+        return
+
+    carga_inf = model.NewIntVar(1, max(1, carga_max), 'carga_inf')
+    carga_sup = model.NewIntVar(1, max(1, carga_max), 'carga_sup')
+    model.Add(carga_sup - carga_inf <= parametros.spread_maximo)
+    for inst_id, carga in carga_por_id.items():
+        model.Add(carga <= carga_sup)
+        model.Add(carga >= carga_inf).OnlyEnforceIf(usado_por_id[inst_id])
+
+    capacidade = parametros.capacidade_max_instrutor
+    for habilidade, instrutores_hab in instrutores_por_habilidade.items():
+        for m in range(indice.num_meses):
+            ativos_mes, capacidade_ja_ativa = [], 0
+            for i in instrutores_hab:
+                carga_previa = (estado_instrutores or {}).get(i.id, {}).get('carga_mensal', {}).get(m, 0)
+                if carga_previa:
+                    capacidade_ja_ativa += capacidade - carga_previa
+                elif (i.id, m) in instrutor_ativo_mes:
+                    ativos_mes.append(instrutor_ativo_mes[(i.id, m)])
+            turmas_mes = len(indice.turmas_ativas(habilidade, m)) - capacidade_ja_ativa
+            if ativos_mes and turmas_mes > 0:
+                model.Add(sum(ativos_mes) >= math.ceil(turmas_mes / capacidade))
+
+        usados_hab = [usado_por_id[i.id] for i in instrutores_hab if i.id in usado_por_id]
+        pico = max((len(indice.turmas_ativas(habilidade, m)) for m in range(indice.num_meses)), default=0)
+        if usados_hab and pico:
+            model.Add(sum(usados_hab) >= math.ceil(pico / capacidade))
+
+
+def agrupar_turmas(turmas: List[Turma], formulacao: str) -> List[List[Turma]]:
+    """
+    Agrupa turmas intercambiáveis para o modelo de alocação.
+    Na formulação 'coorte', turmas com mesmo projeto, habilidade e mês de início formam um único grupo;
+    na formulação 'turma', cada turma é um grupo isolado.
+    """
+    if formulacao != 'coorte':
+        return [[t] for t in turmas]
 
-        cargas_ativas_vals = list(carga_por_instrutor.values()) if carga_por_instrutor else [0]
-        spread_real = max(cargas_ativas_vals) - min(cargas_ativas_vals) if cargas_ativas_vals else 0
+    coortes = defaultdict(list)
+    for t in turmas:
+        coortes[(t.projeto, t.habilidade, t.mes_inicio)].append(t)
+    return list(coortes.values())
 
-        custo_final = solver.Value(custo_total_var)
-        custo_formatado = f"{custo_final:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-        print(f"Custo total previsto: R$ {custo_formatado}")
 
-        return {
-            "status": "sucesso",
-            "atribuicoes": atribuicoes,
-            "custo_total_previsto": custo_final,
-            "total_instrutores_flex": len(cargas_ativas_vals),
-            "carga_por_instrutor": dict(carga_por_instrutor),
-            "spread_carga": spread_real,
-            "turmas": all_turmas,
-            "instrutores": all_instrutores,
-            "capacidade_max": parametros.capacidade_max_instrutor
-        }
-    else:
-        print(f"\n[✗] FALHA na Alocação: {solver.StatusName(status)}")
-        print("Sugestões: Aumente o 'Spread máximo', a 'Capacidade por Instrutor' ou o 'Timeout do solver'.")
-        return {"status": "falha"}
\ No newline at end of file
+def _adicionar_quebra_simetria(model: cp_model.CpModel, modo: str, grupos: List[List[Turma]],
+                               grupos_por_habilidade: Dict[str, List[int]],
+                               instrutores_por_habilidade: Dict[str, List[Instrutor]],
+                               assign: Dict, carga_por_id: Dict, usado_por_id: Dict):
+    """
+    Impõe uma ordem canônica aos instrutores hipotéticos de cada habilidade, que são intercambiáveis.
+    Em ambos os modos os instrutores usados vêm primeiro. No modo 'carga' eles ficam em ordem
+    decrescente de carga total; no modo 'indice' a k-ésima turma da habilidade só pode ir para um
+    dos k primeiros instrutores. Os dois modos não são combinados, pois juntos podem cortar ótimos.
+    """
+    for habilidade, instrutores_hab in instrutores_por_habilidade.items():
+        ordenados = [i for i in instrutores_hab if i.id in usado_por_id]
+        for anterior, seguinte in zip(ordenados, ordenados[1:]):
+            model.AddImplication(usado_por_id[seguinte.id], usado_por_id[anterior.id])
+            if modo == 'carga':
+                model.Add(carga_por_id[anterior.id] >= carga_por_id[seguinte.id])
+
+        if modo == 'indice':
+            turmas_acumuladas = 0
+            for g_idx in grupos_por_habilidade.get(habilidade, []):
+                turmas_acumuladas += len(grupos[g_idx])
+                for i in instrutores_hab[turmas_acumuladas:]:
+                    model.Add(assign[(g_idx, i.id)] == 0)
@@ -1,8 +1,46 @@
 # ARQUIVO: otimizador/data_models.py (CORRIGIDO)
 
+import os
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List
+from typing import List, Dict, Tuple, Any
+
+FORMULACOES_ESTAGIO2 = ("turma", "coorte")
+MODOS_QUEBRA_SIMETRIA = ("nenhuma", "carga", "indice")
+FORMULACOES_SPREAD = ("reificada", "janela")
+MOTORES_OTIMIZACAO = ("cpsat", "heuristico", "geracao_colunas")
+
+# Perfis de busca do CP-SAT, definidos por estágio. Campos:
+#   num_workers (0 = automático), random_seed, nivel_presolve (0 = desligado, 1 = sem probing,
+#   2 = completo), linearization_level (0-2) e log (exibe o progresso da busca).
+PERFIS_SOLVER: Dict[str, Dict[str, Dict[str, Any]]] = {
+    "fast": {
+        "estagio_1": {"num_workers": 4, "random_seed": 0, "nivel_presolve": 1, "linearization_level": 0, "log": False},
+        "estagio_2": {"num_workers": 8, "random_seed": 0, "nivel_presolve": 1, "linearization_level": 0, "log": False},
+    },
+    "balanced": {
+        "estagio_1": {"num_workers": 0, "random_seed": 0, "nivel_presolve": 2, "linearization_level": 1, "log": False},
+        "estagio_2": {"num_workers": 0, "random_seed": 0, "nivel_presolve": 2, "linearization_level": 1, "log": False},
+    },
+    "deterministic": {
+        "estagio_1": {"num_workers": 1, "random_seed": 42, "nivel_presolve": 2, "linearization_level": 1, "log": False},
+        "estagio_2": {"num_workers": 1, "random_seed": 42, "nivel_presolve": 2, "linearization_level": 1, "log": False},
+    },
+    "max-cores": {
+        "estagio_1": {"num_workers": os.cpu_count() or 1, "random_seed": 0, "nivel_presolve": 2,
+                      "linearization_level": 1, "log": False},
+        "estagio_2": {"num_workers": os.cpu_count() or 1, "random_seed": 0, "nivel_presolve": 2,
+                      "linearization_level": 2, "log": True},
+    },
+}
+CAMPOS_PERFIL_SOLVER = ("num_workers", "random_seed", "nivel_presolve", "linearization_level", "log")
+
+# Opções dos gráficos do PDF (aqui, e não em reporting.plotting, para que a linha de comando e o serviço
+# as validem sem carregar o matplotlib). Qualidade em pixels por polegada na página do PDF: rascunho
+# para execuções interativas, impressão para o relatório final
+QUALIDADES_GRAFICO = {"rascunho": 150, "impressao": 300}
+# Formato do buffer entregue ao PDF: PNG (sem perdas), JPEG (compactado) ou SVG (vetorial, sem resolução)
+FORMATOS_GRAFICO = ("png", "jpeg", "svg")
 
 
 @dataclass
@@ -17,6 +55,54 @@ class ParametrosOtimizacao:
 
     remuneracao_instrutor: float = 5000.0
 
+    # Formulação do Estágio 2: 'turma' (uma variável booleana por turma × instrutor) ou
+    # 'coorte' (variáveis inteiras por coorte projeto/habilidade/mês de início × instrutor)
+    formulacao_estagio2: str = "turma"
+
+    # Quebra de simetria do pool hipotético: 'nenhuma', 'carga' (instrutores usados primeiro, em ordem
+    # decrescente de carga) ou 'indice' (usados primeiro, turmas atribuídas em ordem de índice)
+    quebra_simetria: str = "nenhuma"
+
+    # Formulação do spread de carga: 'reificada' (máximo e mínimo exatos das cargas usadas, o padrão) ou
+    # 'janela' (opcional: cargas usadas dentro de uma janela [mín, máx] de largura até o spread máximo)
+    formulacao_spread: str = "reificada"
+
+    # Margem de segurança do pool hipotético sobre o limite inferior ceil(pico / capacidade)
+    margem_pool_instrutores: float = 0.5
+
+    # Resolve cada habilidade (PROG/ROBOTICA) em um modelo e processo separados
+    decomposicao_por_habilidade: bool = False
+
+    # Gera uma solução gulosa como ponto de partida (hint) do Estágio 2; o ganho sobre a busca sem hint
+    # é medido por `python -m otimizador.comparacao_hint`
+    usar_hint_estagio2: bool = True
+
+    # Motor de otimização: 'cpsat' (modelos exatos), 'heuristico' (modo rápido, sem solver) ou
+    # 'geracao_colunas' (Estágio 2 por padrões de trabalho, para portfólios grandes)
+    motor_otimizacao: str = "cpsat"
+
+    # Perfil de busca do CP-SAT (ver PERFIS_SOLVER) e ajustes pontuais por estágio,
+    # ex.: {"estagio_2": {"num_workers": 16}}
+    perfil_solver: str = "balanced"
+    ajustes_solver: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    # Cronogramas alternativos do Estágio 1 avaliados pelo Estágio 2 (1 = só o ótimo do pico), com
+    # pico máximo de até o ótimo + tolerância
+    num_cronogramas_alternativos: int = 1
+    tolerancia_pico_alternativos: int = 0
+
+    # Horizonte rolante: resolve janelas sucessivas de N meses (0 = desligado), com sobreposição
+    # de alguns meses entre janelas consecutivas
+    horizonte_rolante_meses: int = 0
+    sobreposicao_horizonte_meses: int = 3
+
+    # Modo anytime: exibe cada solução melhor e grava o incumbente em disco durante a busca
+    modo_anytime: bool = False
+
+    # Reotimização incremental: com até N projetos alterados em relação ao último plano, os demais
+    # mantêm cronograma e instrutores e só a vizinhança da alteração é reotimizada (0 = desligada, o padrão)
+    max_projetos_incremental: int = 0
+
     def __post_init__(self):
         """Validação dos dados após a inicialização."""
         if not isinstance(self.capacidade_max_instrutor, int) or self.capacidade_max_instrutor <= 0:
@@ -28,6 +114,42 @@ class ParametrosOtimizacao:
 
         if not isinstance(self.remuneracao_instrutor, (int, float)) or self.remuneracao_instrutor <= 0:
             raise ValueError("A remuneração do instrutor deve ser um valor numérico positivo.")
+        if self.formulacao_estagio2 not in FORMULACOES_ESTAGIO2:
+            raise ValueError(f"Formulação do Estágio 2 deve ser uma de: {', '.join(FORMULACOES_ESTAGIO2)}.")
+        if self.quebra_simetria not in MODOS_QUEBRA_SIMETRIA:
+            raise ValueError(f"Quebra de simetria deve ser uma de: {', '.join(MODOS_QUEBRA_SIMETRIA)}.")
+        if self.formulacao_spread not in FORMULACOES_SPREAD:
+            raise ValueError(f"Formulação do spread deve ser uma de: {', '.join(FORMULACOES_SPREAD)}.")
+        if not isinstance(self.margem_pool_instrutores, (int, float)) or self.margem_pool_instrutores < 0:
+            raise ValueError("A margem do pool de instrutores deve ser um valor numérico não-negativo.")
+        if not isinstance(self.decomposicao_por_habilidade, bool):
+            raise ValueError("A decomposição por habilidade deve ser verdadeira ou falsa.")
+        if not isinstance(self.usar_hint_estagio2, bool):
+            raise ValueError("O uso de hint no Estágio 2 deve ser verdadeiro ou falso.")
+        if self.motor_otimizacao not in MOTORES_OTIMIZACAO:
+            raise ValueError(f"Motor de otimização deve ser um de: {', '.join(MOTORES_OTIMIZACAO)}.")
+        if not isinstance(self.num_cronogramas_alternativos, int) or self.num_cronogramas_alternativos < 1:
+            raise ValueError("O número de cronogramas alternativos deve ser um inteiro positivo.")
+        if not isinstance(self.tolerancia_pico_alternativos, int) or self.tolerancia_pico_alternativos < 0:
+            raise ValueError("A tolerância de pico dos cronogramas alternativos deve ser um inteiro não-negativo.")
+        if not isinstance(self.horizonte_rolante_meses, int) or self.horizonte_rolante_meses < 0:
+            raise ValueError("O horizonte rolante deve ser um inteiro não-negativo (0 = desligado).")
+        if not isinstance(self.sobreposicao_horizonte_meses, int) or self.sobreposicao_horizonte_meses < 0:
+            raise ValueError("A sobreposição do horizonte rolante deve ser um inteiro não-negativo.")
+        if self.horizonte_rolante_meses and self.sobreposicao_horizonte_meses >= self.horizonte_rolante_meses:
+            raise ValueError("A sobreposição deve ser menor que a janela do horizonte rolante.")
+        if not isinstance(self.modo_anytime, bool):
+            raise ValueError("O modo anytime deve ser verdadeiro ou falso.")
+        if not isinstance(self.max_projetos_incremental, int) or self.max_projetos_incremental < 0:
+            raise ValueError("O limite de projetos da reotimização incremental deve ser um inteiro não-negativo.")
+        if self.perfil_solver not in PERFIS_SOLVER:
+            raise ValueError(f"Perfil do solver deve ser um de: {', '.join(PERFIS_SOLVER)}.")
+        for estagio, ajustes in self.ajustes_solver.items():
+            if estagio not in ("estagio_1", "estagio_2") or not isinstance(ajustes, dict):
+                raise ValueError("Ajustes do solver devem ser indexados por 'estagio_1' ou 'estagio_2'.")
+            invalidos = set(ajustes) - set(CAMPOS_PERFIL_SOLVER)
+            if invalidos:
+                raise ValueError(f"Ajustes do solver inválidos: {', '.join(sorted(invalidos))}.")
 
 
 @dataclass
@@ -100,4 +222,23 @@ class Instrutor:
     id: str
     habilidade: str
     capacidade: int
-    laboratorio_id: int | None
\ No newline at end of file
+    laboratorio_id: int | None
+
+
+@dataclass
+class IndiceIncidencia:
+    """
+    Índice turma × mês pré-calculado uma única vez a partir de `mes_inicio`, `duracao` e dos meses de férias.
+    Compartilhado pelos estágios de otimização e pelos relatórios.
+    """
+    num_meses: int
+    meses_por_turma: Dict[str, List[int]] = field(default_factory=dict)
+    turmas_por_mes: Dict[Tuple[str, int], List[Turma]] = field(default_factory=dict)
+
+    def meses_ativos(self, turma: Turma) -> List[int]:
+        """Meses (índices) em que a turma está ativa."""
+        return self.meses_por_turma.get(turma.id, [])
+
+    def turmas_ativas(self, habilidade: str, mes: int) -> List[Turma]:
+        """Turmas de uma habilidade ativas em um mês."""
+        return self.turmas_por_mes.get((habilidade, mes), [])
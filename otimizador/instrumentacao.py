@@ -0,0 +1,219 @@
+# ARQUIVO: otimizador/instrumentacao.py
+
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+CAMINHO_RESUMO_EXECUCAO = Path("Resumo_Execucao.json")
+
+# Estatísticas da resposta do CP-SAT copiadas para o resumo (campos ausentes na versão instalada são ignorados)
+CAMPOS_RESPOSTA_SOLVER = ('wall_time', 'user_time', 'deterministic_time', 'objective_value', 'best_objective_bound',
+                          'gap_integral', 'num_booleans', 'num_integers', 'num_fixed_booleans', 'num_conflicts',
+                          'num_branches', 'num_binary_propagations', 'num_integer_propagations', 'num_restarts',
+                          'num_lp_iterations')
+
+# Registro da execução corrente. Fases executadas em processos filhos (decomposição por
+# habilidade, varredura de cenários) não aparecem aqui, apenas a chamada que as engloba; os
+# modelos dos filhos entram quando a chamada passa por executar_com_registro.
+_registro: Dict[str, List[Dict]] = {"fases": [], "modelos": [], "limites": []}
+
+
+def iniciar_execucao():
+    """Descarta as medições anteriores; chamado no início de cada execução do pipeline."""
+    _registro["fases"] = []
+    _registro["modelos"] = []
+    _registro["limites"] = []
+
+
+def executar_com_registro(funcao: Callable, *args, **kwargs) -> Tuple[Any, Dict[str, List[Dict]]]:
+    """
+    Executa `funcao` (num processo filho) com o registro zerado e devolve (resultado, modelos e
+    limites registrados), para o processo pai juntá-los ao seu com incorporar_registro.
+    """
+    iniciar_execucao()
+    resultado = funcao(*args, **kwargs)
+    return resultado, {"modelos": list(_registro["modelos"]), "limites": list(_registro["limites"])}
+
+
+def incorporar_registro(registro: Dict[str, List[Dict]], subproblema: Optional[str] = None):
+    """Junta ao registro corrente os modelos e limites de um processo filho, marcados com o subproblema."""
+    for modelo in registro["modelos"]:
+        _registro["modelos"].append(dict(modelo, subproblema=subproblema) if subproblema else modelo)
+    _registro["limites"].extend(registro["limites"])
+
+
+def pico_memoria_mb() -> Optional[float]:
+    """Pico de memória residente do processo até o momento, em MB (None se indisponível)."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss é informado em bytes no macOS e em KB no Linux
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+@contextmanager
+def medir_fase(nome: str):
+    """Mede tempo de parede, tempo de CPU (todas as threads do processo) e pico de memória da fase."""
+    inicio_parede, inicio_cpu = time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        _registro["fases"].append({
+            "fase": nome,
+            "tempo_parede_s": round(time.perf_counter() - inicio_parede, 4),
+            "tempo_cpu_s": round(time.process_time() - inicio_cpu, 4),
+            "pico_memoria_mb": pico_memoria_mb(),
+        })
+
+
+def registrar_modelo(estagio: str, model, tempo_construcao: float, solver=None, status=None,
+                     tempo_primeira_solucao: Optional[float] = None, com_hint: Optional[bool] = None) -> Dict:
+    """
+    Registra tamanho de um modelo CP-SAT (variáveis e restrições), o tempo gasto para construí-lo e,
+    se o solver for informado, as estatísticas da resposta da busca. Um estágio pode registrar vários
+    modelos (por exemplo, quando o pool de instrutores é ampliado). `tempo_primeira_solucao` e
+    `com_hint` permitem comparar execuções com e sem solução inicial (hint).
+    """
+    proto = model.Proto()
+    registro = {
+        "estagio": estagio,
+        "variaveis": len(proto.variables),
+        "restricoes": len(proto.constraints),
+        "tempo_construcao_s": round(tempo_construcao, 4),
+    }
+    if solver is not None:
+        resposta = solver.ResponseProto()
+        registro["status"] = solver.StatusName(status) if status is not None else None
+        registro["solver"] = {campo: getattr(resposta, campo) for campo in CAMPOS_RESPOSTA_SOLVER
+                              if hasattr(resposta, campo)}
+    if tempo_primeira_solucao is not None:
+        registro["tempo_primeira_solucao_s"] = tempo_primeira_solucao
+    if com_hint is not None:
+        registro["com_hint"] = com_hint
+    _registro["modelos"].append(registro)
+    return registro
+
+
+def registrar_limites(estagio: str, limites: Dict[str, int], riscos_overflow: List[str]) -> Dict:
+    """Registra os limites de domínio derivados da instância para um modelo e os que têm risco de overflow."""
+    registro = {"estagio": estagio, "limites": dict(limites), "risco_overflow": list(riscos_overflow)}
+    _registro["limites"].append(registro)
+    return registro
+
+
+def _limites_por_estagio() -> Dict[str, Dict]:
+    """Maior valor de cada limite por estágio (um estágio pode registrar vários modelos)."""
+    agregados = {}
+    for registro in _registro["limites"]:
+        agregado = agregados.setdefault(registro["estagio"], {"limites": {}, "risco_overflow": []})
+        for nome, valor in registro["limites"].items():
+            agregado["limites"][nome] = max(valor, agregado["limites"].get(nome, valor))
+        agregado["risco_overflow"].extend(n for n in registro["risco_overflow"] if n not in agregado["risco_overflow"])
+    return agregados
+
+
+def obter_resumo(extras: Optional[Dict] = None) -> Dict:
+    """Monta o resumo da execução: fases, modelos, pico de memória e dados adicionais."""
+    resumo = {
+        "data_execucao": datetime.now().isoformat(timespec='seconds'),
+        "fases": list(_registro["fases"]),
+        "modelos": list(_registro["modelos"]),
+        "limites": _limites_por_estagio(),
+        "risco_overflow": any(registro["risco_overflow"] for registro in _registro["limites"]),
+        "pico_memoria_mb": pico_memoria_mb(),
+    }
+    resumo.update(extras or {})
+    return resumo
+
+
+def exibir_resumo():
+    """Exibe no terminal a tabela de tempos por fase e o tamanho dos modelos."""
+    print("\n" + "=" * 80 + "\nTEMPOS DE EXECUÇÃO POR FASE\n" + "=" * 80)
+    for fase in _registro["fases"]:
+        memoria = f"{fase['pico_memoria_mb']:.0f} MB" if fase['pico_memoria_mb'] is not None else "-"
+        print(f"  • {fase['fase']:<28} parede: {fase['tempo_parede_s']:>8.2f}s | "
+              f"CPU: {fase['tempo_cpu_s']:>8.2f}s | pico RSS: {memoria}")
+    for modelo in _registro["modelos"]:
+        tempo_busca = modelo.get("solver", {}).get("wall_time")
+        busca = f" | busca: {tempo_busca:.2f}s ({modelo['status']})" if tempo_busca is not None else ""
+        if modelo.get("tempo_primeira_solucao_s") is not None:
+            hint = {True: ", com hint", False: ", sem hint"}.get(modelo.get("com_hint"), "")
+            busca += f" | 1ª solução: {modelo['tempo_primeira_solucao_s']:.2f}s{hint}"
+        nome = f"{modelo['estagio']} {modelo['subproblema']}" if modelo.get('subproblema') else modelo['estagio']
+        print(f"  • Modelo {nome:<21} {modelo['variaveis']} variáveis, {modelo['restricoes']} restrições | "
+              f"construção: {modelo['tempo_construcao_s']:.2f}s{busca}")
+    for estagio, agregado in _limites_por_estagio().items():
+        limites = ', '.join(f"{nome}: {valor}" for nome, valor in agregado["limites"].items())
+        print(f"  • Domínios {estagio:<20} {limites}")
+        if agregado["risco_overflow"]:
+            print(f"    [AVISO] Risco de overflow em: {', '.join(agregado['risco_overflow'])}")
+
+
+def gravar_resumo_json(resumo: Dict, caminho: Path = CAMINHO_RESUMO_EXECUCAO) -> Path:
+    """Grava o resumo da execução em JSON."""
+    caminho = Path(caminho)
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(resumo, f, indent=2, ensure_ascii=False, default=str)
+    print(f"[✓] Resumo da execução salvo em: {caminho}")
+    return caminho
+
+
+def gravar_textfile_prometheus(resumo: Dict, caminho: Path) -> Path:
+    """
+    Exporta o resumo no formato de texto do Prometheus, para o coletor textfile do node_exporter.
+    O arquivo é substituído atomicamente para que o coletor nunca leia uma versão parcial.
+    """
+    linhas = []
+
+    def metrica(nome: str, descricao: str, amostras: List):
+        linhas.append(f"# HELP otimizador_{nome} {descricao}")
+        linhas.append(f"# TYPE otimizador_{nome} gauge")
+        for rotulos, valor in amostras:
+            if valor is None:
+                continue
+            texto_rotulos = ','.join(f'{k}="{v}"' for k, v in rotulos.items())
+            linhas.append(f"otimizador_{nome}{{{texto_rotulos}}} {float(valor)}" if texto_rotulos
+                          else f"otimizador_{nome} {float(valor)}")
+
+    fases, modelos = resumo["fases"], resumo["modelos"]
+    metrica("fase_tempo_parede_segundos", "Tempo de parede por fase.",
+            [({"fase": f["fase"]}, f["tempo_parede_s"]) for f in fases])
+    metrica("fase_tempo_cpu_segundos", "Tempo de CPU por fase.",
+            [({"fase": f["fase"]}, f["tempo_cpu_s"]) for f in fases])
+    metrica("pico_memoria_bytes", "Pico de memória residente do processo.",
+            [({}, resumo["pico_memoria_mb"] * 1024 * 1024 if resumo["pico_memoria_mb"] is not None else None)])
+    metrica("modelo_variaveis", "Variáveis do modelo CP-SAT.",
+            [({"estagio": m["estagio"], "modelo": str(i)}, m["variaveis"]) for i, m in enumerate(modelos)])
+    metrica("modelo_restricoes", "Restrições do modelo CP-SAT.",
+            [({"estagio": m["estagio"], "modelo": str(i)}, m["restricoes"]) for i, m in enumerate(modelos)])
+    metrica("modelo_tempo_primeira_solucao_segundos", "Tempo até a primeira solução do modelo.",
+            [({"estagio": m["estagio"], "modelo": str(i), "hint": str(m.get("com_hint", "")).lower()},
+              m.get("tempo_primeira_solucao_s")) for i, m in enumerate(modelos)])
+    metrica("limite_dominio", "Maior limite de domínio derivado da instância, por estágio.",
+            [({"estagio": estagio, "limite": nome}, valor)
+             for estagio, agregado in resumo.get("limites", {}).items()
+             for nome, valor in agregado["limites"].items()])
+    metrica("risco_overflow", "1 se algum limite de domínio excede o inteiro exato do solver.",
+            [({}, int(resumo.get("risco_overflow", False)))])
+    for campo in CAMPOS_RESPOSTA_SOLVER:
+        metrica(f"solver_{campo}", f"Estatística '{campo}' da resposta do CP-SAT.",
+                [({"estagio": m["estagio"], "modelo": str(i)}, m.get("solver", {}).get(campo))
+                 for i, m in enumerate(modelos)])
+
+    caminho = Path(caminho)
+    temporario = caminho.with_suffix(caminho.suffix + '.tmp')
+    with open(temporario, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(linhas) + '\n')
+    os.replace(temporario, caminho)
+    print(f"[✓] Métricas Prometheus salvas em: {caminho}")
+    return caminho
@@ -0,0 +1,179 @@
+# ARQUIVO: otimizador/io/cache_resultados.py
+
+import hashlib
+import json
+import os
+import pickle
+import platform
+import time
+from dataclasses import fields
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Import relativo para acessar os modelos de dados
+from ..data_models import ParametrosOtimizacao, ConfiguracaoProjeto
+
+DIRETORIO_CACHE = Path("cache_resultados")
+# Último plano resolvido, ponto de partida da reotimização incremental (não entra na remoção por tamanho/idade)
+CAMINHO_ULTIMO_PLANO = DIRETORIO_CACHE / "ultimo_plano.pickle"
+TAMANHO_MAXIMO_CACHE_MB = 500
+IDADE_MAXIMA_CACHE_DIAS = 30
+
+# Código que determina os resultados dos estágios; mudanças nele invalidam o cache
+_RAIZ_PACOTE = Path(__file__).resolve().parent.parent
+_ARQUIVOS_VERSAO = ('data_models.py', 'utils.py', 'core')
+
+
+def _campos_de_entrada(objeto) -> Dict:
+    """Campos informados pelo usuário (os calculados, com init=False, ficam de fora)."""
+    return {f.name: getattr(objeto, f.name) for f in fields(objeto) if f.init}
+
+
+def versao_codigo() -> str:
+    """Hash do código de otimização, da versão do OR-Tools e da versão do Python."""
+    import ortools
+    resumo = hashlib.sha256()
+    for nome in _ARQUIVOS_VERSAO:
+        caminho = _RAIZ_PACOTE / nome
+        for arquivo in sorted(caminho.rglob('*.py')) if caminho.is_dir() else [caminho]:
+            resumo.update(str(arquivo.relative_to(_RAIZ_PACOTE)).encode('utf-8'))
+            resumo.update(arquivo.read_bytes())
+    resumo.update(f"ortools={ortools.__version__};python={platform.python_version()}".encode('utf-8'))
+    return resumo.hexdigest()
+
+
+def calcular_chave_cache(parametros: ParametrosOtimizacao, projetos_config: List[ConfiguracaoProjeto]) -> str:
+    """
+    Chave de conteúdo da execução: hash do JSON canônico (chaves ordenadas) dos parâmetros e dos
+    projetos, na ordem em que foram informados, combinado com a versão do código.
+    """
+    conteudo = {
+        "parametros": _campos_de_entrada(parametros),
+        "projetos": [_campos_de_entrada(p) for p in projetos_config],
+        "versao_codigo": versao_codigo(),
+    }
+    texto = json.dumps(conteudo, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+def resultados_completos(resultados_estagio1: Dict, resultados_estagio2: Dict) -> bool:
+    """
+    Indica se os resultados podem ser reaproveitados: busca não interrompida (Ctrl-C no modo anytime)
+    e plano dentro do spread máximo (sem 'spread_relaxado' nem spread acima do limite).
+    """
+    if any(r.get('busca_interrompida', False) for r in (resultados_estagio1, resultados_estagio2)):
+        return False
+    if resultados_estagio2.get('spread_relaxado', False):
+        return False
+    parametros = resultados_estagio1.get('parametros')
+    spread = resultados_estagio2.get('spread_carga')
+    return parametros is None or spread is None or spread <= parametros.spread_maximo
+
+
+def carregar_resultados(chave: str, diretorio: Path = DIRETORIO_CACHE) -> Optional[Tuple[Dict, Dict]]:
+    """
+    Devolve (resultado do Estágio 1, resultado do Estágio 2) guardados para a chave, ou None.
+    Entradas incompletas (ver resultados_completos) são descartadas. Um acerto atualiza a data de modificação do arquivo, que serve de último uso na remoção.
+    """
+    caminho = Path(diretorio) / f"{chave}.pkl"
+    if not caminho.exists():
+        return None
+    try:
+        with open(caminho, 'rb') as f:
+            resultados = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+        print(f"[AVISO] Entrada de cache ilegível descartada ({caminho.name}): {e}")
+        caminho.unlink(missing_ok=True)
+        return None
+    if not resultados_completos(*resultados):
+        print(f"[AVISO] Entrada de cache incompleta descartada ({caminho.name}).")
+        caminho.unlink(missing_ok=True)
+        return None
+    os.utime(caminho)
+    return resultados
+
+
+def salvar_resultados(chave: str, resultados_estagio1: Dict, resultados_estagio2: Dict,
+                      diretorio: Path = DIRETORIO_CACHE) -> Optional[Path]:
+    """
+    Guarda os resultados dos dois estágios (gravação atômica) e aplica a política de remoção.
+    Resultados incompletos (ver resultados_completos) não são guardados; nesse caso retorna None.
+    """
+    if not resultados_completos(resultados_estagio1, resultados_estagio2):
+        print("[INFO] Resultado interrompido ou acima do spread máximo: não guardado no cache.")
+        return None
+    diretorio = Path(diretorio)
+    diretorio.mkdir(exist_ok=True)
+    caminho = diretorio / f"{chave}.pkl"
+    # Temporário por processo: cenários da varredura podem gravar a mesma chave ao mesmo tempo
+    temporario = caminho.with_suffix(f'.{os.getpid()}.tmp')
+    with open(temporario, 'wb') as f:
+        pickle.dump((resultados_estagio1, resultados_estagio2), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporario, caminho)
+    limpar_cache(diretorio)
+    return caminho
+
+
+def salvar_ultimo_plano(parametros: ParametrosOtimizacao, projetos_config: List[ConfiguracaoProjeto],
+                        meses: List[str], resultados_estagio1: Dict, resultados_estagio2: Dict,
+                        caminho: Path = CAMINHO_ULTIMO_PLANO) -> Path:
+    """Guarda o plano em uso (configuração e resultados) para a próxima reotimização incremental."""
+    caminho = Path(caminho)
+    caminho.parent.mkdir(exist_ok=True)
+    plano = {
+        "parametros": parametros,
+        "projetos_config": projetos_config,
+        "meses": meses,
+        "resultados_estagio1": resultados_estagio1,
+        "resultados_estagio2": resultados_estagio2,
+    }
+    temporario = caminho.with_suffix('.tmp')
+    with open(temporario, 'wb') as f:
+        pickle.dump(plano, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporario, caminho)
+    return caminho
+
+
+def carregar_ultimo_plano(caminho: Path = CAMINHO_ULTIMO_PLANO) -> Optional[Dict]:
+    """Carrega o último plano resolvido, ou None se não existir ou estiver ilegível."""
+    caminho = Path(caminho)
+    if not caminho.exists():
+        return None
+    try:
+        with open(caminho, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+        print(f"[AVISO] Último plano ilegível ignorado ({caminho.name}): {e}")
+        return None
+
+
+def limpar_cache(diretorio: Path = DIRETORIO_CACHE, tamanho_maximo_mb: float = TAMANHO_MAXIMO_CACHE_MB,
+                 idade_maxima_dias: float = IDADE_MAXIMA_CACHE_DIAS) -> int:
+    """
+    Remove as entradas sem uso há mais de `idade_maxima_dias` e, se o cache ainda passar de
+    `tamanho_maximo_mb`, as usadas há mais tempo até caber. Retorna o número de entradas removidas.
+    """
+    diretorio = Path(diretorio)
+    if not diretorio.exists():
+        return 0
+    limite_idade = time.time() - idade_maxima_dias * 86400
+    entradas, removidas = [], 0
+    for arquivo in diretorio.glob('*.pkl'):
+        try:
+            info = arquivo.stat()
+        except FileNotFoundError:  # removida por outro processo (varredura de cenários)
+            continue
+        if info.st_mtime < limite_idade:
+            arquivo.unlink(missing_ok=True)
+            removidas += 1
+        else:
+            entradas.append((info.st_mtime, info.st_size, arquivo))
+
+    tamanho_total = sum(tamanho for _, tamanho, _ in entradas)
+    for _, tamanho, arquivo in sorted(entradas):
+        if tamanho_total <= tamanho_maximo_mb * 1024 * 1024:
+            break
+        arquivo.unlink(missing_ok=True)
+        tamanho_total -= tamanho
+        removidas += 1
+    return removidas
@@ -0,0 +1,52 @@
+# ARQUIVO: otimizador/io/checkpoint.py
+
+import json
+import os
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict
+
+CAMINHO_CHECKPOINT = Path("checkpoint_otimizacao.json")
+
+
+class ReceptorProgresso:
+    """
+    Receptor dos eventos do modo anytime: exibe cada solução melhor no terminal e grava em disco o
+    incumbente mais recente de cada estágio, para que nada se perca se a execução for interrompida.
+    """
+
+    def __init__(self, caminho: Path = CAMINHO_CHECKPOINT):
+        self.caminho = Path(caminho)
+        self.estado: Dict[str, Dict] = {}
+
+    def __call__(self, evento: Dict):
+        self._exibir(evento)
+        self.estado[evento['estagio']] = _serializar_evento(evento)
+        temporario = self.caminho.with_suffix('.tmp')
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(self.estado, f, ensure_ascii=False)
+        os.replace(temporario, self.caminho)
+
+    @staticmethod
+    def _exibir(evento: Dict):
+        rotulo = "Estágio 1 (pico)" if evento['estagio'] == 'estagio_1' else "Estágio 2 (custo)"
+        linha = f"   [{rotulo}] solução #{evento['numero']}: objetivo {evento['objetivo']:,.0f}"
+        limite = evento.get('limite')
+        if limite is not None:
+            gap = (evento['objetivo'] - limite) / evento['objetivo'] if evento['objetivo'] else 0.0
+            linha += f" | limite {limite:,.0f} | gap {gap:.1%}"
+        if evento.get('tempo') is not None:
+            linha += f" | {evento['tempo']:.1f}s"
+        print(linha.replace(',', '.'), flush=True)
+
+
+def _serializar_evento(evento: Dict) -> Dict:
+    """Converte o evento em uma estrutura JSON (turmas e instrutores viram dicionários)."""
+    serializado = {k: v for k, v in evento.items() if k != 'solucao'}
+    solucao = dict(evento.get('solucao') or {})
+    if 'atribuicoes' in solucao:
+        solucao['atribuicoes'] = [{'turma': asdict(atr['turma']), 'instrutor': asdict(atr['instrutor'])}
+                                  for atr in solucao['atribuicoes']]
+    serializado['solucao'] = solucao
+    return serializado
+
@@ -1,6 +1,7 @@
 # ARQUIVO: otimizador/io/config_manager.py
 
 import json
+from dataclasses import fields
 from pathlib import Path
 from datetime import datetime
 from typing import List, Tuple, Optional, Dict
@@ -60,7 +61,8 @@ def exibir_preview_configuracao(arquivo: Path) -> Optional[Dict]:
         print(f"   Criado em: {metadata.get('data_criacao', 'N/A')[:19]}")
         print(f"   Projetos: {len(config_data.get('projetos', []))}")
         print(
-            f"   Capacidade: {parametros.get('capacidade_max_instrutor', 'N/A')} | Spread: {parametros.get('spread_maximo', 'N/A')}")
+            f"   Capacidade: {parametros.get('capacidade_max_instrutor', 'N/A')} | Spread: {parametros.get('spread_maximo', 'N/A')}"
+            f" | Perfil do solver: {parametros.get('perfil_solver', 'balanced')}")
         return config_data
     except Exception as e:
         print(f"   [ERRO] Não foi possível ler: {e}")
@@ -93,19 +95,35 @@ def carregar_configuracao(arquivo: Optional[Path] = None) -> Tuple[
                 except ValueError:
                     print("[!] Digite um número válido.")
 
-        with open(arquivo, 'r', encoding='utf-8') as f:
-            config_data = json.load(f)
-
-        parametros = ParametrosOtimizacao(**config_data.get("parametros", {}))
-        projetos = [ConfiguracaoProjeto(**p) for p in config_data.get("projetos", [])]
-
-        print(f"\n[✓] Configuração carregada com sucesso: {arquivo.stem}")
+        parametros, projetos = ler_configuracao(arquivo)
+        print(f"\n[✓] Configuração carregada com sucesso: {Path(arquivo).stem}")
         return parametros, projetos
     except Exception as e:
         print(f"\n[ERRO] Falha ao carregar configuração: {e}")
         return None, None
 
 
+def ler_configuracao(arquivo: Path) -> Tuple[ParametrosOtimizacao, List[ConfiguracaoProjeto]]:
+    """Lê e valida um arquivo de configuração, propagando o erro (arquivo ausente, JSON ou campos inválidos)."""
+    with open(arquivo, 'r', encoding='utf-8') as f:
+        config_data = json.load(f)
+
+    parametros = ParametrosOtimizacao(**_filtrar_campos(ParametrosOtimizacao, config_data.get("parametros", {})))
+    projetos = [ConfiguracaoProjeto(**_filtrar_campos(ConfiguracaoProjeto, p)) for p in config_data.get("projetos", [])]
+    if not projetos:
+        raise ValueError("A configuração não tem projetos.")
+    return parametros, projetos
+
+
+def _filtrar_campos(classe, dados: Dict) -> Dict:
+    """Descarta chaves obsoletas de configurações salvas por versões anteriores."""
+    campos = {f.name for f in fields(classe) if f.init}
+    ignorados = sorted(set(dados) - campos)
+    if ignorados:
+        print(f"   [AVISO] Campos ignorados em {classe.__name__}: {', '.join(ignorados)}")
+    return {k: v for k, v in dados.items() if k in campos}
+
+
 def deletar_configuracao() -> bool:
     """Deleta uma configuração salva."""
     # (Implementação omitida por brevidade, mas deve ser movida para cá)
@@ -5,7 +5,7 @@ from datetime import datetime
 from typing import List, Optional
 
 # Import relativo para acessar os modelos de dados do mesmo pacote
-from ..data_models import ParametrosOtimizacao, ConfiguracaoProjeto
+from ..data_models import ParametrosOtimizacao, ConfiguracaoProjeto, PERFIS_SOLVER
 
 
 def obter_parametros_usuario() -> ParametrosOtimizacao:
@@ -34,11 +34,16 @@ def obter_parametros_usuario() -> ParametrosOtimizacao:
             prompt="Timeout do solver em segundos [padrão: 180]: ",
             valor_padrao=180, minimo=10, maximo=3600, nome_parametro="Timeout"
         )
+        perfil_solver = _obter_opcao_usuario(
+            prompt=f"Perfil do solver ({'/'.join(PERFIS_SOLVER)}) [padrão: balanced]: ",
+            opcoes=list(PERFIS_SOLVER), valor_padrao="balanced"
+        )
         parametros = ParametrosOtimizacao(
             capacidade_max_instrutor=capacidade_max,
             spread_maximo=spread_maximo,
             timeout_segundos=timeout,
-            remuneracao_instrutor=remuneracao
+            remuneracao_instrutor=remuneracao,
+            perfil_solver=perfil_solver
         )
         exibir_resumo_parametros(parametros)
         return parametros
@@ -182,6 +187,13 @@ def _editar_projeto_interativo(projetos: List[ConfiguracaoProjeto]) -> List[Conf
     return projetos
 
 
+def oferecer_edicao_projetos(projetos: List[ConfiguracaoProjeto]) -> List[ConfiguracaoProjeto]:
+    """Permite editar projetos de uma configuração carregada antes de otimizar."""
+    while input("\nDeseja editar algum projeto antes de otimizar? (S/N) [N]: ").strip().upper() == 'S':
+        projetos = _editar_projeto_interativo(projetos)
+    return projetos
+
+
 def _remover_projeto_interativo(projetos: List[ConfiguracaoProjeto]) -> List[ConfiguracaoProjeto]:
     """Interface para selecionar e remover um projeto."""
     print("[INFO] Remoção ainda não implementada na versão refatorada.")
@@ -242,6 +254,16 @@ def _obter_float_usuario(prompt: str, valor_padrao: float, minimo: float, maximo
             print("[!] Valor inválido. Digite um número.")
 
 
+def _obter_opcao_usuario(prompt: str, opcoes: List[str], valor_padrao: str) -> str:
+    """Solicita ao usuário uma opção dentre uma lista fixa."""
+    while True:
+        entrada = input(prompt).strip().lower()
+        if entrada == 'sair': raise KeyboardInterrupt()
+        if entrada == "": return valor_padrao
+        if entrada in opcoes: return entrada
+        print(f"[!] Opção inválida. Escolha entre: {', '.join(opcoes)}.")
+
+
 def exibir_resumo_parametros(params: ParametrosOtimizacao):
     """Exibe resumo dos parâmetros configurados."""
     print("\n" + "=" * 80 + "\nPARÂMETROS GLOBAIS CONFIGURADOS:\n" + "=" * 80)
@@ -249,7 +271,25 @@ def exibir_resumo_parametros(params: ParametrosOtimizacao):
     print(f"  • Remuneração Mensal por Instrutor: R$ {params.remuneracao_instrutor:,.2f}".replace(',', 'X').replace('.',',').replace('X','.'))
     print(f"  • Spread Máximo: {params.spread_maximo} turmas")
     print(f"  • Timeout do Solver: {params.timeout_segundos} segundos")
+    print(f"  • Perfil do Solver: {params.perfil_solver}"
+          + (f" (ajustes: {params.ajustes_solver})" if params.ajustes_solver else ""))
     print(f"  • Meses de Férias: {', '.join(params.meses_ferias)}")
+    print(f"  • Motor de Otimização: {params.motor_otimizacao}")
+    print(f"  • Formulação do Estágio 2: {params.formulacao_estagio2}")
+    print(f"  • Quebra de Simetria: {params.quebra_simetria}")
+    print(f"  • Formulação do Spread: {params.formulacao_spread}")
+    print(f"  • Margem do Pool de Instrutores: {params.margem_pool_instrutores:.0%}")
+    print(f"  • Decomposição por Habilidade: {'Sim' if params.decomposicao_por_habilidade else 'Não'}")
+    print(f"  • Hint Guloso no Estágio 2: {'Sim' if params.usar_hint_estagio2 else 'Não'}")
+    if params.num_cronogramas_alternativos > 1:
+        print(f"  • Cronogramas Alternativos: {params.num_cronogramas_alternativos} "
+              f"(tolerância de pico: {params.tolerancia_pico_alternativos})")
+    if params.horizonte_rolante_meses:
+        print(f"  • Horizonte Rolante: janelas de {params.horizonte_rolante_meses} meses "
+              f"(sobreposição de {params.sobreposicao_horizonte_meses})")
+    print(f"  • Modo Anytime (progresso e checkpoint): {'Sim' if params.modo_anytime else 'Não'}")
+    print("  • Reotimização Incremental: " + (f"até {params.max_projetos_incremental} projetos alterados"
+                                               if params.max_projetos_incremental else "Desligada"))
     print("=" * 80)
 
 
@@ -0,0 +1,139 @@
+# ARQUIVO: otimizador/lote.py
+
+import dataclasses
+import json
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from . import instrumentacao
+from .instrumentacao import medir_fase
+from .io import config_manager, cache_resultados
+from .pipeline import preparar_horizonte, otimizar_estagios, gerar_relatorios
+
+# Códigos de saída da execução em lote (2 coincide com o erro de uso do argparse)
+SAIDA_SUCESSO = 0
+SAIDA_ERRO = 1
+SAIDA_CONFIGURACAO_INVALIDA = 2
+SAIDA_FALHA_ESTAGIO_1 = 3
+SAIDA_FALHA_ESTAGIO_2 = 4
+# Plano gerado (com relatórios), mas acima do spread máximo: heurística ou janela/habilidade relaxada
+SAIDA_SPREAD_RELAXADO = 5
+SAIDA_CANCELADA = 130
+
+# 'completo': planilhas, gráficos e PDF; 'planilhas': só as planilhas; 'nenhum': só o resultado em JSON
+RELATORIOS_LOTE = ('completo', 'planilhas', 'nenhum')
+
+
+def executar_lote(caminho_configuracao: Path, diretorio_saida: Path = Path('.'),
+                  perfil_solver: Optional[str] = None, timeout_segundos: Optional[int] = None,
+                  relatorios: str = 'completo', qualidade_graficos: str = "impressao",
+                  formato_graficos: str = "png", forcar_resolucao: bool = False,
+                  ao_melhorar: Optional[Callable[[Dict], None]] = None,
+                  planilhas_separadas: bool = False) -> Tuple[int, Dict]:
+    """
+    Resolve uma configuração salva sem nenhuma pergunta ao usuário, gravando relatórios e o resumo da
+    execução em `diretorio_saida`. `perfil_solver` e `timeout_segundos` substituem os da configuração;
+    `qualidade_graficos` e `formato_graficos` escolhem a resolução e o formato dos gráficos do PDF;
+    `planilhas_separadas` grava cada planilha em seu arquivo em vez de uma única pasta de trabalho.
+    Usa o cache de resultados, mas não o modo anytime nem a reotimização incremental, que dependem do
+    último plano da sessão interativa; execuções simultâneas precisam apenas de diretórios de saída
+    distintos. `ao_melhorar` recebe os eventos de solução melhor dos estágios, como no modo anytime.
+    Retorna (código de saída, resultado serializável em JSON).
+    """
+    if relatorios not in RELATORIOS_LOTE:
+        raise ValueError(f"Relatórios devem ser um de: {', '.join(RELATORIOS_LOTE)}.")
+    diretorio_saida = Path(diretorio_saida)
+    resultado = {"configuracao": str(caminho_configuracao), "diretorio_saida": str(diretorio_saida),
+                 "status": "erro", "erro": None, "origem_resultados": None, "tempo_s": None}
+    inicio = time.perf_counter()
+    instrumentacao.iniciar_execucao()
+    try:
+        try:
+            parametros, projetos_config = config_manager.ler_configuracao(caminho_configuracao)
+            sobreposicoes = {}
+            if perfil_solver is not None:
+                sobreposicoes['perfil_solver'] = perfil_solver
+            if timeout_segundos is not None:
+                sobreposicoes['timeout_segundos'] = timeout_segundos
+            parametros = dataclasses.replace(parametros, **sobreposicoes)
+        except (OSError, json.JSONDecodeError, TypeError, ValueError) as e:
+            resultado.update(status="configuracao_invalida", erro=str(e))
+            return SAIDA_CONFIGURACAO_INVALIDA, resultado
+
+        from .utils import converter_projetos_para_modelo
+        diretorio_saida.mkdir(parents=True, exist_ok=True)
+        meses, meses_ferias_idx = preparar_horizonte(projetos_config, parametros)
+        with medir_fase("conversao_projetos"):
+            projetos_modelo = converter_projetos_para_modelo(projetos_config, meses, meses_ferias_idx, parametros)
+
+        chave_cache = cache_resultados.calcular_chave_cache(parametros, projetos_config)
+        em_cache = None if forcar_resolucao else cache_resultados.carregar_resultados(chave_cache)
+        if em_cache is not None:
+            resultados_estagio1, resultados_estagio2 = em_cache
+            resultados_estagio1['parametros'] = parametros
+            resultado['origem_resultados'] = "cache"
+        else:
+            resultados_estagio1, resultados_estagio2 = otimizar_estagios(parametros, projetos_modelo, meses,
+                                                                         meses_ferias_idx, ao_melhorar)
+            resultado['origem_resultados'] = "otimizacao"
+            if resultados_estagio1 is None:
+                resultado['status'] = "falha_estagio_1"
+                return SAIDA_FALHA_ESTAGIO_1, resultado
+            if resultados_estagio2 is None:
+                resultado['status'] = "falha_estagio_2"
+                return SAIDA_FALHA_ESTAGIO_2, resultado
+            cache_resultados.salvar_resultados(chave_cache, resultados_estagio1, resultados_estagio2)
+
+        caminho_pdf = None
+        if relatorios != 'nenhum':
+            caminho_pdf = gerar_relatorios(projetos_config, parametros, meses, meses_ferias_idx,
+                                           resultados_estagio1, resultados_estagio2, diretorio_saida,
+                                           gerar_pdf=relatorios == 'completo',
+                                           qualidade_graficos=qualidade_graficos,
+                                           formato_graficos=formato_graficos,
+                                           planilhas_separadas=planilhas_separadas)
+
+        resumo = instrumentacao.obter_resumo({
+            "motor_otimizacao": parametros.motor_otimizacao,
+            "perfil_solver": parametros.perfil_solver,
+            "num_projetos": len(projetos_config),
+            "num_meses": len(meses),
+            "num_turmas": len(resultados_estagio2['turmas']),
+            "pico_max": resultados_estagio1['pico_max'],
+            "custo_total_previsto": resultados_estagio2['custo_total_previsto'],
+            "origem_resultados": resultado['origem_resultados'],
+        })
+        caminho_resumo = instrumentacao.gravar_resumo_json(
+            resumo, diretorio_saida / instrumentacao.CAMINHO_RESUMO_EXECUCAO.name)
+        caminho_prometheus = os.environ.get("OTIMIZADOR_PROMETHEUS_TEXTFILE")
+        if caminho_prometheus:
+            instrumentacao.gravar_textfile_prometheus(resumo, caminho_prometheus)
+
+        spread_relaxado = resultados_estagio2.get('spread_relaxado', False)
+        resultado.update({
+            "status": "spread_relaxado" if spread_relaxado else "sucesso",
+            "custo_total_previsto": resultados_estagio2['custo_total_previsto'],
+            "total_instrutores_flex": resultados_estagio2['total_instrutores_flex'],
+            "pico_max": resultados_estagio1['pico_max'],
+            "spread_carga": resultados_estagio2['spread_carga'],
+            "spread_maximo": parametros.spread_maximo,
+            "spread_relaxado": spread_relaxado,
+            "num_turmas": len(resultados_estagio2['turmas']),
+            # Ctrl-C no modo anytime: plano da melhor solução encontrada, não o fim da busca
+            "busca_interrompida": any(r.get('busca_interrompida', False)
+                                      for r in (resultados_estagio1, resultados_estagio2)),
+            "relatorio_pdf": str(caminho_pdf) if caminho_pdf else None,
+            "resumo_execucao": str(caminho_resumo),
+            "resumo": resumo,
+        })
+        return (SAIDA_SPREAD_RELAXADO if spread_relaxado else SAIDA_SUCESSO), resultado
+    except KeyboardInterrupt:
+        resultado['status'] = "cancelado"
+        return SAIDA_CANCELADA, resultado
+    except Exception as e:
+        resultado['erro'] = f"{type(e).__name__}: {e}"
+        return SAIDA_ERRO, resultado
+    finally:
+        resultado['tempo_s'] = round(time.perf_counter() - inicio, 2)
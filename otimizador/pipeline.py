@@ -0,0 +1,160 @@
+# ARQUIVO: otimizador/pipeline.py
+
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple, Callable
+
+from .data_models import ParametrosOtimizacao, ConfiguracaoProjeto, Projeto
+from .instrumentacao import medir_fase
+
+# numpy, OR-Tools, pandas, matplotlib e fpdf são importados dentro da etapa que os usa: os menus e a
+# leitura de configurações não pagam pela sua carga, e um resultado em cache não carrega o solver
+
+
+def preparar_horizonte(projetos_config: List[ConfiguracaoProjeto],
+                       parametros: ParametrosOtimizacao) -> Tuple[List[str], List[int]]:
+    """Meses do período de análise (do primeiro início ao último término) e índices dos meses de férias."""
+    from .utils import gerar_lista_meses
+    dt_min = min(datetime.strptime(p.data_inicio, "%d/%m/%Y") for p in projetos_config)
+    dt_max = max(datetime.strptime(p.data_termino, "%d/%m/%Y") for p in projetos_config)
+    meses = gerar_lista_meses(dt_min.strftime("%d/%m/%Y"), dt_max.strftime("%d/%m/%Y"))
+    meses_ferias_idx = [meses.index(m) for m in parametros.meses_ferias if m in meses]
+    return meses, meses_ferias_idx
+
+
+def selecionar_motores(parametros: ParametrosOtimizacao, meses: List[str]) -> Tuple[Callable, Callable]:
+    """
+    Funções de otimização do Estágio 1 e do Estágio 2 conforme o motor e os modos configurados.
+    Avisa quando um modo configurado fica sem efeito por causa de outro que tem precedência.
+    """
+    alternativos = parametros.num_cronogramas_alternativos > 1
+    if parametros.motor_otimizacao == 'heuristico':
+        if alternativos:
+            _avisar_alternativos_ignorados("o motor heurístico")
+        from .core import modo_rapido
+        return modo_rapido.otimizar_curva_demanda_rapida, modo_rapido.otimizar_atribuicao_rapida
+    from .core import stage_1, stage_2, decomposicao, geracao_colunas, horizonte_rolante
+    if parametros.horizonte_rolante_meses and len(meses) > parametros.horizonte_rolante_meses:
+        if parametros.decomposicao_por_habilidade:
+            print(f"[AVISO] Horizonte rolante ativo ({len(meses)} meses > {parametros.horizonte_rolante_meses}): "
+                  "a decomposição por habilidade é ignorada.")
+        if alternativos:
+            _avisar_alternativos_ignorados("o horizonte rolante")
+        otimizar_estagio1 = horizonte_rolante.otimizar_curva_demanda_rolante
+        otimizar_estagio2 = horizonte_rolante.otimizar_atribuicao_rolante
+    elif parametros.decomposicao_por_habilidade:
+        if alternativos:
+            _avisar_alternativos_ignorados("a decomposição por habilidade")
+        otimizar_estagio1 = decomposicao.otimizar_curva_demanda_decomposta
+        otimizar_estagio2 = decomposicao.otimizar_atribuicao_decomposta
+    else:
+        otimizar_estagio1 = stage_1.otimizar_curva_demanda
+        otimizar_estagio2 = stage_2.otimizar_atribuicao_e_carga
+    if parametros.motor_otimizacao == 'geracao_colunas':
+        # O Estágio 1 segue o caminho CP-SAT; só a alocação usa padrões de trabalho
+        otimizar_estagio2 = geracao_colunas.otimizar_atribuicao_geracao_colunas
+    return otimizar_estagio1, otimizar_estagio2
+
+
+def _avisar_alternativos_ignorados(modo: str):
+    print(f"[AVISO] Cronogramas alternativos só são avaliados com o Estágio 1 CP-SAT completo; "
+          f"com {modo}, num_cronogramas_alternativos é ignorado.")
+
+
+def otimizar_estagios(parametros: ParametrosOtimizacao, projetos_modelo: List[Projeto], meses: List[str],
+                      meses_ferias_idx: List[int],
+                      receptor: Optional[Callable[[Dict], None]] = None) -> Tuple[Optional[Dict], Optional[Dict]]:
+    """
+    Executa os dois estágios com o motor configurado. Retorna (resultado do Estágio 1, resultado do
+    Estágio 2); o resultado de um estágio que falhou (e dos seguintes) é None.
+    """
+    from .core import stage_1, cronogramas_alternativos
+    otimizar_estagio1, otimizar_estagio2 = selecionar_motores(parametros, meses)
+
+    with medir_fase("estagio_1"):
+        resultados_estagio1 = otimizar_estagio1(projetos_modelo, meses, parametros, ao_melhorar=receptor)
+    if not resultados_estagio1:
+        return None, None
+
+    with medir_fase("estagio_2"):
+        if parametros.num_cronogramas_alternativos > 1 and otimizar_estagio1 is stage_1.otimizar_curva_demanda:
+            resultados_estagio1, resultados_estagio2 = cronogramas_alternativos.avaliar_cronogramas_alternativos(
+                projetos_modelo, meses, meses_ferias_idx, parametros, resultados_estagio1, otimizar_estagio2,
+                ao_melhorar=receptor
+            )
+        else:
+            resultados_estagio2 = otimizar_estagio2(
+                resultados_estagio1['cronograma'], projetos_modelo, meses, meses_ferias_idx, parametros,
+                ao_melhorar=receptor
+            )
+    if not resultados_estagio2 or resultados_estagio2["status"] == "falha":
+        return resultados_estagio1, None
+    return resultados_estagio1, resultados_estagio2
+
+
+def gerar_relatorios(projetos_config: List[ConfiguracaoProjeto], parametros: ParametrosOtimizacao,
+                     meses: List[str], meses_ferias_idx: List[int], resultados_estagio1: Dict,
+                     resultados_estagio2: Dict, diretorio_saida: Path = Path('.'),
+                     gerar_pdf: bool = True, qualidade_graficos: str = "impressao",
+                     formato_graficos: str = "png", planilhas_separadas: bool = False) -> Optional[Path]:
+    """
+    Pós-processa os resultados (renumeração dos instrutores, distribuição por projeto e fluxo de
+    caixa) e gera as planilhas (numa única pasta de trabalho ou, com `planilhas_separadas`, em um
+    arquivo cada) e, com `gerar_pdf`, o relatório PDF em `diretorio_saida`. Os gráficos vão
+    da memória direto para o PDF, na resolução de `qualidade_graficos` e no formato de
+    `formato_graficos`. Retorna o caminho do PDF (None sem PDF).
+    """
+    from .utils import (renumerar_instrutores_ativos, analisar_distribuicao_instrutores_por_projeto,
+                        calcular_fluxo_caixa_por_projeto)
+    from .reporting import spreadsheets
+    diretorio_saida = Path(diretorio_saida)
+    diretorio_saida.mkdir(parents=True, exist_ok=True)
+
+    with medir_fase("pos_processamento"):
+        resultados_estagio2['atribuicoes'], contagem_instrutores_hab = renumerar_instrutores_ativos(
+            resultados_estagio2['atribuicoes'])
+
+        distribuicao_por_projeto = analisar_distribuicao_instrutores_por_projeto(
+            resultados_estagio2['atribuicoes'])
+
+        indice = resultados_estagio2['indice_incidencia']
+
+        # Calcular fluxo de caixa
+        fluxo_caixa = calcular_fluxo_caixa_por_projeto(
+            resultados_estagio2['atribuicoes'],
+            meses,
+            meses_ferias_idx,
+            parametros.remuneracao_instrutor,
+            indice
+        )
+
+    print("\n" + "=" * 80 + "\nGERANDO VISUALIZAÇÕES E RELATÓRIOS\n" + "=" * 80)
+
+    with medir_fase("planilhas"):
+        df_consolidada_instrutor, df_fluxo_caixa = spreadsheets.gerar_planilhas(
+            resultados_estagio2['atribuicoes'], meses, meses_ferias_idx, fluxo_caixa, indice, diretorio_saida,
+            arquivo_unico=not planilhas_separadas)
+
+    if not gerar_pdf:
+        return None
+    from .reporting import plotting, pdf_generator
+
+    with medir_fase("graficos"):
+        graficos, serie_temporal_df = plotting.gerar_graficos(
+            resultados_estagio2['turmas'], resultados_estagio2['atribuicoes'], fluxo_caixa, meses,
+            meses_ferias_idx, indice, qualidade_graficos, formato_graficos)
+
+    with medir_fase("pdf"):
+        caminho_pdf = pdf_generator.gerar_relatorio_pdf(
+            projetos_config,
+            resultados_estagio1,
+            resultados_estagio2,
+            graficos,
+            serie_temporal_df,
+            df_consolidada_instrutor,
+            contagem_instrutores_hab,
+            distribuicao_por_projeto,
+            df_fluxo_caixa,
+            diretorio_saida
+        )
+    return caminho_pdf
@@ -1,11 +1,11 @@
 # ARQUIVO: otimizador/reporting/pdf_generator.py
 
-import os
+import io
 from pathlib import Path
 from fpdf import FPDF
 from fpdf.enums import XPos, YPos
 import pandas as pd
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 # Import relativo
 from ..data_models import ConfiguracaoProjeto
@@ -62,11 +62,11 @@ class PDF(FPDF):
             self.multi_cell(0, 5, interpretation)
         self.ln(5)
 
-    def add_image_section(self, title: str, image_path: str):
-        if not image_path or not os.path.exists(image_path): return
+    def add_image_section(self, title: str, imagem: Optional[io.BytesIO]):
+        if imagem is None: return
         self.add_page()
         self.chapter_title(title)
-        self.image(image_path, x=10, w=self.w - 20)
+        self.image(imagem, x=10, w=self.w - 20)
         self.ln(5)
 
     def add_table_from_dataframe(self, df: pd.DataFrame, title: str, max_rows: int = 25):
@@ -95,13 +95,14 @@ class PDF(FPDF):
 def gerar_relatorio_pdf(projetos_config: List[ConfiguracaoProjeto],
                         resultados_estagio1: Dict,
                         resultados_estagio2: Dict,
-                        graficos_paths: Dict,
+                        graficos: Dict[str, io.BytesIO],
                         serie_temporal_df: pd.DataFrame,
                         df_consolidada_instrutor: pd.DataFrame,
                         contagem_instrutores_hab: Dict[str, int],
                         distribuicao_por_projeto: Dict[str, Dict[str, int]],
-                        df_fluxo_caixa: pd.DataFrame):
-    """Gera o relatório executivo final em PDF."""
+                        df_fluxo_caixa: pd.DataFrame,
+                        diretorio_saida: Path = Path('.')) -> Path:
+    """Gera o relatório executivo final em PDF em `diretorio_saida`."""
     print("\n--- Gerando Relatório Executivo PDF ---")
     pdf = PDF('P', 'mm', 'A4')
     pdf.add_page()
@@ -154,6 +155,27 @@ def gerar_relatorio_pdf(projetos_config: List[ConfiguracaoProjeto],
     )
     pdf.chapter_body(premissas_body)
 
+    diagnostico_hint = resultados_estagio2.get('diagnostico_hint')
+    tempo_primeira = resultados_estagio2.get('tempo_primeira_solucao')
+    gap = resultados_estagio2.get('gap_limite_inferior')
+    if diagnostico_hint or tempo_primeira is not None or gap is not None:
+        linhas_solver = []
+        if gap is not None:
+            motor = ("Geração de colunas" if params.motor_otimizacao == 'geracao_colunas'
+                     else "Modo rápido (heurístico, sem solver)")
+            linhas_solver.append(f"{bullet} {motor}: custo no máximo {gap:.1%} "
+                                 f"acima do ótimo (comparado ao limite inferior de custo)")
+        if diagnostico_hint:
+            custo_hint = f"R$ {diagnostico_hint['custo_hint'] or 0:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+            linhas_solver.append(
+                f"{bullet} Solução inicial heurística (hint): {'aceita' if diagnostico_hint['hint_aceito'] else 'não aceita'}"
+                f" pelo solver | Custo heurístico: {custo_hint} | Gerada em {diagnostico_hint['tempo_heuristica']:.3f} s")
+        if tempo_primeira is not None:
+            linhas_solver.append(f"{bullet} Tempo até a primeira solução do Estágio 2: {tempo_primeira:.2f} s")
+        pdf.set_font(pdf.font_family, 'B', 10)
+        pdf.cell(0, 6, "Diagnóstico do Solver:", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.chapter_body("\n".join(linhas_solver))
+
     # 3. CONFIGURAÇÃO DOS PROJETOS
     pdf.chapter_title('3. Configuração dos Projetos Analisados')
     for proj in projetos_config:
@@ -178,21 +200,33 @@ def gerar_relatorio_pdf(projetos_config: List[ConfiguracaoProjeto],
 
     # 4. ANÁLISE GRÁFICA
     pdf.add_image_section("4.1. Carga Total por Instrutor e Balanceamento (Spread)",
-                          graficos_paths.get('carga_instrutor'))
+                          graficos.get('carga_instrutor'))
     pdf.add_image_section("4.2. Demanda Mensal por Habilidade (Programação vs. Robótica)",
-                          graficos_paths.get('prog_rob'))
-    pdf.add_image_section("4.3. Demanda Consolidada por Projeto ao Longo do Tempo", graficos_paths.get('projeto_mes'))
+                          graficos.get('prog_rob'))
+    pdf.add_image_section("4.3. Demanda Consolidada por Projeto ao Longo do Tempo", graficos.get('projeto_mes'))
     pdf.add_image_section("4.4. Alocação Detalhada de Turmas por Instrutor e Projeto",
-                          graficos_paths.get('instrutor_projeto'))
+                          graficos.get('instrutor_projeto'))
     pdf.add_image_section("4.5. Fluxo de Caixa Mensal por Projeto",
-                          graficos_paths.get('fluxo_caixa'))
+                          graficos.get('fluxo_caixa'))
 
     # 5. APÊNDICE
     pdf.add_table_from_dataframe(serie_temporal_df, title="Apêndice A: Série Temporal da Demanda Mensal")
     pdf.add_table_from_dataframe(df_consolidada_instrutor, title="Apêndice B: Tabela Consolidada - Instrutor x Projeto")
     pdf.add_table_from_dataframe(df_fluxo_caixa, title="Apêndice C: Fluxo de Caixa Mensal por Projeto")
-
-    pdf_filename = 'Relatorio_Otimizacao_Custo.pdf'
-    pdf.output(pdf_filename)
+    comparacao = resultados_estagio2.get('comparacao_cronogramas')
+    if comparacao:
+        df_comparacao = pd.DataFrame([{
+            'Cronograma': f"{linha['candidato']}{' (escolhido)' if linha['escolhido'] else ''}",
+            'Pico PROG': linha['pico_prog'],
+            'Pico ROB': linha['pico_rob'],
+            'Custo Total': (f"R$ {linha['custo_total_previsto']:,.2f}".replace(',', 'X').replace('.', ',')
+                            .replace('X', '.') if linha['custo_total_previsto'] is not None else '-'),
+            'Instrutores': linha['total_instrutores_flex'] if linha['total_instrutores_flex'] is not None else '-',
+            'Spread': linha['spread_carga'] if linha['spread_carga'] is not None else '-',
+        } for linha in comparacao])
+        pdf.add_table_from_dataframe(df_comparacao, title="Apêndice D: Comparação dos Cronogramas Candidatos")
+
+    pdf_filename = Path(diretorio_saida) / 'Relatorio_Otimizacao_Custo.pdf'
+    pdf.output(str(pdf_filename))
     print(f"\n[✓] Relatório Executivo de Custo gerado com sucesso: {pdf_filename}")
     return pdf_filename
\ No newline at end of file
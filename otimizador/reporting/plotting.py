@@ -1,28 +1,51 @@
 # ARQUIVO: otimizador/reporting/plotting.py
 
-import matplotlib.pyplot as plt
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
 import matplotlib.patches as mpatches
+from matplotlib.artist import setp
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter
 from collections import defaultdict
 import pandas as pd
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 
 # Import relativo
-from ..data_models import Turma
+from ..data_models import Turma, IndiceIncidencia, QUALIDADES_GRAFICO, FORMATOS_GRAFICO
 
+# O PDF imprime as figuras (16 polegadas de largura) em 190 mm (A4 menos as margens); a figura é
+# rasterizada já na resolução que dá a qualidade pedida na página, sem pixels que o PDF descartaria
+LARGURA_FIGURA_POL = 16
+LARGURA_IMPRESSA_POL = 190 / 25.4
 
-def gerar_grafico_turmas_projeto_mes(turmas: List[Turma], meses: List[str], meses_ferias: List[int]) -> str:
+
+def dpi_para_qualidade(qualidade: str) -> int:
+    """Resolução de rasterização da figura que resulta na qualidade pedida na página."""
+    return round(QUALIDADES_GRAFICO[qualidade] * LARGURA_IMPRESSA_POL / LARGURA_FIGURA_POL)
+
+
+DPI_IMPRESSAO = dpi_para_qualidade("impressao")
+QUALIDADE_JPEG = 85
+
+
+def gerar_grafico_turmas_projeto_mes(turmas: List[Turma], meses: List[str], meses_ferias: List[int],
+                                     indice: Optional[IndiceIncidencia] = None, dpi: int = DPI_IMPRESSAO,
+                                     formato: str = "png") -> io.BytesIO:
     """Gera gráfico de turmas ativas por projeto e mês."""
-    from ..utils import calcular_meses_ativos
+    from ..utils import construir_indice_incidencia
+    if indice is None:
+        indice = construir_indice_incidencia(turmas, meses_ferias, len(meses))
 
     projetos = sorted(list(set(t.projeto for t in turmas)))
     dados = {proj: [0] * len(meses) for proj in projetos}
 
     for t in turmas:
-        meses_ativos = calcular_meses_ativos(t.mes_inicio, t.duracao, meses_ferias, len(meses))
-        for m in meses_ativos:
+        for m in indice.meses_ativos(t):
             dados[t.projeto][m] += 1
 
-    fig, ax = plt.subplots(figsize=(16, 8))
+    fig = Figure(figsize=(16, 8))
+    ax = fig.subplots()
     bottom = [0] * len(meses)
 
     for proj in projetos:
@@ -39,18 +62,17 @@ def gerar_grafico_turmas_projeto_mes(turmas: List[Turma], meses: List[str], mese
     ax.legend(loc='upper left', framealpha=0.9)
     ax.grid(True, alpha=0.3, axis='y')
 
-    plt.xticks(rotation=45, ha='right')
-    plt.tight_layout()
+    setp(ax.get_xticklabels(), rotation=45, ha='right')
+    fig.tight_layout()
 
-    filepath = 'grafico_turmas_projeto_mes.png'
-    plt.savefig(filepath, dpi=300, bbox_inches='tight')
-    plt.close()
+    imagem = _salvar_figura(fig, dpi, formato)
 
-    print(f"[✓] Gráfico de turmas por projeto/mês gerado: {filepath}")
-    return filepath
+    print("[✓] Gráfico de turmas por projeto/mês gerado")
+    return imagem
 
 
-def gerar_grafico_turmas_instrutor_tipologia_projeto(atribuicoes: List[Dict]) -> str:
+def gerar_grafico_turmas_instrutor_tipologia_projeto(atribuicoes: List[Dict], dpi: int = DPI_IMPRESSAO,
+                                                     formato: str = "png") -> io.BytesIO:
     """Gera gráfico de turmas por instrutor, habilidade e projeto."""
     dados = defaultdict(lambda: defaultdict(int))
 
@@ -62,7 +84,8 @@ def gerar_grafico_turmas_instrutor_tipologia_projeto(atribuicoes: List[Dict]) ->
     instrutores = sorted(dados.keys(), key=lambda x: (x.split('_')[0], int(x.split('_')[1])))
     projetos = sorted(list(set(proj for inst_data in dados.values() for proj in inst_data.keys())))
 
-    fig, ax = plt.subplots(figsize=(16, 10))
+    fig = Figure(figsize=(16, 10))
+    ax = fig.subplots()
     bar_width = 0.8
     bottom = [0] * len(instrutores)
 
@@ -77,17 +100,16 @@ def gerar_grafico_turmas_instrutor_tipologia_projeto(atribuicoes: List[Dict]) ->
     ax.legend(loc='upper right', framealpha=0.9)
     ax.grid(True, alpha=0.3, axis='x')
 
-    plt.tight_layout()
+    fig.tight_layout()
 
-    filepath = 'grafico_turmas_instrutor_projeto.png'
-    plt.savefig(filepath, dpi=300, bbox_inches='tight')
-    plt.close()
+    imagem = _salvar_figura(fig, dpi, formato)
 
-    print(f"[✓] Gráfico de turmas por instrutor/projeto gerado: {filepath}")
-    return filepath
+    print("[✓] Gráfico de turmas por instrutor/projeto gerado")
+    return imagem
 
 
-def gerar_grafico_carga_por_instrutor(atribuicoes: List[Dict]) -> str:
+def gerar_grafico_carga_por_instrutor(atribuicoes: List[Dict], dpi: int = DPI_IMPRESSAO,
+                                      formato: str = "png") -> io.BytesIO:
     """Gera gráfico de carga total por instrutor."""
     carga_por_instrutor = defaultdict(int)
 
@@ -99,7 +121,8 @@ def gerar_grafico_carga_por_instrutor(atribuicoes: List[Dict]) -> str:
 
     cores = ['#2ecc71' if inst.startswith('PROG') else '#e74c3c' for inst in instrutores]
 
-    fig, ax = plt.subplots(figsize=(16, 8))
+    fig = Figure(figsize=(16, 8))
+    ax = fig.subplots()
     bars = ax.bar(instrutores, cargas, color=cores, alpha=0.8, edgecolor='black', linewidth=0.5)
 
     if cargas:
@@ -120,34 +143,35 @@ def gerar_grafico_carga_por_instrutor(atribuicoes: List[Dict]) -> str:
     ax.legend(handles=handles, loc='upper left', framealpha=0.9)
 
     ax.grid(True, alpha=0.3, axis='y')
-    plt.xticks(rotation=90, ha='right')
-    plt.tight_layout()
+    setp(ax.get_xticklabels(), rotation=90, ha='right')
+    fig.tight_layout()
 
-    filepath = 'grafico_carga_instrutor.png'
-    plt.savefig(filepath, dpi=300, bbox_inches='tight')
-    plt.close()
+    imagem = _salvar_figura(fig, dpi, formato)
 
-    print(f"[✓] Gráfico de carga por instrutor gerado: {filepath}")
-    return filepath
+    print("[✓] Gráfico de carga por instrutor gerado")
+    return imagem
 
 
-def gerar_grafico_demanda_prog_rob(turmas: List[Turma], meses: List[str], meses_ferias: List[int]) -> Tuple[
-    str, pd.DataFrame]:
+def gerar_grafico_demanda_prog_rob(turmas: List[Turma], meses: List[str], meses_ferias: List[int],
+                                   indice: Optional[IndiceIncidencia] = None, dpi: int = DPI_IMPRESSAO,
+                                   formato: str = "png") -> Tuple[io.BytesIO, pd.DataFrame]:
     """Gera gráfico de demanda mensal por habilidade."""
-    from ..utils import calcular_meses_ativos
+    from ..utils import construir_indice_incidencia
+    if indice is None:
+        indice = construir_indice_incidencia(turmas, meses_ferias, len(meses))
 
     dados_prog = [0] * len(meses)
     dados_rob = [0] * len(meses)
 
     for t in turmas:
-        meses_ativos = calcular_meses_ativos(t.mes_inicio, t.duracao, meses_ferias, len(meses))
-        for m in meses_ativos:
+        for m in indice.meses_ativos(t):
             if t.habilidade == 'PROG':
                 dados_prog[m] += 1
             else:
                 dados_rob[m] += 1
 
-    fig, ax = plt.subplots(figsize=(16, 8))
+    fig = Figure(figsize=(16, 8))
+    ax = fig.subplots()
 
     ax.plot(meses, dados_prog, marker='o', linewidth=2, markersize=8, label='Programação', color='#3498db')
     ax.plot(meses, dados_rob, marker='s', linewidth=2, markersize=8, label='Robótica', color='#e74c3c')
@@ -163,22 +187,21 @@ def gerar_grafico_demanda_prog_rob(turmas: List[Turma], meses: List[str], meses_
     ax.legend(loc='upper left', framealpha=0.9)
     ax.grid(True, alpha=0.3)
 
-    plt.xticks(rotation=45, ha='right')
-    plt.tight_layout()
+    setp(ax.get_xticklabels(), rotation=45, ha='right')
+    fig.tight_layout()
 
-    filepath = 'grafico_demanda_prog_rob.png'
-    plt.savefig(filepath, dpi=300, bbox_inches='tight')
-    plt.close()
+    imagem = _salvar_figura(fig, dpi, formato)
 
     df = pd.DataFrame({'Mês': meses, 'Programação': dados_prog, 'Robótica': dados_rob,
                        'Total': [dados_prog[i] + dados_rob[i] for i in range(len(meses))]})
 
-    print(f"[✓] Gráfico de demanda PROG/ROB gerado: {filepath}")
-    return filepath, df
+    print("[✓] Gráfico de demanda PROG/ROB gerado")
+    return imagem, df
 
 
 def gerar_grafico_fluxo_caixa(fluxo_caixa: Dict[str, Dict[str, float]],
-                              meses: List[str]) -> str:
+                              meses: List[str], dpi: int = DPI_IMPRESSAO,
+                              formato: str = "png") -> io.BytesIO:
     """
     Gera gráfico de área empilhada do fluxo de caixa por projeto.
     """
@@ -196,7 +219,8 @@ def gerar_grafico_fluxo_caixa(fluxo_caixa: Dict[str, Dict[str, float]],
         dados_grafico.append(custos_mensais)
 
     # Criar gráfico
-    fig, ax = plt.subplots(figsize=(16, 8))
+    fig = Figure(figsize=(16, 8))
+    ax = fig.subplots()
 
     # Gráfico de área empilhada
     ax.stackplot(meses, *dados_grafico, labels=projetos, alpha=0.8)
@@ -220,16 +244,65 @@ def gerar_grafico_fluxo_caixa(fluxo_caixa: Dict[str, Dict[str, float]],
             return f'R$ {value / 1000:.0f}k'
         return f'R$ {value:.0f}'
 
-    ax.yaxis.set_major_formatter(plt.FuncFormatter(format_func))
+    ax.yaxis.set_major_formatter(FuncFormatter(format_func))
 
     # Rotacionar labels do eixo X
-    plt.xticks(rotation=45, ha='right')
+    setp(ax.get_xticklabels(), rotation=45, ha='right')
+
+    fig.tight_layout()
 
-    plt.tight_layout()
+    imagem = _salvar_figura(fig, dpi, formato)
 
-    filepath = 'grafico_fluxo_caixa.png'
-    plt.savefig(filepath, dpi=300, bbox_inches='tight')
-    plt.close()
+    print("[✓] Gráfico de fluxo de caixa gerado")
+    return imagem
 
-    print(f"[✓] Gráfico de fluxo de caixa gerado: {filepath}")
-    return filepath
\ No newline at end of file
+
+def _salvar_figura(fig: Figure, dpi: int, formato: str) -> io.BytesIO:
+    """Grava a figura em um buffer em memória no formato pedido, pronto para o FPDF."""
+    buffer = io.BytesIO()
+    opcoes = {}
+    if formato == "jpeg":
+        opcoes['pil_kwargs'] = {'quality': QUALIDADE_JPEG, 'optimize': True}
+    elif formato == "svg":
+        # Sem o bloco <metadata>, que o FPDF não interpreta
+        opcoes['metadata'] = {'Creator': None, 'Date': None, 'Format': None, 'Type': None}
+    fig.savefig(buffer, format=formato, dpi=dpi, bbox_inches='tight', **opcoes)
+    buffer.seek(0)
+    return buffer
+
+
+def gerar_graficos(turmas: List[Turma], atribuicoes: List[Dict], fluxo_caixa: Dict[str, Dict[str, float]],
+                   meses: List[str], meses_ferias: List[int], indice: Optional[IndiceIncidencia] = None,
+                   qualidade: str = "impressao",
+                   formato: str = "png") -> Tuple[Dict[str, io.BytesIO], pd.DataFrame]:
+    """
+    Gera os cinco gráficos do relatório, cada um em um processo (as figuras não compartilham estado
+    do pyplot), como buffers em memória. `qualidade` escolhe a resolução em QUALIDADES_GRAFICO (sem
+    efeito em SVG) e `formato` um de FORMATOS_GRAFICO. Retorna os buffers por gráfico e a série
+    temporal de demanda PROG/ROB usada no PDF.
+    """
+    if qualidade not in QUALIDADES_GRAFICO:
+        raise ValueError(f"Qualidade dos gráficos deve ser uma de: {', '.join(QUALIDADES_GRAFICO)}.")
+    if formato not in FORMATOS_GRAFICO:
+        raise ValueError(f"Formato dos gráficos deve ser um de: {', '.join(FORMATOS_GRAFICO)}.")
+    dpi = dpi_para_qualidade(qualidade)
+    if indice is None:
+        from ..utils import construir_indice_incidencia
+        indice = construir_indice_incidencia(turmas, meses_ferias, len(meses))
+    tarefas = {
+        'projeto_mes': (gerar_grafico_turmas_projeto_mes, (turmas, meses, meses_ferias, indice, dpi, formato)),
+        'instrutor_projeto': (gerar_grafico_turmas_instrutor_tipologia_projeto, (atribuicoes, dpi, formato)),
+        'carga_instrutor': (gerar_grafico_carga_por_instrutor, (atribuicoes, dpi, formato)),
+        'fluxo_caixa': (gerar_grafico_fluxo_caixa, (fluxo_caixa, meses, dpi, formato)),
+        'prog_rob': (gerar_grafico_demanda_prog_rob, (turmas, meses, meses_ferias, indice, dpi, formato)),
+    }
+    num_processos = min(len(tarefas), os.cpu_count() or 1)
+    if num_processos > 1:
+        with ProcessPoolExecutor(max_workers=num_processos) as executor:
+            futuros = {nome: executor.submit(funcao, *args) for nome, (funcao, args) in tarefas.items()}
+            graficos = {nome: futuro.result() for nome, futuro in futuros.items()}
+    else:
+        # Com um único núcleo o pool só acrescentaria a criação do processo
+        graficos = {nome: funcao(*args) for nome, (funcao, args) in tarefas.items()}
+    graficos['prog_rob'], serie_temporal_df = graficos['prog_rob']
+    return graficos, serie_temporal_df
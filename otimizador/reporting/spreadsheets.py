@@ -1,98 +1,194 @@
 # ARQUIVO: otimizador/reporting/spreadsheets.py
 
 import pandas as pd
+import xlsxwriter
 from collections import defaultdict
-from typing import List, Dict
-
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Optional, Iterable, Sequence, Tuple
+
+from ..data_models import IndiceIncidencia
+
+# Pasta de trabalho única com uma aba por planilha (padrão)
+ARQUIVO_PLANILHAS = 'Planilhas_Otimizacao.xlsx'
+ABA_CONSOLIDADA = 'Instrutor x Projeto'
+ABA_DETALHADA = 'Atribuições Detalhadas'
+ABA_FLUXO_CAIXA = 'Fluxo de Caixa'
+# Arquivo de cada aba quando as planilhas são gravadas separadas
+ARQUIVOS_SEPARADOS = {
+    ABA_CONSOLIDADA: 'Planilha_Consolidada_Instrutor_Projeto.xlsx',
+    ABA_DETALHADA: 'Planilha_Detalhada_Atribuicoes.xlsx',
+    ABA_FLUXO_CAIXA: 'Planilha_Fluxo_Caixa.xlsx',
+}
+
+# Tipos de coluna: formato numérico do Excel, largura e método de gravação da célula
+FORMATOS_COLUNA = {
+    'texto': (None, 18, 'write_string'),
+    'inteiro': ('0', 10, 'write_number'),
+    'moeda': ('"R$" #,##0.00', 15, 'write_number'),
+    'mes': ('mmm/yy', 10, 'write_datetime'),
+}
+_NOMES_MESES = ['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun', 'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
+
+
+def data_do_mes(mes: str) -> datetime:
+    """Primeiro dia do mês no formato de gerar_lista_meses ('Jan/26'), gravado como data na planilha."""
+    nome, ano = mes.split('/')
+    return datetime(2000 + int(ano), _NOMES_MESES.index(nome) + 1, 1)
+
+
+class EscritorPlanilhas:
+    """
+    Grava as planilhas com o xlsxwriter em modo de memória constante: cada linha vai para o disco
+    quando a seguinte começa, então a memória não cresce com o número de atribuições. Com
+    `arquivo_unico`, todas as abas ficam em ARQUIVO_PLANILHAS (gravado ao fechar); sem ele, cada aba
+    vai para o seu arquivo em ARQUIVOS_SEPARADOS, fechado logo após a aba.
+    """
 
-def gerar_planilha_consolidada_instrutor(atribuicoes: List[Dict]) -> pd.DataFrame:
+    def __init__(self, diretorio_saida: Path = Path('.'), arquivo_unico: bool = True):
+        self.diretorio_saida = Path(diretorio_saida)
+        self.arquivo_unico = arquivo_unico
+        self._pasta = None
+        self._formatos: Dict[str, Optional[object]] = {}
+
+    def __enter__(self) -> 'EscritorPlanilhas':
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
+
+    def _abrir_pasta(self, caminho: Path):
+        # Textos gravados como estão: sem procurar fórmulas ou URLs em cada célula
+        self._pasta = xlsxwriter.Workbook(str(caminho), {'constant_memory': True, 'strings_to_formulas': False,
+                                                         'strings_to_urls': False})
+        self._formatos = {tipo: self._pasta.add_format({'num_format': formato}) if formato else None
+                          for tipo, (formato, _, _) in FORMATOS_COLUNA.items()}
+        self._formatos['cabecalho'] = self._pasta.add_format({'bold': True, 'bottom': 1})
+
+    def escrever_aba(self, nome_aba: str, cabecalhos: Sequence[str], tipos: Sequence[str],
+                     linhas: Iterable[Sequence]) -> Path:
+        """
+        Grava uma aba consumindo `linhas` uma a uma (pode ser um gerador). `tipos` dá o tipo de cada
+        coluna (chave de FORMATOS_COLUNA); as datas da coluna 'mes' são datetime. Retorna o arquivo da aba.
+        """
+        if len(tipos) != len(cabecalhos):
+            raise ValueError("Informe um tipo para cada coluna.")
+        if self.arquivo_unico:
+            caminho = self.diretorio_saida / ARQUIVO_PLANILHAS
+            if self._pasta is None:
+                self._abrir_pasta(caminho)
+        else:
+            caminho = self.diretorio_saida / ARQUIVOS_SEPARADOS[nome_aba]
+            self._abrir_pasta(caminho)
+
+        aba = self._pasta.add_worksheet(nome_aba)
+        # Formatos por coluna valem para as células gravadas sem formato próprio
+        gravadores = []
+        for coluna, tipo in enumerate(tipos):
+            _, largura, metodo = FORMATOS_COLUNA[tipo]
+            aba.set_column(coluna, coluna, max(largura, len(cabecalhos[coluna]) + 2), self._formatos[tipo])
+            gravadores.append(getattr(aba, metodo))
+        aba.write_row(0, 0, cabecalhos, self._formatos['cabecalho'])
+        aba.freeze_panes(1, 0)
+        # Método de cada tipo chamado direto, sem o despacho genérico de write_row por valor
+        numero_linha = 0
+        for numero_linha, linha in enumerate(linhas, start=1):
+            for coluna, (gravar, valor) in enumerate(zip(gravadores, linha)):
+                gravar(numero_linha, coluna, valor)
+        aba.autofilter(0, 0, numero_linha, len(cabecalhos) - 1)
+
+        if not self.arquivo_unico:
+            self.fechar()
+        return caminho
+
+    def fechar(self):
+        """Conclui a pasta de trabalho aberta, se houver."""
+        if self._pasta is not None:
+            self._pasta.close()
+            self._pasta = None
+
+
+def gerar_planilha_consolidada_instrutor(atribuicoes: List[Dict], escritor: EscritorPlanilhas) -> pd.DataFrame:
     """Gera planilha consolidada de turmas por instrutor e projeto."""
     dados = defaultdict(lambda: defaultdict(int))
+    habilidades = {}
 
     for atr in atribuicoes:
         instrutor_id = atr['instrutor'].id
-        habilidade = atr['instrutor'].habilidade
-        projeto = atr['turma'].projeto
-        dados[instrutor_id]['Habilidade'] = habilidade
-        dados[instrutor_id][projeto] = dados[instrutor_id].get(projeto, 0) + 1
-
-    linhas = []
-    for instrutor_id, proj_dict in sorted(dados.items(), key=lambda x: (x[1]['Habilidade'], int(x[0].split('_')[1]))):
-        linha = {'Instrutor': instrutor_id, 'Habilidade': proj_dict.pop('Habilidade')}
-        linha.update(proj_dict)
-        linha['Total'] = sum(v for k, v in proj_dict.items() if k != 'Habilidade')
-        linhas.append(linha)
-
-    df = pd.DataFrame(linhas).fillna(0)
-    filename = 'Planilha_Consolidada_Instrutor_Projeto.xlsx'
-    df.to_excel(filename, index=False, sheet_name='Instrutor x Projeto')
-    print(f"[✓] Planilha consolidada gerada: {filename}")
-    return df
-
-
-def gerar_planilha_detalhada(atribuicoes: List[Dict], meses: List[str], meses_ferias: List[int]):
-    """Gera planilha detalhada com todas as atribuições."""
-    from ..utils import calcular_meses_ativos
-
-    linhas = []
-    for atr in atribuicoes:
-        turma = atr['turma']
-        instrutor = atr['instrutor']
-        meses_ativos = calcular_meses_ativos(turma.mes_inicio, turma.duracao, meses_ferias, len(meses))
-        meses_str = ', '.join([meses[m] for m in meses_ativos])
-
-        linhas.append({
-            'Turma_ID': turma.id,
-            'Projeto': turma.projeto,
-            'Habilidade': turma.habilidade,
-            'Instrutor': instrutor.id,
-            'Mês_Início': meses[turma.mes_inicio],
-            'Duração': turma.duracao,
-            'Meses_Ativos': meses_str
-        })
-
-    df = pd.DataFrame(linhas)
-    filename = 'Planilha_Detalhada_Atribuicoes.xlsx'
-    df.to_excel(filename, index=False, sheet_name='Atribuições Detalhadas')
-    print(f"[✓] Planilha detalhada gerada: {filename}")
-
-
-def gerar_planilha_fluxo_caixa(fluxo_caixa: Dict[str, Dict[str, float]],
-                               meses: List[str]) -> pd.DataFrame:
+        habilidades[instrutor_id] = atr['instrutor'].habilidade
+        dados[instrutor_id][atr['turma'].projeto] += 1
+
+    instrutores = sorted(dados, key=lambda i: (habilidades[i], int(i.split('_')[1])))
+    # Projetos na ordem em que aparecem nos instrutores ordenados
+    projetos = list(dict.fromkeys(projeto for i in instrutores for projeto in dados[i]))
+    cabecalhos = ['Instrutor', 'Habilidade', *projetos, 'Total']
+    linhas = [(i, habilidades[i], *(dados[i].get(p, 0) for p in projetos), sum(dados[i].values()))
+              for i in instrutores]
+
+    destino = escritor.escrever_aba(ABA_CONSOLIDADA, cabecalhos,
+                                    ['texto', 'texto', *['inteiro'] * (len(projetos) + 1)], linhas)
+    print(f"[✓] Planilha consolidada gerada: {destino} (aba '{ABA_CONSOLIDADA}')")
+    return pd.DataFrame(linhas, columns=cabecalhos)
+
+
+def gerar_planilha_detalhada(atribuicoes: List[Dict], meses: List[str], meses_ferias: List[int],
+                             escritor: EscritorPlanilhas, indice: Optional[IndiceIncidencia] = None):
+    """Gera planilha detalhada com todas as atribuições, gravadas linha a linha."""
+    from ..utils import construir_indice_incidencia
+    if indice is None:
+        indice = construir_indice_incidencia([atr['turma'] for atr in atribuicoes], meses_ferias, len(meses))
+    datas_meses = [data_do_mes(m) for m in meses]
+
+    def linhas():
+        for atr in atribuicoes:
+            turma = atr['turma']
+            yield (turma.id, turma.projeto, turma.habilidade, atr['instrutor'].id, datas_meses[turma.mes_inicio],
+                   turma.duracao, ', '.join([meses[m] for m in indice.meses_ativos(turma)]))
+
+    destino = escritor.escrever_aba(
+        ABA_DETALHADA,
+        ['Turma_ID', 'Projeto', 'Habilidade', 'Instrutor', 'Mês_Início', 'Duração', 'Meses_Ativos'],
+        ['texto', 'texto', 'texto', 'texto', 'mes', 'inteiro', 'texto'],
+        linhas())
+    print(f"[✓] Planilha detalhada gerada: {destino} (aba '{ABA_DETALHADA}')")
+
+
+def gerar_planilha_fluxo_caixa(fluxo_caixa: Dict[str, Dict[str, float]], meses: List[str],
+                               escritor: EscritorPlanilhas) -> pd.DataFrame:
     """
     Gera planilha com fluxo de caixa mensal por projeto.
     """
     print("\n--- Gerando Planilha de Fluxo de Caixa ---")
 
-    # Criar estrutura de dados
-    dados = []
     projetos = sorted(fluxo_caixa.keys())
-
+    linhas = []
     for projeto in projetos:
-        linha = {'Projeto': projeto}
-        custo_total_projeto = 0.0
-
-        for mes in meses:
-            custo = fluxo_caixa[projeto].get(mes, 0.0)
-            linha[mes] = custo
-            custo_total_projeto += custo
+        custos = [fluxo_caixa[projeto].get(mes, 0.0) for mes in meses]
+        linhas.append((projeto, *custos, sum(custos)))
 
-        linha['TOTAL'] = custo_total_projeto
-        dados.append(linha)
+    # Linha de total geral
+    totais_mes = [sum(fluxo_caixa[proj].get(mes, 0.0) for proj in projetos) for mes in meses]
+    linhas.append(('TOTAL GERAL', *totais_mes, sum(linha[-1] for linha in linhas)))
 
-    # Adicionar linha de total geral
-    linha_total = {'Projeto': 'TOTAL GERAL'}
-    for mes in meses:
-        total_mes = sum(fluxo_caixa[proj].get(mes, 0.0) for proj in projetos)
-        linha_total[mes] = total_mes
-    linha_total['TOTAL'] = sum(linha['TOTAL'] for linha in dados)
-    dados.append(linha_total)
+    cabecalhos = ['Projeto', *meses, 'TOTAL']
+    destino = escritor.escrever_aba(ABA_FLUXO_CAIXA, cabecalhos, ['texto', *['moeda'] * (len(meses) + 1)], linhas)
+    print(f"[✓] Planilha de fluxo de caixa gerada: {destino} (aba '{ABA_FLUXO_CAIXA}')")
 
-    df = pd.DataFrame(dados)
+    return pd.DataFrame(linhas, columns=cabecalhos)
 
-    # Salvar planilha
-    filename = 'Planilha_Fluxo_Caixa.xlsx'
-    df.to_excel(filename, index=False, sheet_name='Fluxo de Caixa')
-    print(f"[✓] Planilha de fluxo de caixa gerada: {filename}")
 
-    return df
\ No newline at end of file
+def gerar_planilhas(atribuicoes: List[Dict], meses: List[str], meses_ferias: List[int],
+                    fluxo_caixa: Dict[str, Dict[str, float]], indice: Optional[IndiceIncidencia] = None,
+                    diretorio_saida: Path = Path('.'),
+                    arquivo_unico: bool = True) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Grava as três planilhas numa única pasta de trabalho (ou, sem `arquivo_unico`, em arquivos
+    separados). Retorna (tabela consolidada instrutor x projeto, fluxo de caixa), usadas no PDF.
+    """
+    with EscritorPlanilhas(diretorio_saida, arquivo_unico) as escritor:
+        df_consolidada_instrutor = gerar_planilha_consolidada_instrutor(atribuicoes, escritor)
+        gerar_planilha_detalhada(atribuicoes, meses, meses_ferias, escritor, indice)
+        df_fluxo_caixa = gerar_planilha_fluxo_caixa(fluxo_caixa, meses, escritor)
+    if arquivo_unico:
+        print(f"[✓] Planilhas gravadas em: {Path(diretorio_saida) / ARQUIVO_PLANILHAS}")
+    return df_consolidada_instrutor, df_fluxo_caixa
@@ -0,0 +1,508 @@
+# ARQUIVO: otimizador/servico.py
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import signal
+import socketserver
+import sys
+import threading
+import time
+import traceback
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing.connection import wait
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+
+DIRETORIO_TRABALHOS = Path("servico_trabalhos")
+PORTA_PADRAO = 8765
+# Intervalo em que o despachante verifica tempos limite; submissões e cancelamentos o acordam na hora
+INTERVALO_DESPACHO_S = 0.5
+
+# Módulos carregados uma única vez pelo forkserver; cada processo de trabalho nasce com eles importados
+MODULOS_PRE_CARREGADOS = ['otimizador.lote', 'otimizador.utils', 'otimizador.core.stage_1',
+                          'otimizador.core.stage_2', 'otimizador.reporting.spreadsheets',
+                          'otimizador.reporting.plotting', 'otimizador.reporting.pdf_generator']
+
+STATUS_FINAIS = ('sucesso', 'spread_relaxado', 'falha_estagio_1', 'falha_estagio_2', 'configuracao_invalida',
+                 'erro', 'cancelado', 'tempo_esgotado')
+
+TIPOS_ARQUIVO = {
+    '.pdf': 'application/pdf',
+    '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    '.json': 'application/json',
+    '.log': 'text/plain; charset=utf-8',
+}
+
+
+@dataclass
+class Trabalho:
+    """Uma execução do pipeline submetida ao serviço e o seu estado na fila."""
+    id: str
+    diretorio: Path
+    opcoes_lote: Dict[str, Any]
+    tempo_limite_s: Optional[float] = None
+    status: str = "na_fila"
+    criado_em: float = field(default_factory=time.time)
+    iniciado_em: Optional[float] = None
+    concluido_em: Optional[float] = None
+    progresso: Dict[str, Dict] = field(default_factory=dict)
+    resultado: Optional[Dict] = None
+    cancelamento_solicitado: bool = False
+
+    def como_dict(self) -> Dict:
+        arquivos = sorted(p.name for p in self.diretorio.iterdir() if p.is_file()) \
+            if self.status in STATUS_FINAIS and self.diretorio.exists() else []
+        return {
+            "id": self.id,
+            "status": self.status,
+            "criado_em": self.criado_em,
+            "iniciado_em": self.iniciado_em,
+            "concluido_em": self.concluido_em,
+            "tempo_limite_s": self.tempo_limite_s,
+            "cancelamento_solicitado": self.cancelamento_solicitado,
+            "progresso": self.progresso,
+            "resultado": self.resultado,
+            "arquivos": [f"/trabalhos/{self.id}/arquivos/{nome}" for nome in arquivos],
+        }
+
+
+@dataclass
+class _Trabalhador:
+    processo: Any
+    conexao: Any
+    trabalho: Optional[Trabalho] = None
+
+
+def _validar_positivo(valor: Any, nome: str, inteiro: bool = False):
+    """Erro (ValueError) se `valor` não for um número positivo (inteiro, com `inteiro`); bool não conta."""
+    tipos = int if inteiro else (int, float)
+    if isinstance(valor, bool) or not isinstance(valor, tipos) or not valor > 0:
+        raise ValueError(f"'{nome}' deve ser um número {'inteiro ' if inteiro else ''}positivo.")
+
+
+def _executar_trabalhador(conexao):
+    """
+    Laço de um processo de trabalho: recebe as opções de um trabalho pela conexão, executa o pipeline
+    em lote com a saída gravada em execucao.log e devolve o progresso e o resultado pela mesma conexão.
+    """
+    from otimizador import lote
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C no terminal encerra o serviço, não o trabalho
+
+    def receptor(evento: Dict):
+        resumo = {k: evento.get(k) for k in ('estagio', 'numero', 'objetivo', 'limite', 'tempo')}
+        conexao.send(("progresso", resumo))
+
+    while True:
+        try:
+            opcoes = conexao.recv()
+        except EOFError:
+            return
+        if opcoes is None:
+            return
+        diretorio = Path(opcoes['diretorio_saida'])
+        # O log do CP-SAT é escrito em C++ direto no descritor 1: os descritores 1 e 2 também apontam
+        # para o log durante o trabalho (com buffer de linha, para não embaralhar as duas escritas)
+        with open(diretorio / 'execucao.log', 'w', encoding='utf-8', buffering=1) as log:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            originais = os.dup(1), os.dup(2)
+            os.dup2(log.fileno(), 1)
+            os.dup2(log.fileno(), 2)
+            try:
+                with contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+                    codigo, resultado = lote.executar_lote(ao_melhorar=receptor, **opcoes)
+            finally:
+                log.flush()
+                for descritor, original in zip((1, 2), originais):
+                    os.dup2(original, descritor)
+                    os.close(original)
+        conexao.send(("concluido", codigo, resultado))
+
+
+def _contexto_processos():
+    """Forkserver com os módulos pesados pré-carregados; spawn onde não há fork (Windows)."""
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        contexto = multiprocessing.get_context('forkserver')
+        contexto.set_forkserver_preload(MODULOS_PRE_CARREGADOS)
+        return contexto
+    return multiprocessing.get_context('spawn')
+
+
+class ServicoOtimizacao:
+    """
+    Fila de trabalhos atendida por um conjunto fixo de processos já aquecidos. Uma única thread de
+    despacho distribui os trabalhos, recebe progresso e resultados e aplica cancelamentos e tempos
+    limite; um trabalho em execução é interrompido encerrando o seu processo, que é substituído.
+    """
+
+    def __init__(self, num_processos: int = 2, diretorio_trabalhos: Path = DIRETORIO_TRABALHOS,
+                 tempo_limite_padrao_s: Optional[float] = None):
+        if num_processos < 1:
+            raise ValueError("O serviço precisa de pelo menos um processo de trabalho.")
+        self.diretorio_trabalhos = Path(diretorio_trabalhos)
+        self.tempo_limite_padrao_s = tempo_limite_padrao_s
+        self._contexto = _contexto_processos()
+        self._trava = threading.Lock()
+        self._trabalhos: Dict[str, Trabalho] = {}
+        self._fila: deque = deque()
+        self._parar = threading.Event()
+        self._despertar_leitura, self._despertar_escrita = multiprocessing.Pipe(duplex=False)
+        self._trabalhadores = [self._iniciar_trabalhador() for _ in range(num_processos)]
+        self._despachante = threading.Thread(target=self._laco_despacho, name="despachante", daemon=True)
+
+    def iniciar(self):
+        self._despachante.start()
+
+    def encerrar(self):
+        """Para o despacho e encerra os processos de trabalho (trabalhos em execução são cancelados)."""
+        self._parar.set()
+        with self._trava:
+            self._despertar()
+        if self._despachante.is_alive():
+            self._despachante.join()
+        with self._trava:
+            for trabalhador in self._trabalhadores:
+                if trabalhador.trabalho is not None:
+                    self._finalizar(trabalhador.trabalho, "cancelado")
+                _encerrar_processo(trabalhador)
+
+    def submeter(self, opcoes_lote: Dict[str, Any], tempo_limite_s: Optional[float] = None,
+                 configuracao: Optional[Dict] = None) -> Trabalho:
+        """
+        Enfileira um trabalho. A configuração vem de `configuracao` (o conteúdo de um arquivo salvo),
+        gravada no diretório do trabalho, ou do caminho em opcoes_lote['caminho_configuracao'].
+        Tempo limite ou timeout inválidos levantam ValueError antes de o trabalho entrar na fila.
+        """
+        from .io import config_manager
+        if tempo_limite_s is not None:
+            _validar_positivo(tempo_limite_s, 'tempo_limite_s')
+        if opcoes_lote.get('timeout_segundos') is not None:
+            _validar_positivo(opcoes_lote['timeout_segundos'], 'timeout_segundos', inteiro=True)
+        identificador = uuid.uuid4().hex[:12]
+        diretorio = self.diretorio_trabalhos / identificador
+        diretorio.mkdir(parents=True)
+        try:
+            if configuracao is not None:
+                caminho = diretorio / 'configuracao.json'
+                with open(caminho, 'w', encoding='utf-8') as f:
+                    json.dump(configuracao, f, indent=2, ensure_ascii=False)
+                opcoes_lote = dict(opcoes_lote, caminho_configuracao=str(caminho))
+            config_manager.ler_configuracao(opcoes_lote['caminho_configuracao'])  # erros voltam ao cliente
+        except Exception:
+            shutil.rmtree(diretorio, ignore_errors=True)
+            raise
+
+        trabalho = Trabalho(identificador, diretorio, dict(opcoes_lote, diretorio_saida=str(diretorio)),
+                            tempo_limite_s if tempo_limite_s is not None else self.tempo_limite_padrao_s)
+        with self._trava:
+            self._trabalhos[identificador] = trabalho
+            self._fila.append(trabalho)
+            self._despertar()
+        return trabalho
+
+    def cancelar(self, identificador: str) -> Optional[Trabalho]:
+        """Cancela um trabalho na fila ou em execução; trabalhos concluídos ficam inalterados."""
+        with self._trava:
+            trabalho = self._trabalhos.get(identificador)
+            if trabalho is None or trabalho.status in STATUS_FINAIS:
+                return trabalho
+            if trabalho.status == "na_fila":
+                self._fila.remove(trabalho)
+                self._finalizar(trabalho, "cancelado")
+            else:
+                trabalho.cancelamento_solicitado = True
+                self._despertar()
+            return trabalho
+
+    def consultar(self, identificador: str) -> Optional[Dict]:
+        with self._trava:
+            trabalho = self._trabalhos.get(identificador)
+            return self._descrever(trabalho) if trabalho is not None else None
+
+    def listar(self) -> List[Dict]:
+        with self._trava:
+            return [self._descrever(t) for t in self._trabalhos.values()]
+
+    def caminho_arquivo(self, identificador: str, nome: str) -> Optional[Path]:
+        """Arquivo gerado por um trabalho concluído, ou None (só nomes do próprio diretório são aceitos)."""
+        with self._trava:
+            trabalho = self._trabalhos.get(identificador)
+        if trabalho is None or trabalho.status not in STATUS_FINAIS:
+            return None
+        caminho = trabalho.diretorio / nome
+        return caminho if caminho.parent == trabalho.diretorio and caminho.is_file() else None
+
+    def estado(self) -> Dict:
+        with self._trava:
+            ocupados = sum(1 for t in self._trabalhadores if t.trabalho is not None)
+            return {"processos": len(self._trabalhadores), "ocupados": ocupados, "na_fila": len(self._fila),
+                    "trabalhos": len(self._trabalhos)}
+
+    def _descrever(self, trabalho: Trabalho) -> Dict:
+        descricao = trabalho.como_dict()
+        if trabalho.status == "na_fila":
+            descricao["posicao_fila"] = self._fila.index(trabalho) + 1
+        return descricao
+
+    def _iniciar_trabalhador(self) -> _Trabalhador:
+        conexao_servico, conexao_trabalhador = self._contexto.Pipe()
+        # Não daemônico: a decomposição e os cronogramas alternativos abrem pools de processos próprios
+        processo = self._contexto.Process(target=_executar_trabalhador, args=(conexao_trabalhador,),
+                                          name="otimizador-trabalhador")
+        processo.start()
+        conexao_trabalhador.close()
+        return _Trabalhador(processo, conexao_servico)
+
+    def _despertar(self):
+        self._despertar_escrita.send(None)
+
+    def _laco_despacho(self):
+        while not self._parar.is_set():
+            # Um erro inesperado numa volta é registrado e o despacho segue: a thread não pode morrer
+            try:
+                self._despachar_uma_vez()
+            except Exception:
+                print(f"[✗] Erro no despacho de trabalhos:\n{traceback.format_exc()}", file=sys.stderr, flush=True)
+                self._parar.wait(INTERVALO_DESPACHO_S)
+
+    def _despachar_uma_vez(self):
+        with self._trava:
+            conexoes = {t.conexao: t for t in self._trabalhadores}
+        for conexao in wait([self._despertar_leitura, *conexoes], timeout=INTERVALO_DESPACHO_S):
+            if conexao is self._despertar_leitura:
+                while conexao.poll():
+                    conexao.recv()
+                continue
+            with self._trava:
+                self._receber(conexoes[conexao])
+        with self._trava:
+            self._aplicar_limites()
+            self._despachar_fila()
+
+    def _receber(self, trabalhador: _Trabalhador):
+        try:
+            mensagem = trabalhador.conexao.recv()
+        except (EOFError, OSError):
+            if trabalhador.trabalho is not None:
+                trabalhador.trabalho.resultado = {"erro": "processo de trabalho encerrado inesperadamente"}
+                self._finalizar(trabalhador.trabalho, "erro")
+            self._substituir(trabalhador)
+            return
+        trabalho = trabalhador.trabalho
+        if trabalho is None:
+            return
+        if mensagem[0] == "progresso":
+            trabalho.progresso[mensagem[1]['estagio']] = mensagem[1]
+        elif mensagem[0] == "concluido":
+            _, _codigo, resultado = mensagem
+            trabalho.resultado = resultado
+            self._finalizar(trabalho, resultado['status'])
+            trabalhador.trabalho = None
+
+    def _aplicar_limites(self):
+        agora = time.time()
+        for trabalhador in list(self._trabalhadores):
+            trabalho = trabalhador.trabalho
+            if trabalho is None:
+                continue
+            try:
+                if trabalho.cancelamento_solicitado:
+                    self._finalizar(trabalho, "cancelado")
+                elif trabalho.tempo_limite_s is not None and agora - trabalho.iniciado_em > trabalho.tempo_limite_s:
+                    self._finalizar(trabalho, "tempo_esgotado")
+                else:
+                    continue
+            except Exception as e:
+                # Trabalho com estado inválido: encerrado com erro sem travar os demais
+                trabalho.resultado = {"erro": f"{type(e).__name__}: {e}"}
+                self._finalizar(trabalho, "erro")
+            self._substituir(trabalhador)
+
+    def _despachar_fila(self):
+        for trabalhador in self._trabalhadores:
+            if not self._fila:
+                return
+            if trabalhador.trabalho is None:
+                trabalho = self._fila.popleft()
+                trabalho.status, trabalho.iniciado_em = "executando", time.time()
+                trabalhador.trabalho = trabalho
+                try:
+                    trabalhador.conexao.send(trabalho.opcoes_lote)
+                except OSError:
+                    pass  # processo morto: o fim da conexão é tratado em _receber
+
+    def _substituir(self, trabalhador: _Trabalhador):
+        _encerrar_processo(trabalhador)
+        self._trabalhadores[self._trabalhadores.index(trabalhador)] = self._iniciar_trabalhador()
+
+    @staticmethod
+    def _finalizar(trabalho: Trabalho, status: str):
+        trabalho.status, trabalho.concluido_em = status, time.time()
+        print(f"[{'✓' if status == 'sucesso' else '✗'}] Trabalho {trabalho.id}: {status}", flush=True)
+
+
+def _encerrar_processo(trabalhador: _Trabalhador):
+    trabalhador.trabalho = None
+    if trabalhador.processo.is_alive():
+        trabalhador.processo.terminate()
+        trabalhador.processo.join(5)
+        if trabalhador.processo.is_alive():
+            trabalhador.processo.kill()
+            trabalhador.processo.join()
+    trabalhador.conexao.close()
+
+
+class _ManipuladorHTTP(BaseHTTPRequestHandler):
+    """
+    API JSON do serviço:
+      POST   /trabalhos                       submete ({"configuracao": {...}} ou {"caminho_configuracao": "..."},
+                                              mais perfil_solver, timeout_segundos, relatorios,
+                                              qualidade_graficos, formato_graficos, forcar_resolucao e
+                                              tempo_limite_s opcionais)
+      GET    /trabalhos                       lista os trabalhos
+      GET    /trabalhos/<id>                  status, progresso e resultado
+      DELETE /trabalhos/<id>                  cancela
+      GET    /trabalhos/<id>/arquivos/<nome>  baixa um arquivo gerado (PDF, XLSX, JSON, log)
+      GET    /saude                           processos, ocupação e fila
+    """
+    servico: ServicoOtimizacao = None
+    _ROTA_TRABALHO = re.compile(r'^/trabalhos/([0-9a-f]+)$')
+    _ROTA_ARQUIVO = re.compile(r'^/trabalhos/([0-9a-f]+)/arquivos/([^/]+)$')
+
+    def do_GET(self):
+        if self.path == '/saude':
+            return self._responder(HTTPStatus.OK, self.servico.estado())
+        if self.path == '/trabalhos':
+            return self._responder(HTTPStatus.OK, self.servico.listar())
+        rota = self._ROTA_TRABALHO.match(self.path)
+        if rota:
+            descricao = self.servico.consultar(rota.group(1))
+            if descricao is None:
+                return self._responder(HTTPStatus.NOT_FOUND, {"erro": "trabalho inexistente"})
+            return self._responder(HTTPStatus.OK, descricao)
+        rota = self._ROTA_ARQUIVO.match(self.path)
+        if rota:
+            caminho = self.servico.caminho_arquivo(rota.group(1), rota.group(2))
+            if caminho is None:
+                return self._responder(HTTPStatus.NOT_FOUND, {"erro": "arquivo indisponível"})
+            return self._enviar_arquivo(caminho)
+        self._responder(HTTPStatus.NOT_FOUND, {"erro": "rota inexistente"})
+
+    def do_POST(self):
+        if self.path != '/trabalhos':
+            return self._responder(HTTPStatus.NOT_FOUND, {"erro": "rota inexistente"})
+        from . import lote
+        from .data_models import PERFIS_SOLVER, QUALIDADES_GRAFICO, FORMATOS_GRAFICO
+        try:
+            corpo = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            if ('configuracao' in corpo) == ('caminho_configuracao' in corpo):
+                raise ValueError("Informe 'configuracao' ou 'caminho_configuracao'.")
+            if corpo.get('perfil_solver') not in (None, *PERFIS_SOLVER):
+                raise ValueError(f"Perfil do solver deve ser um de: {', '.join(PERFIS_SOLVER)}.")
+            if corpo.get('relatorios', 'completo') not in lote.RELATORIOS_LOTE:
+                raise ValueError(f"Relatórios devem ser um de: {', '.join(lote.RELATORIOS_LOTE)}.")
+            if corpo.get('qualidade_graficos', 'impressao') not in QUALIDADES_GRAFICO:
+                raise ValueError(f"Qualidade dos gráficos deve ser uma de: {', '.join(QUALIDADES_GRAFICO)}.")
+            if corpo.get('formato_graficos', 'png') not in FORMATOS_GRAFICO:
+                raise ValueError(f"Formato dos gráficos deve ser um de: {', '.join(FORMATOS_GRAFICO)}.")
+            if not isinstance(corpo.get('planilhas_separadas', False), bool):
+                raise ValueError("'planilhas_separadas' deve ser verdadeiro ou falso.")
+            opcoes = {campo: corpo[campo] for campo in ('caminho_configuracao', 'perfil_solver', 'timeout_segundos',
+                                                        'relatorios', 'qualidade_graficos', 'formato_graficos',
+                                                        'forcar_resolucao', 'planilhas_separadas')
+                      if campo in corpo}
+            trabalho = self.servico.submeter(opcoes, corpo.get('tempo_limite_s'), corpo.get('configuracao'))
+        except (ValueError, TypeError, OSError) as e:
+            return self._responder(HTTPStatus.BAD_REQUEST, {"erro": str(e)})
+        self._responder(HTTPStatus.ACCEPTED, self.servico.consultar(trabalho.id))
+
+    def do_DELETE(self):
+        rota = self._ROTA_TRABALHO.match(self.path)
+        trabalho = self.servico.cancelar(rota.group(1)) if rota else None
+        if trabalho is None:
+            return self._responder(HTTPStatus.NOT_FOUND, {"erro": "trabalho inexistente"})
+        self._responder(HTTPStatus.ACCEPTED, self.servico.consultar(trabalho.id))
+
+    def _responder(self, status: HTTPStatus, dados: Any):
+        corpo = json.dumps(dados, ensure_ascii=False, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _enviar_arquivo(self, caminho: Path):
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', TIPOS_ARQUIVO.get(caminho.suffix, 'application/octet-stream'))
+        self.send_header('Content-Length', str(caminho.stat().st_size))
+        self.send_header('Content-Disposition', f'attachment; filename="{caminho.name}"')
+        self.end_headers()
+        with open(caminho, 'rb') as f:
+            while bloco := f.read(1 << 16):
+                self.wfile.write(bloco)
+
+    def address_string(self) -> str:
+        # Em socket Unix o endereço do cliente é uma string vazia
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+
+class _ServidorHTTPUnix(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def criar_servidor(servico: ServicoOtimizacao, host: str = '127.0.0.1', porta: int = PORTA_PADRAO,
+                   caminho_socket: Optional[Path] = None) -> socketserver.BaseServer:
+    """Servidor HTTP do serviço em host:porta ou, com `caminho_socket`, em um socket Unix."""
+    manipulador = type('ManipuladorServico', (_ManipuladorHTTP,), {'servico': servico})
+    if caminho_socket is not None:
+        Path(caminho_socket).unlink(missing_ok=True)
+        return _ServidorHTTPUnix(str(caminho_socket), manipulador)
+    return ThreadingHTTPServer((host, porta), manipulador)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m otimizador.servico",
+        description="Serviço local de otimização: fila de trabalhos HTTP atendida por processos pré-aquecidos.")
+    parser.add_argument("--host", default='127.0.0.1', help="endereço de escuta (padrão: só a máquina local)")
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO)
+    parser.add_argument("--socket", type=Path, help="escuta em um socket Unix em vez de host:porta")
+    parser.add_argument("--processos", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="trabalhos simultâneos (padrão: metade dos núcleos)")
+    parser.add_argument("--diretorio", type=Path, default=DIRETORIO_TRABALHOS,
+                        help="diretório dos arquivos de cada trabalho")
+    parser.add_argument("--tempo-limite", type=float, default=None,
+                        help="tempo máximo de parede por trabalho em segundos (o cliente pode informar outro)")
+    args = parser.parse_args(argv)
+
+    # SIGTERM (systemd, supervisores) encerra como o Ctrl-C: cancela os trabalhos e remove o socket
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    servico = ServicoOtimizacao(args.processos, args.diretorio, args.tempo_limite)
+    servidor = criar_servidor(servico, args.host, args.porta, args.socket)
+    servico.iniciar()
+    endereco = args.socket if args.socket is not None else f"http://{args.host}:{args.porta}"
+    print(f"[✓] Serviço de otimização em {endereco} com {args.processos} processos de trabalho. "
+          "Ctrl-C encerra.", flush=True)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[!] Encerrando o serviço.")
+    finally:
+        servidor.server_close()
+        servico.encerrar()
+        if args.socket is not None:
+            args.socket.unlink(missing_ok=True)
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# ARQUIVO: otimizador/tempo_importacao.py
+
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Módulo de entrada medido por padrão: o script interativo, cuja importação precede o menu de configurações
+MODULO_PADRAO = "main_custo"
+LIMITE_PADRAO_MS = 200.0
+# Dependências que só a otimização e os relatórios podem carregar; nenhuma pode aparecer na partida
+MODULOS_PESADOS = ("numpy", "pandas", "matplotlib", "fpdf", "ortools", "PIL")
+
+_LINHA_IMPORTTIME = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def medir_importacao(modulo: str, diretorio: Path) -> Tuple[float, Dict[str, float]]:
+    """
+    Importa `modulo` num interpretador novo com `-X importtime`. Retorna (tempo total de importação do
+    módulo em ms, tempo acumulado em ms de cada módulo carregado).
+    """
+    processo = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {modulo}"], cwd=diretorio,
+                              capture_output=True, text=True)
+    if processo.returncode != 0:
+        raise RuntimeError(f"Falha ao importar {modulo}:\n{processo.stderr.strip()}")
+    acumulados = {}
+    for linha in processo.stderr.splitlines():
+        encontrado = _LINHA_IMPORTTIME.match(linha)
+        if encontrado:
+            nome = encontrado.group(4)
+            # Um pacote pode ser registrado mais de uma vez; vale a maior medida
+            acumulados[nome] = max(acumulados.get(nome, 0.0), int(encontrado.group(2)) / 1000)
+    if modulo not in acumulados:
+        raise RuntimeError(f"Saída de -X importtime sem a linha de {modulo}.")
+    return acumulados[modulo], acumulados
+
+
+def pesados_carregados(acumulados: Dict[str, float]) -> List[str]:
+    """Pacotes de MODULOS_PESADOS presentes entre os módulos importados."""
+    return sorted({nome.split('.')[0] for nome in acumulados if nome.split('.')[0] in MODULOS_PESADOS})
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Mede o tempo de importação do ponto de entrada (menu interativo) e falha se passar do "
+                    "limite ou se carregar numpy, OR-Tools, pandas, matplotlib ou fpdf antes da hora.")
+    parser.add_argument("--modulo", default=MODULO_PADRAO, help=f"módulo medido (padrão: {MODULO_PADRAO})")
+    parser.add_argument("--diretorio", type=Path, default=Path(__file__).resolve().parent.parent,
+                        help="diretório de onde o módulo é importado (padrão: raiz do projeto)")
+    parser.add_argument("--repeticoes", type=int, default=5, help="execuções medidas (vale a mediana)")
+    parser.add_argument("--limite-ms", type=float, default=LIMITE_PADRAO_MS, help="tempo máximo aceito em ms")
+    parser.add_argument("--mais-lentos", type=int, default=10, help="módulos mais lentos exibidos")
+    argumentos = parser.parse_args(argv)
+    if argumentos.repeticoes < 1:
+        parser.error("--repeticoes deve ser pelo menos 1")
+
+    try:
+        medidas = [medir_importacao(argumentos.modulo, argumentos.diretorio)
+                   for _ in range(argumentos.repeticoes)]
+    except RuntimeError as e:
+        print(f"[✗] {e}")
+        return 1
+    mediana = statistics.median(total for total, _ in medidas)
+    _, acumulados = medidas[-1]
+
+    print(f"Importação de {argumentos.modulo}: mediana {mediana:.1f} ms em {argumentos.repeticoes} execuções "
+          f"(limite {argumentos.limite_ms:.0f} ms)")
+    print("Módulos mais lentos (acumulado, última execução):")
+    for nome, tempo in sorted(acumulados.items(), key=lambda item: -item[1])[:argumentos.mais_lentos]:
+        print(f"  {tempo:8.1f} ms  {nome}")
+
+    aprovado = True
+    pesados = pesados_carregados(acumulados)
+    if pesados:
+        print(f"[✗] Dependências pesadas carregadas na partida: {', '.join(pesados)}")
+        aprovado = False
+    if mediana > argumentos.limite_ms:
+        print(f"[✗] Importação acima do limite: {mediana:.1f} ms > {argumentos.limite_ms:.0f} ms")
+        aprovado = False
+    if aprovado:
+        print("[✓] Partida dentro do limite e sem dependências pesadas")
+    return 0 if aprovado else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,12 @@
 # ARQUIVO: otimizador/utils.py
 
 from datetime import datetime, timedelta
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Iterable, Optional
 from collections import defaultdict
+import numpy as np
 
 # Import relativo para acessar os modelos de dados
-from .data_models import Projeto, ConfiguracaoProjeto, ParametrosOtimizacao, Instrutor
+from .data_models import Projeto, ConfiguracaoProjeto, ParametrosOtimizacao, Instrutor, Turma, IndiceIncidencia
 
 
 def gerar_lista_meses(data_inicio: str, data_fim: str) -> List[str]:
@@ -52,6 +53,65 @@ def calcular_meses_ativos(mes_inicio: int, duracao: int, meses_ferias: List[int]
     return meses_ativos
 
 
+def calcular_padroes_meses_ativos(chaves: Iterable[Tuple[int, int]], meses_ferias: List[int],
+                                  num_meses: int) -> Dict[Tuple[int, int], List[int]]:
+    """
+    Calcula os meses ativos uma única vez por par (mês de início, duração), lidos da linha do início
+    na matriz de cobertura da duração (uma matriz NumPy por duração distinta).
+    """
+    padroes, matrizes = {}, {}
+    for mes_inicio, duracao in chaves:
+        if (mes_inicio, duracao) in padroes:
+            continue
+        if not 0 <= mes_inicio < num_meses:
+            padroes[(mes_inicio, duracao)] = calcular_meses_ativos(mes_inicio, duracao, meses_ferias, num_meses)
+            continue
+        if duracao not in matrizes:
+            matrizes[duracao] = calcular_matriz_cobertura(duracao, meses_ferias, num_meses)
+        padroes[(mes_inicio, duracao)] = np.flatnonzero(matrizes[duracao][mes_inicio]).tolist()
+    return padroes
+
+
+def calcular_matriz_cobertura(duracao: int, meses_ferias: Iterable[int], num_meses: int) -> np.ndarray:
+    """
+    Matriz booleana início × mês: a linha s marca os meses ativos de uma turma de `duracao` meses
+    iniciada em s. É calculada de uma vez a partir da contagem acumulada de meses letivos: o mês m
+    está ativo se m >= s, não é férias e há no máximo `duracao` meses letivos em [s, m].
+    """
+    letivo = np.ones(num_meses, dtype=bool)
+    letivo[[m for m in meses_ferias if 0 <= m < num_meses]] = False
+    acumulado = np.cumsum(letivo)
+    antes_do_inicio = np.concatenate(([0], acumulado[:-1]))
+    meses = np.arange(num_meses)
+    return ((meses[None, :] >= meses[:, None]) & letivo[None, :]
+            & (acumulado[None, :] - antes_do_inicio[:, None] <= duracao))
+
+
+def calcular_matrizes_cobertura(duracoes: Iterable[int], meses_ferias: List[int],
+                                num_meses: int) -> Dict[int, np.ndarray]:
+    """Uma matriz de cobertura por duração distinta, compartilhada pelos projetos com a mesma duração."""
+    return {duracao: calcular_matriz_cobertura(duracao, meses_ferias, num_meses) for duracao in set(duracoes)}
+
+
+def construir_indice_incidencia(turmas: List[Turma], meses_ferias: List[int], num_meses: int) -> IndiceIncidencia:
+    """
+    Constrói o índice turma × mês. Turmas com o mesmo início e duração compartilham o mesmo padrão,
+    tirado das matrizes de cobertura NumPy, de modo que o custo cresce com o número de entradas não
+    nulas e não com turmas × meses. O índice guarda listas de turmas, e não uma matriz, porque os
+    modelos CP-SAT e os relatórios percorrem as turmas ativas de cada (habilidade, mês).
+    """
+    padroes = calcular_padroes_meses_ativos(((t.mes_inicio, t.duracao) for t in turmas), meses_ferias, num_meses)
+    indice = IndiceIncidencia(num_meses=num_meses)
+    turmas_por_mes = defaultdict(list)
+    for t in turmas:
+        meses_ativos = padroes[(t.mes_inicio, t.duracao)]
+        indice.meses_por_turma[t.id] = meses_ativos
+        for m in meses_ativos:
+            turmas_por_mes[(t.habilidade, m)].append(t)
+    indice.turmas_por_mes = dict(turmas_por_mes)
+    return indice
+
+
 def calcular_janela_inicio(mes_inicio_projeto: int, mes_fim_projeto: int, duracao: int, meses_ferias: List[int],
                            num_meses: int, meses: List[str]) -> Tuple[int, int]:
     """Calcula a janela válida de início garantindo término dentro do prazo."""
@@ -74,6 +134,13 @@ def calcular_turmas_por_projeto(limite_total: int, percentual_prog: float) -> Tu
     return num_prog, limite_total - num_prog
 
 
+def nomes_projetos_modelo(config: ConfiguracaoProjeto) -> List[str]:
+    """Nomes dos projetos do modelo gerados a partir de uma configuração (um por onda)."""
+    if config.ondas == 1:
+        return [config.nome]
+    return [f"{config.nome}_Onda{onda_idx + 1}" for onda_idx in range(config.ondas)]
+
+
 def converter_projetos_para_modelo(projetos_config: List[ConfiguracaoProjeto], meses: List[str],
                                    meses_ferias: List[int], parametros: ParametrosOtimizacao) -> List[Projeto]:
     """Converte configurações de projetos para estrutura do modelo."""
@@ -101,7 +168,7 @@ def converter_projetos_para_modelo(projetos_config: List[ConfiguracaoProjeto], m
                         prog_por_onda * (config.ondas - 1)) if onda_idx == config.ondas - 1 else prog_por_onda
                 rob_onda = rob_total - (
                         rob_por_onda * (config.ondas - 1)) if onda_idx == config.ondas - 1 else rob_por_onda
-                nome_onda = f"{config.nome}_Onda{onda_idx + 1}"
+                nome_onda = nomes_projetos_modelo(config)[onda_idx]
                 projetos_modelo.append(
                     Projeto(nome_onda, prog_onda, rob_onda, config.duracao_curso, inicio_min, inicio_max,
                             config.mes_termino_idx))
@@ -110,6 +177,30 @@ def converter_projetos_para_modelo(projetos_config: List[ConfiguracaoProjeto], m
     return projetos_modelo
 
 
+def criar_turmas(cronograma_flexivel: Dict, projetos: List[Projeto]) -> List[Turma]:
+    """Cria as turmas individuais a partir do cronograma do Estágio 1."""
+    all_turmas = []
+    turma_counter = 0
+    projetos_dict = {p.nome: p for p in projetos}
+
+    for proj_nome, cronogramas in cronograma_flexivel.items():
+        proj_details = projetos_dict.get(proj_nome)
+        if not proj_details:
+            continue
+
+        for crono in cronogramas:
+            habilidade_str = crono.get('habilidade', 'PROG')
+            habilidade = 'PROG' if habilidade_str == 'PROG' else 'ROBOTICA'
+
+            for _ in range(crono['num_turmas']):
+                turma_id = f'{proj_nome}_{habilidade[:3]}_{turma_counter}'
+                all_turmas.append(
+                    Turma(turma_id, proj_nome, habilidade, crono['mes_inicio'], proj_details.duracao)
+                )
+                turma_counter += 1
+    return all_turmas
+
+
 def renumerar_instrutores_ativos(atribuicoes: List[Dict]) -> Tuple[List[Dict], Dict[str, int]]:
     """Renumera apenas os instrutores que receberam turmas e retorna a contagem por habilidade."""
     print("\n--- Renumerando Instrutores Ativos ---")
@@ -161,7 +252,8 @@ def analisar_distribuicao_instrutores_por_projeto(atribuicoes: List[Dict]) -> Di
 
 def calcular_fluxo_caixa_por_projeto(atribuicoes: List[Dict], meses: List[str],
                                      meses_ferias: List[int],
-                                     remuneracao_instrutor: float) -> Dict[str, Dict[str, float]]:
+                                     remuneracao_instrutor: float,
+                                     indice: Optional[IndiceIncidencia] = None) -> Dict[str, Dict[str, float]]:
     """
     Calcula o fluxo de caixa mensal por projeto.
 
@@ -175,6 +267,8 @@ def calcular_fluxo_caixa_por_projeto(atribuicoes: List[Dict], meses: List[str],
         }
     """
     print("\n--- Calculando Fluxo de Caixa por Projeto ---")
+    if indice is None:
+        indice = construir_indice_incidencia([atr['turma'] for atr in atribuicoes], meses_ferias, len(meses))
 
     # Estrutura: {projeto: {mes_idx: set_de_instrutores}}
     instrutores_por_projeto_mes = defaultdict(lambda: defaultdict(set))
@@ -184,16 +278,8 @@ def calcular_fluxo_caixa_por_projeto(atribuicoes: List[Dict], meses: List[str],
         instrutor = atr['instrutor']
         projeto_base = turma.projeto.split('_Onda')[0]
 
-        # Calcula os meses em que esta turma está ativa
-        meses_ativos = calcular_meses_ativos(
-            turma.mes_inicio,
-            turma.duracao,
-            meses_ferias,
-            len(meses)
-        )
-
         # Para cada mês ativo, registra que este instrutor trabalhou neste projeto
-        for mes_idx in meses_ativos:
+        for mes_idx in indice.meses_ativos(turma):
             instrutores_por_projeto_mes[projeto_base][mes_idx].add(instrutor.id)
 
     # Converte para fluxo de caixa
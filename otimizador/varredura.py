@@ -0,0 +1,284 @@
+# ARQUIVO: otimizador/varredura.py
+
+import argparse
+import contextlib
+import dataclasses
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple, Any
+
+import pandas as pd
+
+from .data_models import ParametrosOtimizacao, ConfiguracaoProjeto
+from .io import config_manager, cache_resultados
+from .utils import converter_projetos_para_modelo
+from .pipeline import preparar_horizonte, otimizar_estagios, gerar_relatorios
+
+DIRETORIO_VARREDURA = Path("varredura_cenarios")
+
+# Critérios (todos minimizados) da dominância de Pareto entre cenários
+CRITERIOS_PARETO = ('custo_total_previsto', 'total_instrutores_flex', 'pico_max', 'spread_carga')
+
+
+def expandir_cenarios(grade: Optional[Dict[str, List[Any]]] = None,
+                      cenarios: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """
+    Lista de sobreposições de parâmetros: o produto cartesiano da `grade` ({campo: [valores]})
+    seguido dos `cenarios` explícitos. Sem grade nem lista, um único cenário com a configuração base.
+    """
+    expandidos = []
+    if grade:
+        campos = list(grade)
+        expandidos.extend(dict(zip(campos, valores)) for valores in itertools.product(*(grade[c] for c in campos)))
+    expandidos.extend(dict(c) for c in cenarios or [])
+    campos_validos = {f.name for f in dataclasses.fields(ParametrosOtimizacao)}
+    for sobreposicoes in expandidos:
+        invalidos = set(sobreposicoes) - campos_validos
+        if invalidos:
+            raise ValueError(f"Campos de parâmetros desconhecidos na varredura: {', '.join(sorted(invalidos))}.")
+    return expandidos or [{}]
+
+
+def marcar_dominados(linhas: List[Dict]) -> List[Dict]:
+    """
+    Marca em 'dominado_por' o primeiro cenário que domina cada linha (não é pior em nenhum critério
+    de CRITERIOS_PARETO e é melhor em pelo menos um). Linhas sem solução ou acima do spread máximo
+    (status 'spread_relaxado') não entram na comparação.
+    """
+    validas = [linha for linha in linhas if linha['status'] == 'sucesso']
+    for linha in linhas:
+        linha['dominado_por'] = None
+        if linha['status'] != 'sucesso':
+            continue
+        for outra in validas:
+            if outra is not linha and all(outra[c] <= linha[c] for c in CRITERIOS_PARETO) \
+                    and any(outra[c] < linha[c] for c in CRITERIOS_PARETO):
+                linha['dominado_por'] = outra['cenario']
+                break
+    return linhas
+
+
+def _executar_cenario(numero: int, parametros_base: ParametrosOtimizacao,
+                      projetos_config: List[ConfiguracaoProjeto], sobreposicoes: Dict[str, Any],
+                      diretorio_saida: Path, forcar_resolucao: bool,
+                      num_processos: int = 1) -> Tuple[Dict, Optional[Tuple[Dict, Dict]]]:
+    """
+    Resolve um cenário em um processo filho, com a saída do terminal gravada em cenario_NN.log.
+    Usa o cache de resultados como a execução interativa; os workers do solver são repartidos entre
+    os `num_processos` cenários simultâneos. Retorna a linha da tabela e os resultados.
+    """
+    from .core.perfis_solver import dividir_workers
+    linha = {"cenario": numero, "sobreposicoes": sobreposicoes, "status": "erro", "erro": None,
+             "custo_total_previsto": None, "total_instrutores_flex": None, "pico_max": None,
+             "spread_carga": None, "tempo_s": None, "origem_resultados": None}
+    inicio = time.perf_counter()
+    # O log do CP-SAT é escrito em C++ direto no descritor 1: ele também aponta para o log do cenário,
+    # restaurado ao final porque o processo do pool resolve outros cenários em seguida
+    with open(Path(diretorio_saida) / f"cenario_{numero:02d}.log", 'w', encoding='utf-8', buffering=1) as log:
+        sys.stdout.flush()
+        saida_padrao = os.dup(1)
+        os.dup2(log.fileno(), 1)
+        try:
+            with contextlib.redirect_stdout(log):
+                parametros = dataclasses.replace(parametros_base, **sobreposicoes)
+                meses, meses_ferias_idx = preparar_horizonte(projetos_config, parametros)
+                projetos_modelo = converter_projetos_para_modelo(projetos_config, meses, meses_ferias_idx, parametros)
+
+                chave_cache = cache_resultados.calcular_chave_cache(parametros, projetos_config)
+                resultados = None if forcar_resolucao else cache_resultados.carregar_resultados(chave_cache)
+                linha['origem_resultados'] = "cache" if resultados is not None else "otimizacao"
+                if resultados is None:
+                    resultados_estagio1, resultados_estagio2 = otimizar_estagios(
+                        dividir_workers(parametros, num_processos), projetos_modelo, meses, meses_ferias_idx)
+                    if resultados_estagio1 is None or resultados_estagio2 is None:
+                        linha['status'] = 'falha_estagio_1' if resultados_estagio1 is None else 'falha_estagio_2'
+                        return linha, None
+                    resultados = (resultados_estagio1, resultados_estagio2)
+                    cache_resultados.salvar_resultados(chave_cache, *resultados)
+                resultados[0]['parametros'] = parametros
+        except ValueError as e:
+            linha['status'], linha['erro'] = 'invalido', str(e)
+            return linha, None
+        except Exception as e:
+            linha['erro'] = f"{type(e).__name__}: {e}"
+            return linha, None
+        finally:
+            linha['tempo_s'] = round(time.perf_counter() - inicio, 2)
+            log.flush()
+            os.dup2(saida_padrao, 1)
+            os.close(saida_padrao)
+
+    resultados_estagio1, resultados_estagio2 = resultados
+    linha.update({
+        "status": "spread_relaxado" if resultados_estagio2.get('spread_relaxado') else "sucesso",
+        "custo_total_previsto": resultados_estagio2['custo_total_previsto'],
+        "total_instrutores_flex": resultados_estagio2['total_instrutores_flex'],
+        "pico_max": resultados_estagio1['pico_max'],
+        "spread_carga": resultados_estagio2['spread_carga'],
+    })
+    return linha, resultados
+
+
+def executar_varredura(parametros_base: ParametrosOtimizacao, projetos_config: List[ConfiguracaoProjeto],
+                       cenarios: List[Dict[str, Any]], diretorio_saida: Path = DIRETORIO_VARREDURA,
+                       max_processos: Optional[int] = None, relatorios: Optional[List[int]] = None,
+                       relatorios_pareto: bool = False, forcar_resolucao: bool = False) -> List[Dict]:
+    """
+    Resolve os dois estágios de cada cenário (parâmetros base + sobreposições) em um pool de
+    processos, marca os cenários dominados e grava a tabela em Varredura_Cenarios.xlsx/.json.
+    Cada cenário usa a sua parte dos workers do perfil (núcleos / processos, pelo menos 1).
+    Relatórios completos (planilhas e PDF) são gerados apenas para os cenários em `relatorios`
+    (números a partir de 1) e, com `relatorios_pareto`, para os não dominados, cada um em cenario_NN/.
+    """
+    diretorio_saida = Path(diretorio_saida)
+    diretorio_saida.mkdir(parents=True, exist_ok=True)
+    max_processos = max(1, min(len(cenarios), max_processos or os.cpu_count() or 1))
+    print("\n" + "=" * 80 + f"\nVARREDURA DE CENÁRIOS: {len(cenarios)} cenários em {max_processos} processos\n"
+          + "=" * 80)
+
+    linhas, resultados_por_cenario = [], {}
+    with ProcessPoolExecutor(max_workers=max_processos) as executor:
+        futuros = [executor.submit(_executar_cenario, numero, parametros_base, projetos_config, sobreposicoes,
+                                   diretorio_saida, forcar_resolucao, max_processos)
+                   for numero, sobreposicoes in enumerate(cenarios, 1)]
+        for futuro in as_completed(futuros):
+            linha, resultados = futuro.result()
+            linhas.append(linha)
+            if resultados is not None:
+                resultados_por_cenario[linha['cenario']] = resultados
+            marcador = {"sucesso": "[✓]", "spread_relaxado": "[!]"}.get(linha['status'], "[✗]")
+            origem = ", cache" if linha['origem_resultados'] == "cache" else ""
+            print(f"{marcador} Cenário {linha['cenario']:>2} ({linha['status']}{origem}, {linha['tempo_s']:.1f}s): "
+                  f"{_descrever(linha['sobreposicoes'])}", flush=True)
+
+    linhas = marcar_dominados(sorted(linhas, key=lambda l: l['cenario']))
+    _exibir_tabela(linhas)
+    _gravar_tabela(linhas, diretorio_saida)
+
+    selecionados = set(relatorios or [])
+    if relatorios_pareto:
+        selecionados.update(l['cenario'] for l in linhas if l['status'] == 'sucesso' and l['dominado_por'] is None)
+    for numero in sorted(selecionados):
+        if numero not in resultados_por_cenario:
+            print(f"[AVISO] Cenário {numero} sem solução; relatório não gerado.")
+            continue
+        resultados_estagio1, resultados_estagio2 = resultados_por_cenario[numero]
+        parametros = resultados_estagio1['parametros']
+        meses, meses_ferias_idx = preparar_horizonte(projetos_config, parametros)
+        print(f"\n--- Relatórios do cenário {numero}: {_descrever(cenarios[numero - 1])} ---")
+        gerar_relatorios(projetos_config, parametros, meses, meses_ferias_idx, resultados_estagio1,
+                         resultados_estagio2, diretorio_saida / f"cenario_{numero:02d}")
+    return linhas
+
+
+def _descrever(sobreposicoes: Dict[str, Any]) -> str:
+    return ', '.join(f"{campo}={valor}" for campo, valor in sobreposicoes.items()) or "configuração base"
+
+
+def _exibir_tabela(linhas: List[Dict]):
+    """Exibe no terminal a tabela da varredura, com os cenários não dominados destacados."""
+    print("\n" + "=" * 80 + "\nRESULTADO DA VARREDURA\n" + "=" * 80)
+    for linha in linhas:
+        if linha['status'] in ('sucesso', 'spread_relaxado'):
+            custo = f"R$ {linha['custo_total_previsto']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+            detalhe = (f"{custo} | {linha['total_instrutores_flex']} instrutores | pico {linha['pico_max']} | "
+                       f"spread {linha['spread_carga']} | {linha['tempo_s']:.1f}s")
+            marcador = (f" (dominado pelo {linha['dominado_por']})" if linha['dominado_por'] is not None
+                        else " <- Pareto")
+            if linha['status'] == 'spread_relaxado':
+                marcador = " (acima do spread máximo; fora do Pareto)"
+        else:
+            detalhe, marcador = linha['status'] + (f": {linha['erro']}" if linha['erro'] else ""), ""
+        print(f"  • Cenário {linha['cenario']:>2} [{_descrever(linha['sobreposicoes'])}]: {detalhe}{marcador}")
+
+
+def _gravar_tabela(linhas: List[Dict], diretorio_saida: Path):
+    """Grava a tabela da varredura em Excel (uma coluna por parâmetro variado) e em JSON."""
+    campos = list(dict.fromkeys(campo for linha in linhas for campo in linha['sobreposicoes']))
+    df = pd.DataFrame([{
+        'Cenário': linha['cenario'],
+        **{campo: linha['sobreposicoes'].get(campo) for campo in campos},
+        'Status': linha['status'],
+        'Custo Total': linha['custo_total_previsto'],
+        'Instrutores': linha['total_instrutores_flex'],
+        'Pico': linha['pico_max'],
+        'Spread': linha['spread_carga'],
+        'Tempo (s)': linha['tempo_s'],
+        'Dominado por': linha['dominado_por'],
+        'Origem': linha['origem_resultados'],
+    } for linha in linhas])
+    caminho_xlsx = diretorio_saida / 'Varredura_Cenarios.xlsx'
+    df.to_excel(caminho_xlsx, index=False, sheet_name='Cenários')
+    with open(diretorio_saida / 'Varredura_Cenarios.json', 'w', encoding='utf-8') as f:
+        json.dump(linhas, f, indent=2, ensure_ascii=False, default=str)
+    print(f"\n[✓] Tabela da varredura salva em: {caminho_xlsx}")
+
+
+def _interpretar_valor(texto: str) -> Any:
+    """Valor de parâmetro na linha de comando: JSON quando possível (números, true/false, listas), senão texto."""
+    try:
+        return json.loads(texto)
+    except json.JSONDecodeError:
+        return texto
+
+
+def _interpretar_atribuicoes(texto: str, multiplos: bool) -> Dict[str, Any]:
+    """'campo=v1,v2' (grade) ou 'campo=v;campo2=v' (cenário explícito)."""
+    resultado = {}
+    for parte in texto.split(';'):
+        campo, _, valores = parte.partition('=')
+        if not campo or not valores:
+            raise argparse.ArgumentTypeError(f"Use campo=valor: '{parte}'")
+        resultado[campo.strip()] = ([_interpretar_valor(v.strip()) for v in valores.split(',')] if multiplos
+                                    else _interpretar_valor(valores.strip()))
+    return resultado
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m otimizador.varredura",
+        description="Resolve uma configuração salva para vários conjuntos de parâmetros e compara os resultados.")
+    parser.add_argument("configuracao", type=Path, help="arquivo JSON de configuração (configuracoes_otimizacao/)")
+    parser.add_argument("--grade", action="append", default=[], metavar="CAMPO=V1,V2",
+                        type=lambda t: _interpretar_atribuicoes(t, True),
+                        help="valores de um parâmetro; várias --grade formam o produto cartesiano")
+    parser.add_argument("--cenario", action="append", default=[], metavar="CAMPO=V;CAMPO2=V",
+                        type=lambda t: _interpretar_atribuicoes(t, False), help="cenário explícito adicional")
+    parser.add_argument("--arquivo-cenarios", type=Path,
+                        help='JSON com {"grade": {campo: [valores]}, "cenarios": [{campo: valor}]}')
+    parser.add_argument("--saida", type=Path, default=DIRETORIO_VARREDURA, help="diretório de saída")
+    parser.add_argument("--processos", type=int, default=None, help="processos simultâneos (padrão: núcleos)")
+    parser.add_argument("--relatorios", default="",
+                        help="cenários com relatório completo: números separados por vírgula e/ou 'pareto'")
+    parser.add_argument("--forcar-resolucao", action="store_true", help="ignora o cache de resultados")
+    args = parser.parse_args(argv)
+
+    grade = {campo: valores for g in args.grade for campo, valores in g.items()}
+    cenarios = list(args.cenario)
+    if args.arquivo_cenarios:
+        with open(args.arquivo_cenarios, 'r', encoding='utf-8') as f:
+            definicao = json.load(f)
+        grade.update(definicao.get("grade", {}))
+        cenarios.extend(definicao.get("cenarios", []))
+
+    parametros, projetos_config = config_manager.carregar_configuracao(args.configuracao)
+    if not (parametros and projetos_config):
+        sys.exit(1)
+    selecao = [s.strip() for s in args.relatorios.split(',') if s.strip()]
+    try:
+        linhas = executar_varredura(parametros, projetos_config, expandir_cenarios(grade, cenarios), args.saida,
+                                    args.processos, [int(s) for s in selecao if s != 'pareto'],
+                                    'pareto' in selecao, args.forcar_resolucao)
+    except ValueError as e:
+        print(f"\n[ERRO] {e}")
+        sys.exit(1)
+    sys.exit(0 if any(linha['status'] == 'sucesso' for linha in linhas) else 1)
+
+
+if __name__ == "__main__":
+    main()